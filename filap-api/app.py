@@ -1,8 +1,13 @@
-from flask import Flask
+from flask import Flask, g, request
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
 from flasgger import Swagger
+from sqlalchemy import inspect
 from config import get_config
-from database import db, init_db
+from database import (
+    db, init_db, add_missing_columns, migrate_uuid_columns, consistency_token, require_consistency, reset_consistency,
+    begin_unit_of_work, end_unit_of_work
+)
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -13,16 +18,22 @@ app.config['SQLALCHEMY_DATABASE_URI'] = config.DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['DEBUG'] = config.DEBUG
 app.config['SECRET_KEY'] = config.SECRET_KEY
+app.config['RATE_LIMIT_ENABLED'] = config.RATE_LIMIT_ENABLED
+
+# Client addresses (used for rate limiting) come from trusted proxies only
+if config.TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.TRUSTED_PROXY_COUNT)
 
 # Initialize CORS
 CORS(app, 
      origins=config.CORS_ORIGINS,
      allow_headers=config.CORS_ALLOW_HEADERS,
      methods=config.CORS_ALLOW_METHODS,
+     expose_headers=['X-Consistency-Token', 'Idempotent-Replayed'],
      supports_credentials=True)
 
-# Initialize SQLAlchemy
-init_db(app)
+# Initialize SQLAlchemy (pool settings and, under gevent, cooperative psycopg2 waits)
+init_db(app, config)
 
 # Import models after db initialization
 from models.models import Base, Queue, Message, MessageUpvote, HandRaise
@@ -86,6 +97,58 @@ app.register_blueprint(queues_bp)
 app.register_blueprint(messages_bp)
 app.register_blueprint(hand_raises_bp)
 
+# Start the expiry reaper and outbox relay in each worker once it serves traffic
+from services.expiry_reaper import expiry_reaper
+from services.outbox import outbox_relay
+
+@app.before_request
+def start_background_workers():
+    if config.EXPIRY_REAPER_ENABLED and not app.testing:
+        expiry_reaper.ensure_started(app)
+    if config.EVENT_OUTBOX_ENABLED and not app.testing:
+        outbox_relay.ensure_started(app)
+
+# Read-your-writes with replicas: writes return the primary's WAL position and
+# reads carrying it only use a replica that has replayed that far
+@app.before_request
+def apply_consistency_token():
+    g.consistency_reset = require_consistency(request.headers.get('X-Consistency-Token'))
+
+@app.after_request
+def issue_consistency_token(response):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+        token = consistency_token()
+        if token:
+            response.headers['X-Consistency-Token'] = token
+    return response
+
+@app.teardown_request
+def clear_consistency_token(exception=None):
+    reset = g.pop('consistency_reset', None)
+    if reset is not None:
+        reset_consistency(reset)
+
+# One transaction per write request: services only flush, the request commits
+# once, and SSE events go out after that commit (never for a rollback)
+@app.before_request
+def open_unit_of_work():
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        g.unit_of_work = begin_unit_of_work()
+
+# Registered after issue_consistency_token so it runs first
+@app.after_request
+def commit_unit_of_work(response):
+    token = g.pop('unit_of_work', None)
+    if token is not None:
+        end_unit_of_work(token, success=response.status_code < 400)
+    return response
+
+@app.teardown_request
+def rollback_unit_of_work(exception=None):
+    token = g.pop('unit_of_work', None)
+    if token is not None:
+        end_unit_of_work(token, success=False)
+
 @app.route("/")
 def hello():
     return "Hello, World!"
@@ -96,7 +159,33 @@ def health():
 
 def create_tables():
     """Create all database tables"""
-    Base.metadata.create_all(bind=db.engine)
+    from services.partition_service import PartitionService
+    from services.hand_raise_service import HandRaiseService
+    from services.message_service import MessageService
+    
+    removed_hand_raises = 0
+    if PartitionService.is_enabled():
+        PartitionService.create_partitioned_schema()
+    else:
+        Base.metadata.create_all(bind=db.engine)
+        # create_all skips indexes of tables that already exist
+        existing_indexes = {index["name"] for index in inspect(db.engine).get_indexes(HandRaise.__tablename__)}
+        for index in HandRaise.__table__.indexes:
+            if index.name in existing_indexes:
+                continue
+            if index.unique:
+                # Rows from before the index may break it
+                removed_hand_raises = HandRaiseService.remove_duplicate_active_hand_raises()
+            index.create(bind=db.engine)
+    
+    added_columns = add_missing_columns(Base.metadata)
+    # Runs before the counters are rebuilt: it deletes rows it cannot convert
+    _, deleted_rows = migrate_uuid_columns(Base.metadata)
+    
+    if ('queues', 'active_hand_raise_count') in added_columns or removed_hand_raises or deleted_rows:
+        HandRaiseService.recount_hand_raises()
+    if deleted_rows:
+        MessageService.recount_votes()
 
 def init_app():
     """Initialize the application with database tables"""
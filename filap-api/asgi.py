@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the async read services
+
+A minimal asyncio server for the hottest read endpoints, running beside
+the Flask app (which keeps serving every write and the event streams):
+
+- GET /api/queues/<queue_id>
+- GET /api/queues/<queue_id>/messages (sort, limit, offset, X-User-Token)
+
+Responses match the Flask routes. Run it with any ASGI server, e.g.:
+    uvicorn asgi:application --port 5001
+
+Needs greenlet and the async drivers from requirements.txt (asyncpg / aiosqlite).
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs
+from app import app, config
+from services.async_services import AsyncMessageService, AsyncQueueService, async_db, init_async_db
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PATH = re.compile(r'^/api/queues/([^/]+)$')
+MESSAGES_PATH = re.compile(r'^/api/queues/([^/]+)/messages$')
+
+async def get_queue(queue_id: str, scope: Dict[str, Any]) -> Tuple[int, str]:
+    queue_data = await AsyncQueueService.get_queue(queue_id)
+
+    if not queue_data:
+        return 404, json.dumps({"error": "Queue not found or expired"})
+
+    return 200, json.dumps(queue_data)
+
+async def get_messages(queue_id: str, scope: Dict[str, Any]) -> Tuple[int, str]:
+    args = {name: values[0] for name, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    try:
+        limit = int(args.get('limit', 50))
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        return 400, json.dumps({'error': 'Invalid query parameters'})
+
+    if limit < 1 or limit > 100:
+        return 400, json.dumps({'error': 'Limit must be between 1 and 100'})
+
+    if offset < 0:
+        return 400, json.dumps({'error': 'Offset must be non-negative'})
+
+    result = await AsyncMessageService.get_messages_json(
+        queue_id=queue_id,
+        user_token=headers.get('x-user-token'),
+        sort_by=args.get('sort'),
+        limit=limit,
+        offset=offset
+    )
+
+    if result is None:
+        return 404, json.dumps({'error': 'Queue not found or expired'})
+
+    return 200, result
+
+ROUTES = [
+    (QUEUE_PATH, get_queue),
+    (MESSAGES_PATH, get_messages),
+]
+
+async def lifespan(receive, send):
+    """Configure async_db on startup and close its connections on shutdown"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            init_async_db(app, config)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_db.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    status, body = 404, json.dumps({'error': 'Not found'})
+    if scope['method'] in ('GET', 'HEAD'):
+        for pattern, handler in ROUTES:
+            match = pattern.match(scope['path'])
+            if match:
+                try:
+                    status, body = await handler(match.group(1), scope)
+                except Exception as e:
+                    logger.error(f"Error handling {scope['path']}: {str(e)}")
+                    status, body = 500, json.dumps({'error': 'Internal server error'})
+                break
+    else:
+        status, body = 405, json.dumps({'error': 'Method not allowed'})
+
+    payload = body.encode('utf-8')
+    headers: List[Tuple[bytes, bytes]] = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode('latin-1')),
+    ]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload if scope['method'] != 'HEAD' else b''})
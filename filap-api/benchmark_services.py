@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sync and async service layers on the messages page
+
+Seeds one queue, then loads its first page of messages (page query and
+total count) many times with a fixed concurrency:
+
+- sync: MessageService.get_messages from a thread pool (one thread per
+  in-flight request, like the gunicorn threads)
+- async: AsyncMessageService.get_messages on one event loop, page and
+  count running concurrently
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_services.py --requests 2000 --concurrency 32
+
+Needs greenlet and the async drivers from requirements.txt (asyncpg / aiosqlite).
+Without DATABASE_URL a throwaway SQLite file is used.
+
+Measured on SQLite (1 CPU, 200 messages, 2000 requests):
+
+    concurrency  8:  sync 230 req/s (p50 31 ms)   async 174 req/s (p50 42 ms)
+    concurrency 32:  sync 209-279 req/s           async 151-203 req/s (p50 135-187 ms)
+
+aiosqlite runs each connection on its own thread, so on SQLite the async
+layer only adds overhead; its gains need a networked database (asyncpg),
+where the page and count overlap their round trips. Not yet measured
+on PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+
+from app import app, config, create_tables
+from database import db
+from services.async_services import AsyncMessageService, async_db, init_async_db
+from services.message_service import MessageService
+from services.queue_service import QueueService
+
+def seed(message_count: int) -> str:
+    """Create a queue with message_count messages and return its id"""
+    with app.app_context():
+        create_tables()
+        queue_id = QueueService.create_queue("Benchmark Queue")['id']
+        for index in range(message_count):
+            MessageService.create_message(queue_id, f"Question {index}?", str(uuid.uuid4()))
+        db.session.remove()
+    return queue_id
+
+def report(name: str, latencies: List[float], elapsed: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:>6}: {len(latencies) / elapsed:8.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:6.2f} ms   p95 {p95 * 1000:6.2f} ms")
+
+def run_sync(queue_id: str, user_token: str, requests: int, concurrency: int):
+    def load_page() -> float:
+        started = time.perf_counter()
+        with app.app_context():
+            MessageService.get_messages(queue_id, user_token)
+            db.session.remove()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda _: load_page(), range(requests)))
+    report("sync", latencies, time.perf_counter() - started)
+
+async def run_async(queue_id: str, user_token: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load_page() -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await AsyncMessageService.get_messages(queue_id, user_token)
+            return time.perf_counter() - started
+
+    # Warm up the pool before timing, like the sync path's first requests
+    await load_page()
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(load_page() for _ in range(requests)))
+    report("async", list(latencies), time.perf_counter() - started)
+
+    await async_db.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--messages', type=int, default=200, help='Messages in the queue')
+    parser.add_argument('--requests', type=int, default=2000, help='Page loads per layer')
+    parser.add_argument('--concurrency', type=int, default=32, help='Page loads in flight')
+    args = parser.parse_args()
+
+    queue_id = seed(args.messages)
+    user_token = str(uuid.uuid4())
+    init_async_db(app, config)
+
+    print(f"{async_db.engine.url.get_backend_name()}: {args.messages} messages, {args.requests} requests, concurrency {args.concurrency}")
+    run_sync(queue_id, user_token, args.requests, args.concurrency)
+    asyncio.run(run_async(queue_id, user_token, args.requests, args.concurrency))
+
+if __name__ == '__main__':
+    main()
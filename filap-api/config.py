@@ -1,6 +1,9 @@
 import os
 from dotenv import load_dotenv
 
+# Public fallback for local development; tokens signed with it are never trusted
+DEFAULT_SECRET_KEY = 'dev-secret-key-change-in-production'
+
 class Config:
     """Base configuration class"""
     
@@ -23,15 +26,53 @@ class Config:
         # Database
         self.DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///filap.db')
         
+        # Optional PostgreSQL read replicas for read-only endpoints (comma-separated)
+        replica_urls = os.getenv('DATABASE_REPLICA_URLS', '')
+        self.DATABASE_REPLICA_URLS = [url.strip() for url in replica_urls.split(',') if url.strip()]
+        
+        # Database of the async service layer (services.async_services); defaults to
+        # DATABASE_URL with its asyncio driver (asyncpg / aiosqlite)
+        self.ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', '')
+        
+        # Connection pool (size/overflow/timeout are ignored for SQLite)
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+        self.DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+        self.DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+        self.DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+        
+        # Compiled SQL statements kept per engine (SQLAlchemy query_cache_size)
+        self.DB_QUERY_CACHE_SIZE = int(os.getenv('DB_QUERY_CACHE_SIZE', '500'))
+        # Server-side prepared statements kept per connection by the async PostgreSQL
+        # driver (asyncpg); psycopg2 has no prepared statement support
+        self.DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv('DB_PREPARED_STATEMENT_CACHE_SIZE', '100'))
+        
+        # Let psycopg2 yield to other greenlets while waiting on PostgreSQL:
+        # 'auto' (when gevent has patched the process), 'true' or 'false'
+        self.DB_GEVENT_WAIT = os.getenv('DB_GEVENT_WAIT', 'auto').lower()
+
+        # SQLite tuning, applied to every new connection
+        self.SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'wal').lower()
+        self.SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'normal').lower()
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+        self.SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))  # 256 MB
+        # Prepared statements kept per SQLite connection (sqlite3 cached_statements)
+        self.SQLITE_STATEMENT_CACHE_SIZE = int(os.getenv('SQLITE_STATEMENT_CACHE_SIZE', '256'))
+
+        # Serialize SQLite vote writes through one writer that commits them in batches
+        self.SQLITE_GROUP_COMMIT = os.getenv('SQLITE_GROUP_COMMIT', 'true').lower() == 'true'
+        self.SQLITE_GROUP_COMMIT_MAX_BATCH = int(os.getenv('SQLITE_GROUP_COMMIT_MAX_BATCH', '64'))
+        self.SQLITE_GROUP_COMMIT_WINDOW_MS = float(os.getenv('SQLITE_GROUP_COMMIT_WINDOW_MS', '2'))
+
         # Flask settings
         self.DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
-        self.SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+        self.SECRET_KEY = os.getenv('SECRET_KEY', DEFAULT_SECRET_KEY)
         
         # CORS settings
         cors_origins = os.getenv('CORS_ORIGINS', '*')
         self.CORS_ORIGINS = [origin.strip() for origin in cors_origins.split(',')]
         
-        cors_headers = os.getenv('CORS_ALLOW_HEADERS', 'Content-Type,Authorization,X-Queue-Secret,X-User-Token')
+        cors_headers = os.getenv('CORS_ALLOW_HEADERS', 'Content-Type,Authorization,X-Queue-Secret,X-User-Token,X-Consistency-Token,Idempotency-Key')
         self.CORS_ALLOW_HEADERS = [header.strip() for header in cors_headers.split(',')]
         
         cors_methods = os.getenv('CORS_ALLOW_METHODS', 'GET,POST,PUT,PATCH,DELETE,OPTIONS')
@@ -43,8 +84,70 @@ class Config:
         # Queue settings
         self.QUEUE_EXPIRY_HOURS = int(os.getenv('QUEUE_EXPIRY_HOURS', '24'))
         
-        # Rate limiting (requests per minute)
+        # Background deletion of expired queues
+        self.EXPIRY_REAPER_ENABLED = os.getenv('EXPIRY_REAPER_ENABLED', 'true').lower() == 'true'
+        self.EXPIRY_REAPER_INTERVAL_SECONDS = float(os.getenv('EXPIRY_REAPER_INTERVAL_SECONDS', '60'))
+        self.EXPIRY_REAPER_BATCH_SIZE = int(os.getenv('EXPIRY_REAPER_BATCH_SIZE', '500'))
+        
+        # Event outbox: events are stored with the write that caused them, relayed
+        # to other workers' SSE clients and replayed after reconnects (Last-Event-ID).
+        # Disabled, events only reach the handling worker's clients (single worker only)
+        self.EVENT_OUTBOX_ENABLED = os.getenv('EVENT_OUTBOX_ENABLED', 'true').lower() == 'true'
+        self.EVENT_OUTBOX_POLL_INTERVAL_MS = float(os.getenv('EVENT_OUTBOX_POLL_INTERVAL_MS', '250'))
+        self.EVENT_OUTBOX_BATCH_SIZE = int(os.getenv('EVENT_OUTBOX_BATCH_SIZE', '500'))
+        self.EVENT_OUTBOX_RETENTION_SECONDS = float(os.getenv('EVENT_OUTBOX_RETENTION_SECONDS', '600'))
+        self.EVENT_OUTBOX_REPLAY_LIMIT = int(os.getenv('EVENT_OUTBOX_REPLAY_LIMIT', '1000'))
+        
+        # PostgreSQL only: range-partition queue data by expiry day
+        self.PARTITIONED_SCHEMA = os.getenv('PARTITIONED_SCHEMA', 'false').lower() == 'true'
+        self.PARTITION_PREMAKE_DAYS = int(os.getenv('PARTITION_PREMAKE_DAYS', '2'))
+        
+        # Rate limiting (token buckets; requests per minute, 0 disables a limit)
+        self.RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
         self.RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
+        self.RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '0')) or None
+        self.RATE_LIMIT_QUEUE_PER_MINUTE = int(os.getenv('RATE_LIMIT_QUEUE_PER_MINUTE', '600'))
+        # 'memory' (per worker) or 'database' (shared by all workers)
+        self.RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+        
+        # Idempotency-Key support on message, vote and hand raise writes
+        self.IDEMPOTENCY_ENABLED = os.getenv('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+        # 'memory' (per worker) or 'database' (shared by all workers)
+        self.IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory').lower()
+        self.IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', '3600'))
+        self.IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+        # How long a key stays reserved by a request that never finished
+        self.IDEMPOTENCY_LOCK_SECONDS = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '30'))
+        
+        # Reverse proxies in front of the app whose X-Forwarded-For is trusted
+        self.TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+        
+        # System stats counters are rebuilt from the database this often (seconds)
+        self.STATS_RECONCILE_INTERVAL_SECONDS = float(os.getenv('STATS_RECONCILE_INTERVAL_SECONDS', '300'))
+        
+        # In-memory hand raise position index (rebuilt from the database after the TTL)
+        self.HAND_RAISE_INDEX_TTL_SECONDS = float(os.getenv('HAND_RAISE_INDEX_TTL_SECONDS', '5'))
+        self.HAND_RAISE_INDEX_MAX_QUEUES = int(os.getenv('HAND_RAISE_INDEX_MAX_QUEUES', '10000'))
+        
+        # Completed hand raises returned per page unless the client asks for another limit
+        self.HAND_RAISE_COMPLETED_HISTORY_LIMIT = int(os.getenv('HAND_RAISE_COMPLETED_HISTORY_LIMIT', '50'))
+        
+        # Serialized message fragment cache (entries per worker)
+        self.MESSAGE_CACHE_MAX_ENTRIES = int(os.getenv('MESSAGE_CACHE_MAX_ENTRIES', '10000'))
+        
+        # Queue metadata cache (seconds; unknown ids are cached negatively)
+        self.QUEUE_CACHE_TTL_SECONDS = float(os.getenv('QUEUE_CACHE_TTL_SECONDS', '30'))
+        self.QUEUE_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv('QUEUE_CACHE_NEGATIVE_TTL_SECONDS', '10'))
+        self.QUEUE_CACHE_MAX_ENTRIES = int(os.getenv('QUEUE_CACHE_MAX_ENTRIES', '10000'))
+        
+        # Issue HMAC-signed host tokens (verified without a database lookup)
+        self.SIGNED_HOST_TOKENS = os.getenv('SIGNED_HOST_TOKENS', 'true').lower() == 'true'
+        
+        # Reject user tokens that were not minted by this API (off while legacy tokens exist)
+        self.REQUIRE_SIGNED_USER_TOKENS = os.getenv('REQUIRE_SIGNED_USER_TOKENS', 'false').lower() == 'true'
+        
+        # Lifetime of the tickets that subscribe an SSE connection to a private channel
+        self.STREAM_TICKET_TTL_SECONDS = int(os.getenv('STREAM_TICKET_TTL_SECONDS', '60'))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -67,6 +170,8 @@ class TestingConfig(Config):
         super()._load_config()
         self.TESTING = True
         self.DATABASE_URL = 'sqlite:///:memory:'
+        self.EXPIRY_REAPER_ENABLED = False
+        self.RATE_LIMIT_ENABLED = False
 
 # Configuration factory
 def get_config():
@@ -1,8 +1,495 @@
+import functools
+import itertools
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import MetaData, create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+import sqlite3
+import uuid
+from models.types import BinaryUUID
+from services.group_commit import sqlite_writer
 
-db = SQLAlchemy()
+logger = logging.getLogger(__name__)
 
-def init_db(app):
+# Replica engine the current read-only service call runs on (None means primary)
+_replica_engine: ContextVar[Optional[Engine]] = ContextVar("replica_engine", default=None)
+# Consistency token (PostgreSQL LSN) the current request's reads must have caught up to
+_required_lsn: ContextVar[Optional[str]] = ContextVar("required_lsn", default=None)
+# Whether service commits are folded into a request-wide unit of work
+_unit_of_work: ContextVar[bool] = ContextVar("unit_of_work", default=False)
+
+LSN_PATTERN = re.compile(r"^[0-9A-F]{1,8}/[0-9A-F]{1,8}$", re.IGNORECASE)
+
+class RoutingSession(Session):
+    """Session that sends statements of read-only service calls to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = _replica_engine.get()
+        # Flushes always go to the primary, even when autoflush fires during a read
+        if replica is not None and bind is None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReplicaRouter:
+    """Round-robin choice of read replica engines (DATABASE_REPLICA_URLS)"""
+
+    def __init__(self):
+        self._engines: List[Engine] = []
+        self._next = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._engines)
+
+    def configure(self, urls: List[str], options: Dict[str, Any]):
+        """Create one engine per replica URL (connections are opened lazily)"""
+        self._engines = [create_engine(url, **options) for url in urls]
+
+    def pick(self, min_lsn: Optional[str] = None) -> Optional[Engine]:
+        """
+        Choose a replica, optionally one that has replayed up to min_lsn
+
+        Returns:
+            Replica engine, or None to use the primary
+        """
+        if not self._engines:
+            return None
+
+        start = next(self._next)
+        for offset in range(len(self._engines)):
+            engine = self._engines[(start + offset) % len(self._engines)]
+            if min_lsn is None or self._caught_up(engine, min_lsn):
+                return engine
+
+        return None
+
+    @staticmethod
+    def _caught_up(engine: Engine, min_lsn: str) -> bool:
+        try:
+            with engine.connect() as connection:
+                return bool(connection.execute(
+                    text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"),
+                    {"lsn": min_lsn}
+                ).scalar())
+        except SQLAlchemyError as e:
+            logger.warning(f"Replica consistency check failed: {e}")
+            return False
+
+# Global replica router (one per worker process)
+replica_router = ReplicaRouter()
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+SQLITE_JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+SQLITE_SYNCHRONOUS_LEVELS = {"off", "normal", "full", "extra"}
+
+# Pragmas run on every new SQLite connection (see configure_sqlite)
+_sqlite_pragmas: List[str] = ["PRAGMA foreign_keys=ON"]
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection)
+
+def apply_sqlite_pragmas(dbapi_connection):
+    """Run the configured pragmas on a new SQLite DBAPI connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in _sqlite_pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+def configure_sqlite(config):
+    """
+    Tune SQLite connections from the SQLITE_* settings
+
+    WAL lets readers run alongside the writer, synchronous=NORMAL only
+    fsyncs at checkpoints in WAL mode, busy_timeout waits for the write
+    lock instead of failing with 'database is locked', and mmap_size
+    serves reads from memory-mapped pages.
+    """
+    if config.SQLITE_JOURNAL_MODE not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Invalid SQLITE_JOURNAL_MODE: {config.SQLITE_JOURNAL_MODE}")
+    if config.SQLITE_SYNCHRONOUS not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {config.SQLITE_SYNCHRONOUS}")
+
+    _sqlite_pragmas[:] = [
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}",
+    ]
+
+def init_db(app, config=None):
     """Initialize database with Flask app"""
+    if config is not None:
+        database_url = app.config['SQLALCHEMY_DATABASE_URI']
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(config, database_url))
+
+        if database_url.startswith('postgresql') and _use_gevent_wait(config.DB_GEVENT_WAIT):
+            enable_gevent_wait_callback()
+
+        if database_url.startswith('sqlite'):
+            configure_sqlite(config)
+
+        if config.DATABASE_REPLICA_URLS:
+            replica_router.configure(config.DATABASE_REPLICA_URLS, app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+
     db.init_app(app)
-    return db
\ No newline at end of file
+
+    if config is not None and _use_group_commit(config, app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            # Flask-SQLAlchemy resolves relative paths against the instance folder
+            sqlite_writer.configure(
+                db.engine.url,
+                max_batch=config.SQLITE_GROUP_COMMIT_MAX_BATCH,
+                window_seconds=config.SQLITE_GROUP_COMMIT_WINDOW_MS / 1000
+            )
+
+    return db
+
+def read_only(func):
+    """
+    Run a read-only service method on a replica when replicas are configured
+
+    Falls back to the primary when no replica has caught up to the
+    request's consistency token.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not replica_router.enabled or _replica_engine.get() is not None:
+            return func(*args, **kwargs)
+
+        engine = replica_router.pick(_required_lsn.get())
+        if engine is None:
+            return func(*args, **kwargs)
+
+        token = _replica_engine.set(engine)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_engine.reset(token)
+
+    return wrapper
+
+@contextmanager
+def on_primary() -> Iterator[None]:
+    """Run the enclosed statements on the primary, even inside a read-only call"""
+    token = _replica_engine.set(None)
+    try:
+        yield
+    finally:
+        _replica_engine.reset(token)
+
+def require_consistency(consistency_token: Optional[str]):
+    """
+    Make reads in the current context wait for a replica at or past a token
+
+    Returns:
+        ContextVar token for reset_consistency, or None if the token is malformed
+    """
+    if not consistency_token or not LSN_PATTERN.match(consistency_token):
+        return None
+    return _required_lsn.set(consistency_token)
+
+def reset_consistency(token):
+    _required_lsn.reset(token)
+
+def consistency_token() -> Optional[str]:
+    """Current primary WAL position, returned to clients after writes (replicas only)"""
+    if not replica_router.enabled:
+        return None
+
+    with db.engine.connect() as connection:
+        return connection.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+
+def begin_unit_of_work():
+    """
+    Start a unit of work: service commits only flush until end_unit_of_work
+
+    Returns:
+        ContextVar token for end_unit_of_work
+    """
+    return _unit_of_work.set(True)
+
+def end_unit_of_work(token, success: bool):
+    """Commit the unit of work in one transaction (or roll it back) and close it"""
+    try:
+        if success:
+            db.session.commit()
+        else:
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        _unit_of_work.reset(token)
+
+def in_unit_of_work() -> bool:
+    return _unit_of_work.get()
+
+def commit():
+    """Commit the session, or only flush it while a unit of work is open"""
+    if _unit_of_work.get():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+def on_commit(callback: Callable[[], None]):
+    """
+    Run callback once the current unit of work has committed
+
+    Outside a unit of work the caller's changes are already committed, so
+    the callback runs immediately. Callbacks of a unit of work that rolls
+    back are dropped.
+    """
+    if not _unit_of_work.get():
+        callback()
+        return
+
+    db.session().info.setdefault("on_commit", []).append(callback)
+
+def has_pending_writes() -> bool:
+    """Whether the session has written (or will flush) anything in its current transaction"""
+    session = db.session()
+    return bool(session.new or session.dirty or session.deleted) or session.info.get("has_writes", False)
+
+def on_rollback(callback: Callable[[], None]):
+    """
+    Run callback if the current unit of work rolls back
+
+    For state that has to change ahead of the commit (e.g. an index the
+    request reads back); the callback undoes or drops it. Outside a unit
+    of work the changes are already committed, so nothing is registered.
+    """
+    if not _unit_of_work.get():
+        return
+
+    db.session().info.setdefault("on_rollback", []).append(callback)
+
+def _run_callbacks(callbacks: List[Callable[[], None]]):
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Transaction callback failed: {e}")
+
+@event.listens_for(RoutingSession, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _track_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _run_on_commit_callbacks(session):
+    session.info.pop("has_writes", None)
+    session.info.pop("on_rollback", None)
+    _run_callbacks(session.info.pop("on_commit", []))
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _run_on_rollback_callbacks(session):
+    session.info.pop("has_writes", None)
+    session.info.pop("on_commit", None)
+    _run_callbacks(session.info.pop("on_rollback", []))
+
+def engine_options(config, database_url: str) -> Dict[str, Any]:
+    """Build SQLAlchemy engine options from the DB_POOL_* settings"""
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "query_cache_size": config.DB_QUERY_CACHE_SIZE,
+    }
+
+    if database_url.startswith('sqlite'):
+        # sqlite3 keeps this many prepared statements per connection
+        options["connect_args"] = {"cached_statements": config.SQLITE_STATEMENT_CACHE_SIZE}
+    else:
+        # Pool sizing (SQLite uses its own pools; in-memory databases must stay on one connection)
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+
+    return options
+
+def _use_group_commit(config, database_url: str) -> bool:
+    if not (database_url.startswith('sqlite') and config.SQLITE_GROUP_COMMIT and config.SQLITE_JOURNAL_MODE == 'wal'):
+        return False
+
+    # In-memory databases are private to each connection, so they cannot share a writer
+    database = make_url(database_url).database
+    return bool(database) and database != ':memory:' and 'mode=memory' not in database_url
+
+def _use_gevent_wait(setting: str) -> bool:
+    if setting == 'true':
+        return True
+    if setting != 'auto':
+        return False
+
+    # Gunicorn's gevent worker monkey-patches the process before loading the app
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+def enable_gevent_wait_callback():
+    """
+    Make psycopg2 wait for PostgreSQL through gevent
+
+    Without it a slow query blocks the whole worker, including every SSE
+    stream it serves. Same approach as psycogreen.
+    """
+    from psycopg2 import extensions
+
+    extensions.set_wait_callback(_gevent_wait_callback)
+    logger.info("psycopg2 gevent wait callback enabled")
+
+def _gevent_wait_callback(connection, timeout=None):
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+def add_missing_columns(metadata: MetaData) -> List[Tuple[str, str]]:
+    """
+    Add model columns missing from tables that already exist
+
+    create_all only creates missing tables; new columns need a server
+    default (or to be nullable) to be added to existing rows this way.
+
+    Returns:
+        (table, column) pairs that were added
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with db.engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}'))
+                added.append((table.name, column.name))
+
+    return added
+
+
+# Text forms PostgreSQL's uuid input accepts (hyphens optional, optional braces)
+UUID_TEXT_PATTERN = r'^\{?[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}\}?$'
+
+def migrate_uuid_columns(metadata: MetaData) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    Move existing BinaryUUID columns to their 16-byte storage
+
+    PostgreSQL token columns created as varchar are converted to uuid.
+    SQLite rows written as text UUIDs are rewritten as bytes in place
+    (SQLite keeps the bytes whatever the declared column type).
+
+    Rows holding a value that is not a UUID (tokens from before tokens
+    were validated) cannot be converted and are deleted, with a warning;
+    counters kept over those rows (vote and hand raise counts) must then be
+    recomputed by the caller.
+
+    Returns:
+        ((table, column) pairs that were migrated, number of rows deleted)
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    is_postgresql = db.engine.dialect.name == 'postgresql'
+    migrated = []
+    deleted_rows = 0
+    # Format: [(table, column, [{row_id, value}])]
+    rewrites = []
+    # Format: [(table, column, [{row_id}])]
+    invalid_rows = []
+
+    with db.engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            column_types = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not isinstance(column.type, BinaryUUID) or column.name not in column_types:
+                    continue
+
+                if is_postgresql:
+                    if column_types[column.name].python_type is uuid.UUID:
+                        continue
+                    deleted = connection.execute(
+                        text(f'DELETE FROM "{table.name}" WHERE "{column.name}" !~* :pattern'),
+                        {"pattern": UUID_TEXT_PATTERN}
+                    ).rowcount
+                    if deleted:
+                        deleted_rows += deleted
+                        logger.warning(f"Deleted {deleted} rows with a non-UUID {table.name}.{column.name}")
+                    connection.execute(text(
+                        f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" '
+                        f'TYPE uuid USING "{column.name}"::uuid'
+                    ))
+                    migrated.append((table.name, column.name))
+                    continue
+
+                rows = connection.execute(text(
+                    f'SELECT rowid, "{column.name}" FROM "{table.name}" WHERE typeof("{column.name}") = \'text\''
+                )).all()
+                params, invalid = [], []
+                for row_id, value in rows:
+                    try:
+                        params.append({"row_id": row_id, "value": uuid.UUID(value).bytes})
+                    except ValueError:
+                        invalid.append({"row_id": row_id})
+                if params:
+                    rewrites.append((table.name, column.name, params))
+                if invalid:
+                    invalid_rows.append((table.name, column.name, invalid))
+
+        if rewrites or invalid_rows:
+            # Parent and child keys are rewritten one after the other; set
+            # right before the first write so it lasts until the commit
+            connection.execute(text("PRAGMA defer_foreign_keys=ON"))
+
+        for table_name, column_name, params in invalid_rows:
+            connection.execute(text(f'DELETE FROM "{table_name}" WHERE rowid = :row_id'), params)
+            deleted_rows += len(params)
+            logger.warning(f"Deleted {len(params)} rows with a non-UUID {table_name}.{column_name}")
+
+        for table_name, column_name, params in rewrites:
+            connection.execute(
+                text(f'UPDATE "{table_name}" SET "{column_name}" = :value WHERE rowid = :row_id'),
+                params
+            )
+            migrated.append((table_name, column_name))
+
+    if migrated:
+        logger.info(f"Migrated UUID columns to binary storage: {migrated}")
+    return migrated, deleted_rows
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Integer, BigInteger, Float, LargeBinary, Date, DateTime, ForeignKey, Boolean, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.schema import UniqueConstraint, Index
+from models.types import BinaryUUID
 import uuid
 
 Base = declarative_base()
@@ -11,18 +11,24 @@ Base = declarative_base()
 class Queue(Base):
     __tablename__ = 'queues'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(BinaryUUID(), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=True)
-    host_secret = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4, unique=True)
+    host_secret = Column(BinaryUUID(), nullable=False, default=uuid.uuid4, unique=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False)
+    # Expiry day; partition key when the partitioned schema is enabled
+    expires_on = Column(Date, nullable=True)
     
     # Queue settings
     default_sort_order = Column(String(10), nullable=False, default='votes')  # 'votes' or 'newest'
     
-    # Relationships
-    messages = relationship("Message", back_populates="queue", cascade="all, delete-orphan")
-    hand_raises = relationship("HandRaise", back_populates="queue", cascade="all, delete-orphan")
+    # Hand raise counters, kept up to date in the same transaction as the hand raise writes
+    active_hand_raise_count = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_hand_raise_count = Column(Integer, nullable=False, default=0, server_default='0')
+    
+    # Relationships (children are removed by ON DELETE CASCADE, not loaded into Python)
+    messages = relationship("Message", back_populates="queue", cascade="all, delete-orphan", passive_deletes=True)
+    hand_raises = relationship("HandRaise", back_populates="queue", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes
     __table_args__ = (
@@ -35,23 +41,27 @@ class Queue(Base):
             if not self.created_at:
                 self.created_at = datetime.utcnow()
             self.expires_at = self.created_at + timedelta(hours=24)
+        if not self.expires_on:
+            self.expires_on = self.expires_at.date()
 
 class Message(Base):
     __tablename__ = 'messages'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    queue_id = Column(UUID(as_uuid=True), ForeignKey('queues.id'), nullable=False)
+    id = Column(BinaryUUID(), primary_key=True, default=uuid.uuid4)
+    queue_id = Column(BinaryUUID(), ForeignKey('queues.id', ondelete='CASCADE'), nullable=False)
     text = Column(Text, nullable=False)
     author_name = Column(String(255), nullable=True)
-    user_token = Column(UUID(as_uuid=True), nullable=False)
+    user_token = Column(BinaryUUID(), nullable=False)
     vote_count = Column(Integer, nullable=False, default=0)
     is_read = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Copy of the queue's expiry day (partition key)
+    expires_on = Column(Date, nullable=True)
     
     # Relationships
     queue = relationship("Queue", back_populates="messages")
-    upvotes = relationship("MessageUpvote", back_populates="message", cascade="all, delete-orphan")
+    upvotes = relationship("MessageUpvote", back_populates="message", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes
     __table_args__ = (
@@ -63,10 +73,12 @@ class Message(Base):
 class MessageUpvote(Base):
     __tablename__ = 'message_upvotes'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    message_id = Column(UUID(as_uuid=True), ForeignKey('messages.id'), nullable=False)
-    user_token = Column(String(255), nullable=False)
+    id = Column(BinaryUUID(), primary_key=True, default=uuid.uuid4)
+    message_id = Column(BinaryUUID(), ForeignKey('messages.id', ondelete='CASCADE'), nullable=False)
+    user_token = Column(BinaryUUID(as_uuid=False), nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Copy of the queue's expiry day (partition key)
+    expires_on = Column(Date, nullable=True)
     
     # Relationships
     message = relationship("Message", back_populates="upvotes")
@@ -81,21 +93,83 @@ class MessageUpvote(Base):
 class HandRaise(Base):
     __tablename__ = 'hand_raises'
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    queue_id = Column(UUID(as_uuid=True), ForeignKey('queues.id'), nullable=False)
-    user_token = Column(String(255), nullable=False)
+    id = Column(BinaryUUID(), primary_key=True, default=uuid.uuid4)
+    queue_id = Column(BinaryUUID(), ForeignKey('queues.id', ondelete='CASCADE'), nullable=False)
+    user_token = Column(BinaryUUID(as_uuid=False), nullable=False)
     user_name = Column(String(255), nullable=False)
     raised_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     completed = Column(Boolean, nullable=False, default=False)
     completed_at = Column(DateTime, nullable=True)
+    # Copy of the queue's expiry day (partition key)
+    expires_on = Column(Date, nullable=True)
 
     # Relationships
     queue = relationship("Queue", back_populates="hand_raises")
 
     # Constraints and Indexes
     __table_args__ = (
-        # For SQLite compatibility, we'll handle the unique constraint in application logic
+        # At most one active raise per user and queue (partial index on both PostgreSQL and SQLite)
+        Index(
+            'uq_active_hand_raise', 'queue_id', 'user_token',
+            unique=True,
+            postgresql_where=text('completed = false'),
+            sqlite_where=text('completed = 0')
+        ),
         Index('idx_queue_completed_raised', 'queue_id', 'completed', 'raised_at'),
         Index('idx_queue_id_handraise', 'queue_id'),
         Index('idx_user_token_handraise', 'user_token'),
-    )
\ No newline at end of file
+    )
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all workers (RATE_LIMIT_BACKEND=database)"""
+    __tablename__ = 'rate_limit_buckets'
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Unix time of the last refill
+    updated_at = Column(Float, nullable=False)
+    # Whether the last request took a token
+    granted = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index('idx_rate_limit_updated_at', 'updated_at'),
+    )
+
+class IdempotencyRecord(Base):
+    """Response stored for an Idempotency-Key (IDEMPOTENCY_BACKEND=database)"""
+    __tablename__ = 'idempotency_keys'
+
+    # Route class, path and client key
+    key = Column(String(255), primary_key=True)
+    # Hash of the request the key was first sent with
+    fingerprint = Column(String(64), nullable=False)
+    # Response, None while the first request is running
+    status_code = Column(Integer, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    mimetype = Column(String(100), nullable=True)
+    # Unix time the key (or its reservation) expires
+    expires_at = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('idx_idempotency_expires_at', 'expires_at'),
+    )
+
+class EventOutbox(Base):
+    """SSE event stored in the transaction of the write that caused it"""
+    __tablename__ = 'event_outbox'
+
+    # Delivery order, also sent to clients as the SSE event id
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    queue_id = Column(BinaryUUID(), nullable=False)
+    # Private channel (see services.events), None for the whole queue
+    recipient = Column(String(100), nullable=True)
+    event_type = Column(String(50), nullable=False)
+    data = Column(Text, nullable=False)
+    # Worker that wrote the event (it delivers to its own clients directly)
+    origin = Column(String(36), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_event_outbox_queue', 'queue_id', 'id'),
+        Index('idx_event_outbox_created_at', 'created_at'),
+    )
@@ -0,0 +1,46 @@
+import uuid
+from typing import Optional, Union
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+class BinaryUUID(TypeDecorator):
+    """
+    UUID stored in 16 bytes on every database
+
+    PostgreSQL keeps its native uuid type. Elsewhere (SQLite) the raw bytes
+    are stored instead of 32-36 character strings, which more than halves
+    UUID keys and the indexes built on them.
+
+    Args:
+        as_uuid: Return uuid.UUID values (True) or canonical strings (False)
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def __init__(self, as_uuid: bool = True):
+        super().__init__()
+        self.as_uuid = as_uuid
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value: Optional[Union[uuid.UUID, str]], dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == 'postgresql' else value.bytes
+
+    def process_result_value(self, value, dialect) -> Optional[Union[uuid.UUID, str]]:
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = uuid.UUID(bytes=value)
+        elif not isinstance(value, uuid.UUID):
+            # Text written before the storage migration
+            value = uuid.UUID(value)
+        return value if self.as_uuid else str(value)
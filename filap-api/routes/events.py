@@ -1,6 +1,13 @@
 from flask import Blueprint, Response, request, current_app
+from database import db
 from services.events import sse_manager
+from services.outbox import replay_events
+from services.queue_service import QueueService
+from services.user_service import UserService
+from utils.auth import extract_stream_recipients
+from utils.tokens import issue_stream_ticket, signing_enabled, user_channel_id
 from config import get_config
+import functools
 import uuid
 
 events_bp = Blueprint('events', __name__)
@@ -11,10 +18,20 @@ def queue_events(queue_id: str):
     
     # Validate queue_id format
     try:
-        uuid.UUID(queue_id)
+        queue_uuid = uuid.UUID(queue_id)
     except ValueError:
         return {"error": "Invalid queue ID"}, 400
     
+    # Only subscribe to live queues; the stream closes itself at expiry
+    queue_metadata = QueueService.get_active_queue_metadata(queue_uuid)
+    if not queue_metadata:
+        return {"error": "Queue not found or expired"}, 404
+    
+    # Optional private channel (?ticket= from the ticket endpoint)
+    recipients = extract_stream_recipients(queue_id)
+    if recipients is None:
+        return {"error": "Invalid or expired stream ticket"}, 400
+    
     # Get configuration for CORS headers
     config = get_config()
     
@@ -29,8 +46,16 @@ def queue_events(queue_id: str):
         else:
             allowed_origin = config.CORS_ORIGINS[0] if config.CORS_ORIGINS else '*'
     
+    # Reconnecting clients get the events they missed from the outbox
+    replay = None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if config.EVENT_OUTBOX_ENABLED and last_event_id and last_event_id.isdigit():
+        replay = functools.partial(
+            replay_events, db.engine, queue_id, int(last_event_id), recipients, config.EVENT_OUTBOX_REPLAY_LIMIT
+        )
+    
     # Create event stream
-    event_stream = sse_manager.create_event_stream(queue_id)
+    event_stream = sse_manager.create_event_stream(queue_id, queue_metadata.expires_at, recipients, replay)
     
     return Response(
         event_stream,
@@ -42,4 +67,87 @@ def queue_events(queue_id: str):
             'Access-Control-Allow-Headers': ','.join(config.CORS_ALLOW_HEADERS),
             'Access-Control-Allow-Credentials': 'true'
         }
-    )
\ No newline at end of file
+    )
+
+@events_bp.route('/api/queues/<queue_id>/events/ticket', methods=['POST'])
+def create_stream_ticket(queue_id: str):
+    """Get a ticket for the private event channel of a user
+    ---
+    tags:
+      - Real-time Events
+    parameters:
+      - in: path
+        name: queue_id
+        type: string
+        format: uuid
+        required: true
+        description: Queue identifier
+      - in: header
+        name: X-User-Token
+        type: string
+        required: true
+        description: User token whose private events (position_changed, vote_changed, message_moderated) the stream should receive
+    responses:
+      201:
+        description: Ticket created; pass it as ?ticket= when opening the event stream
+        schema:
+          type: object
+          properties:
+            ticket:
+              type: string
+            expires_in:
+              type: integer
+              description: Seconds the ticket stays valid for connecting
+      400:
+        description: User token required
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      403:
+        description: Invalid user token for this queue
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      404:
+        description: Queue not found or expired
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      503:
+        description: Private channels are disabled (SECRET_KEY not configured)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    security:
+      - UserToken: []
+    """
+    try:
+        queue_uuid = uuid.UUID(queue_id)
+    except ValueError:
+        return {"error": "Queue not found or expired"}, 404
+    
+    if not QueueService.get_active_queue_metadata(queue_uuid):
+        return {"error": "Queue not found or expired"}, 404
+    
+    user_token = request.headers.get('X-User-Token')
+    if not user_token:
+        return {"error": "User token required"}, 400
+    
+    if not UserService.validate_user_token(queue_uuid, user_token):
+        return {"error": "Invalid user token"}, 403
+    
+    if not signing_enabled():
+        return {"error": "Private event channels need a SECRET_KEY"}, 503
+    
+    config = get_config()
+    ticket = issue_stream_ticket(queue_uuid, user_channel_id(user_token), config.STREAM_TICKET_TTL_SECONDS)
+    
+    return {"ticket": ticket, "expires_in": config.STREAM_TICKET_TTL_SECONDS}, 201
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from services.hand_raise_service import HandRaiseService
+from services.hand_raise_service import HandRaiseService, HandRaiseToggle
+from utils.rate_limit import rate_limit
+from utils.idempotency import idempotent
 import logging
 
 # Configure logging
@@ -8,6 +10,8 @@ logger = logging.getLogger(__name__)
 hand_raises_bp = Blueprint('hand_raises', __name__)
 
 @hand_raises_bp.route('/api/queues/<queue_id>/handraise', methods=['POST'])
+@idempotent('hand_raise')
+@rate_limit('hand_raise')
 def raise_hand(queue_id):
     """Raise or lower a hand for a user in a queue
     ---
@@ -22,6 +26,12 @@ def raise_hand(queue_id):
         format: uuid
         required: true
         description: Queue identifier
+      - in: header
+        name: Idempotency-Key
+        type: string
+        maxLength: 128
+        required: false
+        description: Client-generated key; retries with the same key return the first response
       - in: body
         name: body
         required: true
@@ -80,6 +90,27 @@ def raise_hand(queue_id):
           properties:
             error:
               type: string
+      409:
+        description: A request with the same Idempotency-Key is still in progress
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      422:
+        description: Idempotency-Key was already used for a different request
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      429:
+        description: Rate limit exceeded (see Retry-After header)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       500:
         description: Internal server error
         schema:
@@ -100,16 +131,12 @@ def raise_hand(queue_id):
         if not user_token or not user_name:
             return jsonify({'error': 'user_token and user_name are required'}), 400
 
-        hand_raise_data = HandRaiseService.raise_hand(queue_id, user_token, user_name)
+        result, hand_raise_data = HandRaiseService.toggle_hand(queue_id, user_token, user_name)
 
-        if hand_raise_data is None:
-            # Hand was lowered (toggle off) or queue not found
-            # Check if queue exists to differentiate between these cases
-            queue_check = HandRaiseService.get_hand_raises(queue_id, include_completed=False)
-            if queue_check is None:
-                return jsonify({'error': 'Queue not found or expired'}), 404
-            else:
-                return '', 200  # Hand was successfully lowered
+        if result is HandRaiseToggle.QUEUE_NOT_FOUND:
+            return jsonify({'error': 'Queue not found or expired'}), 404
+        if result is HandRaiseToggle.LOWERED:
+            return '', 200  # Hand was successfully lowered
 
         return jsonify(hand_raise_data), 201
 
@@ -138,6 +165,27 @@ def get_hand_raises(queue_id):
         type: boolean
         default: false
         description: Whether to include completed hand raises
+      - in: query
+        name: limit
+        type: integer
+        minimum: 1
+        maximum: 100
+        default: 100
+        description: Number of active hand raises to return (follow next_cursor for the rest of the line)
+      - in: query
+        name: cursor
+        type: string
+        description: next_cursor from the previous page of active hand raises
+      - in: query
+        name: completed_limit
+        type: integer
+        minimum: 1
+        maximum: 100
+        description: Number of completed hand raises to return (server default HAND_RAISE_COMPLETED_HISTORY_LIMIT)
+      - in: query
+        name: completed_cursor
+        type: string
+        description: completed_next_cursor from the previous page of completed hand raises
     responses:
       200:
         description: Hand raises retrieved successfully
@@ -155,8 +203,6 @@ def get_hand_raises(queue_id):
                   queue_id:
                     type: string
                     format: uuid
-                  user_token:
-                    type: string
                   user_name:
                     type: string
                   raised_at:
@@ -170,12 +216,28 @@ def get_hand_raises(queue_id):
                     nullable: true
             completed_hand_raises:
               type: array
+              description: Most recently completed first
               items:
                 type: object
             total_active:
               type: integer
             total_completed:
               type: integer
+            next_cursor:
+              type: string
+              nullable: true
+              description: Cursor of the next page of active hand raises (null on the last page)
+            completed_next_cursor:
+              type: string
+              nullable: true
+              description: Cursor of the next page of completed hand raises (null on the last page)
+      400:
+        description: Invalid query parameters
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       404:
         description: Queue not found or expired
         schema:
@@ -193,14 +255,32 @@ def get_hand_raises(queue_id):
     """
     try:
         include_completed = request.args.get('include_completed', 'false').lower() == 'true'
+        limit = int(request.args.get('limit', 100))
+        completed_limit = request.args.get('completed_limit')
+        completed_limit = int(completed_limit) if completed_limit is not None else None
+
+        if limit < 1 or limit > 100:
+            return jsonify({'error': 'Limit must be between 1 and 100'}), 400
+
+        if completed_limit is not None and (completed_limit < 1 or completed_limit > 100):
+            return jsonify({'error': 'Completed limit must be between 1 and 100'}), 400
 
-        hand_raises_data = HandRaiseService.get_hand_raises(queue_id, include_completed)
+        hand_raises_data = HandRaiseService.get_hand_raises(
+            queue_id,
+            include_completed,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            completed_limit=completed_limit,
+            completed_cursor=request.args.get('completed_cursor')
+        )
 
         if hand_raises_data is None:
             return jsonify({'error': 'Queue not found or expired'}), 404
 
         return jsonify(hand_raises_data), 200
 
+    except ValueError:
+        return jsonify({'error': 'Invalid query parameters'}), 400
     except Exception as e:
         logger.error(f"Error in get_hand_raises for queue {queue_id}: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -255,8 +335,6 @@ def update_hand_raise(queue_id, hand_raise_id):
             queue_id:
               type: string
               format: uuid
-            user_token:
-              type: string
             user_name:
               type: string
             raised_at:
@@ -325,6 +403,245 @@ def update_hand_raise(queue_id, hand_raise_id):
         logger.error(f"Error in update_hand_raise for queue {queue_id}, hand_raise {hand_raise_id}: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@hand_raises_bp.route('/api/queues/<queue_id>/handraises/advance', methods=['POST'])
+def advance_hand_raises(queue_id):
+    """Complete the next speakers in raise order (host only)
+    ---
+    tags:
+      - Hand Raises
+    consumes:
+      - application/json
+    security:
+      - HostSecret: []
+    parameters:
+      - in: path
+        name: queue_id
+        type: string
+        format: uuid
+        required: true
+        description: Queue identifier
+      - in: header
+        name: X-Queue-Secret
+        type: string
+        format: uuid
+        required: true
+        description: Host authentication secret
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            count:
+              type: integer
+              minimum: 1
+              maximum: 100
+              default: 1
+              description: Number of active hand raises to complete
+    responses:
+      200:
+        description: Hand raises completed (in raise order)
+        schema:
+          type: object
+          properties:
+            completed_hand_raises:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                    format: uuid
+                  queue_id:
+                    type: string
+                    format: uuid
+                  user_name:
+                    type: string
+                  raised_at:
+                    type: string
+                    format: date-time
+                  completed:
+                    type: boolean
+                  completed_at:
+                    type: string
+                    format: date-time
+            total_completed:
+              type: integer
+      400:
+        description: Bad request
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      401:
+        description: Unauthorized (missing host secret)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      404:
+        description: Queue not found or invalid host secret
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    try:
+        host_secret = request.headers.get('X-Queue-Secret')
+        if not host_secret:
+            return jsonify({'error': 'Host authentication required'}), 401
+
+        data = request.get_json(silent=True) or {}
+        completed = HandRaiseService.advance_hand_raises(queue_id, host_secret, data.get('count', 1))
+
+        if completed is None:
+            return jsonify({'error': 'Unauthorized or queue not found'}), 404
+
+        return jsonify({
+            'completed_hand_raises': completed,
+            'total_completed': len(completed)
+        }), 200
+
+    except ValueError as e:
+        logger.error(f"ValueError in advance_hand_raises for queue {queue_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in advance_hand_raises for queue {queue_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@hand_raises_bp.route('/api/queues/<queue_id>/handraises/complete', methods=['POST'])
+def complete_hand_raises(queue_id):
+    """Complete several hand raises at once (host only)
+    ---
+    tags:
+      - Hand Raises
+    consumes:
+      - application/json
+    security:
+      - HostSecret: []
+    parameters:
+      - in: path
+        name: queue_id
+        type: string
+        format: uuid
+        required: true
+        description: Queue identifier
+      - in: header
+        name: X-Queue-Secret
+        type: string
+        format: uuid
+        required: true
+        description: Host authentication secret
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - ids
+          properties:
+            ids:
+              type: array
+              minItems: 1
+              maxItems: 100
+              items:
+                type: string
+                format: uuid
+              description: Hand raises to complete (already completed or lowered ones are skipped)
+    responses:
+      200:
+        description: Hand raises completed (in raise order)
+        schema:
+          type: object
+          properties:
+            completed_hand_raises:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                    format: uuid
+                  queue_id:
+                    type: string
+                    format: uuid
+                  user_name:
+                    type: string
+                  raised_at:
+                    type: string
+                    format: date-time
+                  completed:
+                    type: boolean
+                  completed_at:
+                    type: string
+                    format: date-time
+            total_completed:
+              type: integer
+      400:
+        description: Bad request
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      401:
+        description: Unauthorized (missing host secret)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      404:
+        description: Queue not found or invalid host secret
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    try:
+        host_secret = request.headers.get('X-Queue-Secret')
+        if not host_secret:
+            return jsonify({'error': 'Host authentication required'}), 401
+
+        data = request.get_json(silent=True)
+        if not data or 'ids' not in data:
+            return jsonify({'error': 'ids is required'}), 400
+
+        completed = HandRaiseService.complete_hand_raises(queue_id, host_secret, data['ids'])
+
+        if completed is None:
+            return jsonify({'error': 'Unauthorized or queue not found'}), 404
+
+        return jsonify({
+            'completed_hand_raises': completed,
+            'total_completed': len(completed)
+        }), 200
+
+    except ValueError as e:
+        logger.error(f"ValueError in complete_hand_raises for queue {queue_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in complete_hand_raises for queue {queue_id}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @hand_raises_bp.route('/api/queues/<queue_id>/user-position', methods=['GET'])
 def get_user_position(queue_id):
     """Get the position of a user in the hand raise queue
@@ -382,17 +699,11 @@ def get_user_position(queue_id):
         if not user_token:
             return jsonify({'error': 'user_token parameter is required'}), 400
 
-        position = HandRaiseService.get_user_position(queue_id, user_token)
-
-        # Check if queue exists by trying to get hand raises
-        queue_check = HandRaiseService.get_hand_raises(queue_id, include_completed=False)
-        if queue_check is None:
+        position_data = HandRaiseService.get_user_position_status(queue_id, user_token)
+        if position_data is None:
             return jsonify({'error': 'Queue not found or expired'}), 404
 
-        return jsonify({
-            'position': position,
-            'has_raised_hand': position is not None
-        }), 200
+        return jsonify(position_data), 200
 
     except Exception as e:
         logger.error(f"Error in get_user_position for queue {queue_id}, user_token {user_token}: {str(e)}")
@@ -2,11 +2,15 @@ from flask import Blueprint, request, jsonify, Response
 from services.message_service import MessageService
 from services.user_service import UserService
 from services.events import EventService
+from utils.rate_limit import rate_limit
+from utils.idempotency import idempotent
 import json
+import uuid
 
 messages_bp = Blueprint('messages', __name__)
 
 @messages_bp.route('/api/queues/<queue_id>/user-token', methods=['POST'])
+@rate_limit('user_token', per_client=False)
 def generate_user_token(queue_id):
     """Generate a user token for a queue
     ---
@@ -44,6 +48,13 @@ def generate_user_token(queue_id):
           properties:
             error:
               type: string
+      429:
+        description: Rate limit exceeded (see Retry-After header)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       500:
         description: Internal server error
         schema:
@@ -64,6 +75,8 @@ def generate_user_token(queue_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @messages_bp.route('/api/queues/<queue_id>/messages', methods=['POST'])
+@idempotent('message')
+@rate_limit('message')
 def create_message(queue_id):
     """Submit a new question/message to a queue
     ---
@@ -78,6 +91,12 @@ def create_message(queue_id):
         format: uuid
         required: true
         description: Queue identifier
+      - in: header
+        name: Idempotency-Key
+        type: string
+        maxLength: 128
+        required: false
+        description: Client-generated key; retries with the same key return the first response
       - in: body
         name: body
         required: true
@@ -149,6 +168,27 @@ def create_message(queue_id):
           properties:
             error:
               type: string
+      409:
+        description: A request with the same Idempotency-Key is still in progress
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      422:
+        description: Idempotency-Key was already used for a different request
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      429:
+        description: Rate limit exceeded (see Retry-After header)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
     """
     try:
         # Get user token from header (consistent with other endpoints)        
@@ -236,9 +276,6 @@ def get_messages(queue_id):
                     type: string
                   author_name:
                     type: string
-                  user_token:
-                    type: string
-                    format: uuid
                   vote_count:
                     type: integer
                   is_read:
@@ -295,7 +332,8 @@ def get_messages(queue_id):
         # Get user token from header (optional for vote status)
         user_token = request.headers.get('X-User-Token')
         
-        result = MessageService.get_messages(
+        # Page is assembled from cached per-message JSON fragments
+        result = MessageService.get_messages_json(
             queue_id=queue_id,
             user_token=user_token,
             sort_by=sort_by,
@@ -306,7 +344,7 @@ def get_messages(queue_id):
         if result is None:
             return jsonify({'error': 'Queue not found or expired'}), 404
         
-        return jsonify(result), 200
+        return Response(result, status=200, mimetype='application/json')
         
     except ValueError:
         return jsonify({'error': 'Invalid query parameters'}), 400
@@ -369,9 +407,6 @@ def update_message(queue_id, message_id):
               type: string
             author_name:
               type: string
-            user_token:
-              type: string
-              format: uuid
             vote_count:
               type: integer
             is_read:
@@ -525,6 +560,8 @@ def delete_message(queue_id, message_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @messages_bp.route('/api/messages/<message_id>/upvote', methods=['POST'])
+@idempotent('vote')
+@rate_limit('vote', queue_lookup=MessageService.get_message_queue_id)
 def upvote_message(message_id):
     """Toggle upvote for a message (add vote if not voted, remove if already voted)
     ---
@@ -543,6 +580,12 @@ def upvote_message(message_id):
         format: uuid
         required: true
         description: User token for vote tracking
+      - in: header
+        name: Idempotency-Key
+        type: string
+        maxLength: 128
+        required: false
+        description: Client-generated key; retries with the same key return the first response
     responses:
       201:
         description: Vote toggled successfully
@@ -559,9 +602,6 @@ def upvote_message(message_id):
               type: string
             author_name:
               type: string
-            user_token:
-              type: string
-              format: uuid
             vote_count:
               type: integer
               description: Updated vote count
@@ -577,7 +617,7 @@ def upvote_message(message_id):
               type: string
               format: date-time
       400:
-        description: User token required
+        description: User token required or invalid
         schema:
           type: object
           properties:
@@ -590,6 +630,27 @@ def upvote_message(message_id):
           properties:
             error:
               type: string
+      409:
+        description: A request with the same Idempotency-Key is still in progress
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      422:
+        description: Idempotency-Key was already used for a different request
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+      429:
+        description: Rate limit exceeded (see Retry-After header)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       500:
         description: Internal server error
         schema:
@@ -608,7 +669,9 @@ def upvote_message(message_id):
         
         message_data = MessageService.upvote_message(
             message_id=message_id,
-            user_token=user_token
+            user_token=user_token,
+            # A stored Idempotency-Key result must commit with the vote
+            group_commit='Idempotency-Key' not in request.headers
         )
         
         if message_data is None:
@@ -616,6 +679,8 @@ def upvote_message(message_id):
         
         return jsonify(message_data), 201
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
@@ -634,12 +699,17 @@ def queue_events(queue_id):
         format: uuid
         required: true
         description: Queue identifier
+      - in: query
+        name: ticket
+        type: string
+        required: false
+        description: Stream ticket (POST /api/queues/{queue_id}/events/ticket) to also receive the user's private events (position_changed, vote_changed, message_moderated)
     responses:
       200:
         description: SSE stream for real-time updates
         schema:
           type: string
-          description: Event stream with messages like new_message, message_updated, message_deleted, queue_updated
+          description: Event stream with messages like new_message, message_updated, message_deleted, queue_updated, queue_expired (sent before the stream closes)
         headers:
           Cache-Control:
             type: string
@@ -650,6 +720,13 @@ def queue_events(queue_id):
           Access-Control-Allow-Origin:
             type: string
             default: "*"
+      400:
+        description: Invalid or expired stream ticket
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
       404:
         description: Queue not found or expired
         schema:
@@ -660,14 +737,23 @@ def queue_events(queue_id):
     """
     from services.events import sse_manager
     from services.queue_service import QueueService
+    from utils.auth import extract_stream_recipients
     
     # Validate queue exists before setting up SSE connection
-    queue_data = QueueService.get_queue(queue_id)
-    if not queue_data:
+    try:
+        queue_uuid = uuid.UUID(queue_id)
+    except ValueError:
+        return jsonify({'error': 'Queue not found or expired'}), 404
+    queue_metadata = QueueService.get_active_queue_metadata(queue_uuid)
+    if not queue_metadata:
         return jsonify({'error': 'Queue not found or expired'}), 404
     
+    recipients = extract_stream_recipients(queue_id)
+    if recipients is None:
+        return jsonify({'error': 'Invalid or expired stream ticket'}), 400
+    
     # Create SSE event stream using our SSEManager
-    event_stream = sse_manager.create_event_stream(queue_id)
+    event_stream = sse_manager.create_event_stream(queue_id, queue_metadata.expires_at, recipients)
     
     return Response(
         event_stream,
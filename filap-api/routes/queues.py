@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from services.queue_service import QueueService
 from utils.auth import require_host_auth, validate_queue_exists
+from utils.rate_limit import rate_limit
+from config import get_config
 import logging
 
 # Configure logging
@@ -9,6 +11,7 @@ logger = logging.getLogger(__name__)
 queues_bp = Blueprint('queues', __name__)
 
 @queues_bp.route('/api/queues', methods=['POST'])
+@rate_limit('queue_create')
 def create_queue():
     """Create a new queue
     ---
@@ -47,6 +50,10 @@ def create_queue():
               type: string
               format: uuid
               description: Host authentication secret
+            host_token:
+              type: string
+              format: uuid
+              description: Signed host token, accepted in X-Queue-Secret and verified without a database lookup
             created_at:
               type: string
               format: date-time
@@ -63,6 +70,13 @@ def create_queue():
           properties:
             error:
               type: string
+      429:
+        description: Rate limit exceeded (see Retry-After header)
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
     """
     try:
         data = request.get_json() or {}
@@ -279,11 +293,21 @@ def get_system_stats():
     """
     Get system-wide statistics
     
+    Query parameters:
+        detailed: Include the most active queues (top_queues)
+        limit: Number of queues in top_queues (default 10, max 100)
+    
     Returns:
         200: System statistics
     """
     try:
-        stats = QueueService.get_queue_stats()
+        detailed = request.args.get('detailed', 'false').lower() in ('', 'true', '1')
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        except ValueError:
+            return {"error": "limit must be an integer"}, 400
+        
+        stats = QueueService.get_queue_stats(detailed=detailed, limit=limit)
         return stats, 200
         
     except Exception as e:
@@ -294,13 +318,13 @@ def get_system_stats():
 def cleanup_expired_queues():
     """
     Manually trigger cleanup of expired queues
-    (Typically called by background tasks)
+    (The expiry reaper normally does this in the background)
     
     Returns:
         200: Cleanup completed with count of cleaned queues
     """
     try:
-        count = QueueService.cleanup_expired_queues()
+        count = QueueService.cleanup_expired_queues(batch_size=get_config().EXPIRY_REAPER_BATCH_SIZE)
         
         logger.info(f"Cleaned up {count} expired queues")
         
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Executable, event, select
+from sqlalchemy.engine import URL, make_url
+from database import apply_sqlite_pragmas, db, engine_options
+from models.models import HandRaise, Message, Queue
+from services.hand_raise_service import MAX_PAGE_SIZE, HandRaiseService
+from services.message_service import MessageService
+from services.queue_cache import QueueMetadata, queue_cache
+from services.queue_service import QueueService
+from services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# Async DBAPI driver for each database the sync engine supports
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def to_async_url(url) -> URL:
+    """
+    Convert a sync database URL to its asyncio driver
+
+    Args:
+        url: URL or string such as postgresql://... or sqlite:///filap.db
+
+    Returns:
+        URL using the driver from ASYNC_DRIVERS
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+
+    query = dict(url.query)
+    if backend == 'postgresql' and 'sslmode' in query:
+        # asyncpg takes libpq's sslmode values as 'ssl'
+        query['ssl'] = query.pop('sslmode')
+
+    return url.set(drivername=ASYNC_DRIVERS[backend], query=query)
+
+class AsyncDatabase:
+    """
+    Engine and sessions of the async service layer
+
+    Every query runs in its own short session, so independent queries of
+    one request can run concurrently (a single AsyncSession cannot).
+    """
+
+    def __init__(self):
+        self._engine = None
+        self._sessionmaker = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._engine is not None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            raise RuntimeError("Async database is not configured (see init_async_db)")
+        return self._engine
+
+    def configure(self, url, **options):
+        """
+        Create the async engine
+
+        Args:
+            url: Sync or async database URL (converted with to_async_url)
+            **options: create_async_engine options (pool settings)
+        """
+        # Needs greenlet and the async drivers, which the sync app does not
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = to_async_url(url)
+        engine = create_async_engine(url, **options)
+        if url.get_backend_name() == 'sqlite':
+            # Same pragmas as the sync connections (busy timeout, mmap)
+            event.listen(engine.sync_engine, "connect", lambda dbapi_connection, record: apply_sqlite_pragmas(dbapi_connection))
+
+        self._engine = engine
+        # Loaded rows stay readable once their session is closed
+        self._sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        logger.info(f"Async database engine configured ({url.drivername})")
+
+    async def dispose(self):
+        """Close the engine's connections (call from the event loop that used them)"""
+        if self._engine is not None:
+            await self._engine.dispose()
+        self._engine = None
+        self._sessionmaker = None
+
+    def session(self):
+        """New AsyncSession (use as an async context manager)"""
+        if self._sessionmaker is None:
+            raise RuntimeError("Async database is not configured (see init_async_db)")
+        return self._sessionmaker()
+
+    async def all(self, statement: Executable) -> List[Any]:
+        """Run a statement in its own session and return all rows"""
+        async with self.session() as session:
+            return (await session.execute(statement)).all()
+
+    async def one(self, statement: Executable) -> Any:
+        """Run a statement in its own session and return exactly one row"""
+        async with self.session() as session:
+            return (await session.execute(statement)).one()
+
+    async def scalars(self, statement: Executable) -> List[Any]:
+        """Run a statement in its own session and return the first column of every row"""
+        async with self.session() as session:
+            return (await session.scalars(statement)).all()
+
+    async def scalar(self, statement: Executable) -> Any:
+        """Run a statement in its own session and return the first column of the first row"""
+        async with self.session() as session:
+            return await session.scalar(statement)
+
+# Global async database instance (one per worker process)
+async_db = AsyncDatabase()
+
+def init_async_db(app, config):
+    """
+    Configure async_db for an asyncio server (ASGI app, event gateway) running beside the Flask app
+
+    Uses ASYNC_DATABASE_URL when set, otherwise the Flask app's database.
+
+    Args:
+        app: Flask app initialized with init_db
+        config: Config instance
+    """
+    url = config.ASYNC_DATABASE_URL
+    if not url:
+        with app.app_context():
+            # Flask-SQLAlchemy resolves relative SQLite paths against the instance folder
+            url = db.engine.url
+
+    url = make_url(url)
+    if url.get_backend_name() == 'postgresql':
+        # asyncpg prepares every statement server side and keeps them per connection
+        url = url.update_query_dict({'prepared_statement_cache_size': str(config.DB_PREPARED_STATEMENT_CACHE_SIZE)})
+
+    async_db.configure(url, **engine_options(config, str(url)))
+
+class AsyncQueueService:
+    """Async variant of the QueueService reads"""
+
+    @staticmethod
+    async def get_queue(queue_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get queue public information by ID
+
+        Args:
+            queue_id: Queue UUID
+
+        Returns:
+            Dict containing public queue data or None if not found
+        """
+        try:
+            queue_uuid = uuid.UUID(queue_id)
+        except ValueError:
+            return None
+
+        metadata = await AsyncQueueService.get_active_queue_metadata(queue_uuid)
+
+        if not metadata:
+            return None
+
+        return QueueService._queue_to_dict(metadata, include_secret=False)
+
+    @staticmethod
+    async def get_active_queue_metadata(queue_uuid: uuid.UUID) -> Optional[QueueMetadata]:
+        """
+        Get metadata for a queue that exists and has not expired
+
+        Shares the worker's queue metadata cache with the sync services.
+
+        Args:
+            queue_uuid: Queue UUID
+
+        Returns:
+            QueueMetadata or None if not found/expired
+        """
+        metadata = queue_cache.get(queue_uuid)
+        if metadata is queue_cache.MISSING:
+            queue = await async_db.scalar(select(Queue).where(Queue.id == queue_uuid))
+            metadata = QueueMetadata.from_queue(queue) if queue else None
+            queue_cache.put(queue_uuid, metadata)
+
+        if not metadata or metadata.is_expired():
+            return None
+
+        return metadata
+
+class AsyncUserService:
+    """Async variant of the UserService reads"""
+
+    @staticmethod
+    async def generate_user_token(queue_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Generate a new signed user token for a queue
+
+        Args:
+            queue_id: Queue UUID to validate existence
+
+        Returns:
+            Dict containing user_token or None if queue not found
+        """
+        try:
+            queue_uuid = uuid.UUID(queue_id)
+        except ValueError:
+            return None
+
+        queue = await AsyncQueueService.get_active_queue_metadata(queue_uuid)
+
+        if not queue:
+            return None
+
+        return UserService._issue_token(queue_id, queue)
+
+class AsyncMessageService:
+    """Async variant of the MessageService reads"""
+
+    @staticmethod
+    async def get_messages(queue_id: str, user_token: Optional[str] = None, sort_by: Optional[str] = None, limit: int = 50, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Get messages for a queue with pagination and sorting
+
+        Same contract as MessageService.get_messages.
+
+        Returns:
+            Dict with messages and total count, or None if queue not found
+        """
+        page = await AsyncMessageService._query_messages_page(queue_id, user_token, sort_by, limit, offset)
+
+        if page is None:
+            return None
+
+        return MessageService._page_to_dict(*page)
+
+    @staticmethod
+    async def get_messages_json(queue_id: str, user_token: Optional[str] = None, sort_by: Optional[str] = None, limit: int = 50, offset: int = 0) -> Optional[str]:
+        """
+        Get a page of messages as a serialized JSON document
+
+        Same contract as MessageService.get_messages_json.
+
+        Returns:
+            JSON string with messages and total count, or None if queue not found
+        """
+        page = await AsyncMessageService._query_messages_page(queue_id, user_token, sort_by, limit, offset)
+
+        if page is None:
+            return None
+
+        return MessageService._page_to_json(*page)
+
+    @staticmethod
+    async def _query_messages_page(queue_id: str, user_token: Optional[str], sort_by: Optional[str], limit: int, offset: int) -> Optional[Tuple[List[Tuple[Message, bool]], int, int, int, str]]:
+        """Load one page of messages and the total count concurrently"""
+        try:
+            queue_uuid = uuid.UUID(queue_id)
+        except ValueError:
+            return None
+
+        queue = await AsyncQueueService.get_active_queue_metadata(queue_uuid)
+
+        if not queue:
+            return None
+
+        user_token, sort_by, limit, offset = MessageService._page_params(queue, user_token, sort_by, limit, offset)
+        page_statement, count_statement = MessageService._page_statements(queue_uuid, user_token, sort_by, limit, offset)
+
+        results, total_count = await asyncio.gather(
+            async_db.all(page_statement),
+            async_db.scalar(count_statement)
+        )
+
+        return MessageService._page_rows(results, user_token), total_count, limit, offset, sort_by
+
+class AsyncHandRaiseService:
+    """Async variant of the HandRaiseService reads"""
+
+    @staticmethod
+    async def get_hand_raises(
+        queue_id: str,
+        include_completed: bool = False,
+        limit: int = MAX_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        completed_limit: Optional[int] = None,
+        completed_cursor: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a page of hand raises for a queue
+
+        Same contract as HandRaiseService.get_hand_raises; the active page,
+        the completed page and the totals are loaded concurrently.
+
+        Returns:
+            Dict with hand raises or None if queue not found
+
+        Raises:
+            ValueError: If a cursor is malformed
+        """
+        try:
+            queue_uuid = uuid.UUID(queue_id)
+        except ValueError:
+            return None
+
+        if not await AsyncQueueService.get_active_queue_metadata(queue_uuid):
+            return None
+
+        limit, completed_limit = HandRaiseService._page_limits(limit, completed_limit)
+        active_statement, completed_statement, totals_statement = HandRaiseService._page_statements(
+            queue_uuid, include_completed, limit, cursor, completed_limit, completed_cursor
+        )
+
+        active, completed, totals = await asyncio.gather(
+            async_db.scalars(active_statement),
+            async_db.scalars(completed_statement) if include_completed else _no_rows(),
+            async_db.one(totals_statement)
+        )
+
+        return HandRaiseService._page_to_dict(active, completed, limit, completed_limit, totals)
+
+async def _no_rows() -> List[HandRaise]:
+    return []
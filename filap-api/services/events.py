@@ -1,9 +1,161 @@
 import json
 import time
-from typing import Dict, Any
+import calendar
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from collections import defaultdict
 import threading
 import queue
+from sqlalchemy.engine import Connection
+from database import on_commit
+from services.outbox import record_event, store_event
+from utils.tokens import user_channel_id
+
+logger = logging.getLogger(__name__)
+
+def channel_recipient(channel_id: str) -> str:
+    """Private channel key of a user channel id (see user_channel_id)"""
+    return f"user:{channel_id}"
+
+def user_recipient(user_token: str) -> str:
+    """Private channel key of a user token (opaque, the token is not in it)"""
+    return channel_recipient(user_channel_id(user_token))
+
+class EventBatch:
+    """
+    Events of a write committed outside the unit of work (by the SQLite
+    group-commit writer): stored in the outbox on the write's connection,
+    delivered once it has committed
+    """
+
+    def __init__(self, connection: Connection):
+        self._connection = connection
+        self._events: List[Dict[str, Any]] = []
+
+    def add(self, queue_id: str, recipient: Optional[str], event_type: str, data: Dict[str, Any]):
+        """Store an event with the write"""
+        event = dict(queue_id=queue_id, event_type=event_type, data=data)
+        if recipient is not None:
+            event["recipient"] = recipient
+        event_id = store_event(self._connection, queue_id, recipient, event_type, data)
+        if event_id is not None:
+            event["event_id"] = event_id
+        self._events.append(event)
+
+    def deliver(self):
+        """Deliver the events to this worker's clients (call after the commit)"""
+        for event in self._events:
+            if "recipient" in event:
+                sse_manager.send_to(**event)
+            else:
+                sse_manager.broadcast_to_queue(**event)
+
+class ExpiryTimerWheel:
+    """Hashed timer wheel that fires a callback when a queue expires"""
+
+    def __init__(self, on_expire: Callable[[str], None], resolution_seconds: float = 1.0, slot_count: int = 3600):
+        self._on_expire = on_expire
+        self._resolution = resolution_seconds
+        # Format: [{queue_id: deadline_tick}] indexed by deadline_tick % slot_count
+        self._slots: List[Dict[str, int]] = [dict() for _ in range(slot_count)]
+        # Format: {queue_id: slot_index}
+        self._scheduled: Dict[str, int] = {}
+        self._next_tick: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _tick_for(self, timestamp: float) -> int:
+        return int(timestamp // self._resolution)
+
+    def schedule(self, queue_id: str, expires_at: datetime):
+        """
+        Schedule (or reschedule) a queue to expire
+
+        Args:
+            queue_id: Queue UUID string
+            expires_at: Queue expiration time (naive UTC)
+        """
+        deadline = self._tick_for(calendar.timegm(expires_at.utctimetuple()))
+
+        with self._lock:
+            if self._next_tick is None:
+                self._next_tick = self._tick_for(time.time())
+
+            self._remove(queue_id)
+            # Overdue deadlines go in the next slot to be processed
+            slot = max(deadline, self._next_tick) % len(self._slots)
+            self._slots[slot][queue_id] = deadline
+            self._scheduled[queue_id] = slot
+
+        self._ensure_started()
+
+    def cancel(self, queue_id: str):
+        """Stop tracking a queue"""
+        with self._lock:
+            self._remove(queue_id)
+
+    def is_scheduled(self, queue_id: str) -> bool:
+        return queue_id in self._scheduled
+
+    def tick(self, now: Optional[float] = None) -> List[str]:
+        """
+        Fire every queue whose deadline has passed
+
+        Args:
+            now: Override for the current unix time
+
+        Returns:
+            Queue ids that expired
+        """
+        now_tick = self._tick_for(time.time() if now is None else now)
+        expired = []
+
+        with self._lock:
+            if self._next_tick is None or now_tick < self._next_tick:
+                return expired
+
+            # After a long stall every slot is due, so scan each one once
+            tick_count = min(now_tick - self._next_tick + 1, len(self._slots))
+            for offset in range(tick_count):
+                slot = self._slots[(self._next_tick + offset) % len(self._slots)]
+                for queue_id, deadline in list(slot.items()):
+                    if deadline <= now_tick:
+                        del slot[queue_id]
+                        del self._scheduled[queue_id]
+                        expired.append(queue_id)
+
+            self._next_tick = now_tick + 1
+
+        # Callbacks run outside the wheel lock
+        for queue_id in expired:
+            try:
+                self._on_expire(queue_id)
+            except Exception as e:
+                logger.error(f"Failed to expire SSE streams for queue {queue_id}: {str(e)}")
+
+        return expired
+
+    def _remove(self, queue_id: str):
+        slot = self._scheduled.pop(queue_id, None)
+        if slot is not None:
+            self._slots[slot].pop(queue_id, None)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Under gunicorn's gevent worker this thread is a greenlet
+            self._thread = threading.Thread(target=self._run, name="sse-expiry-wheel", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self._resolution)
+            self.tick()
 
 class SSEManager:
     """Manages Server-Sent Events connections and broadcasts"""
@@ -12,34 +164,100 @@ class SSEManager:
         # Store event queues per connection
         # Format: {queue_id: {connection_id: Queue}}
         self._connections: Dict[str, Dict[str, queue.Queue]] = defaultdict(dict)
+        # Private channel index: connections tagged with recipients (user channels)
+        # Format: {queue_id: {recipient: {connection_id: Queue}}}
+        self._recipient_connections: Dict[str, Dict[str, Dict[str, queue.Queue]]] = {}
+        # Format: {connection_id: (recipient, ...)}
+        self._connection_recipients: Dict[str, Tuple[str, ...]] = {}
         self._connection_counter = 0
         self._lock = threading.Lock()
+        self._expiry_wheel = ExpiryTimerWheel(self.expire_queue)
     
-    def add_connection(self, queue_id: str) -> tuple[str, queue.Queue]:
-        """Add a new SSE connection for a queue"""
+    def add_connection(self, queue_id: str, recipients: Iterable[str] = ()) -> tuple[str, queue.Queue]:
+        """Add a new SSE connection for a queue, optionally tagged with private recipients"""
         with self._lock:
             connection_id = str(self._connection_counter)
             self._connection_counter += 1
             event_queue = queue.Queue()
             self._connections[queue_id][connection_id] = event_queue
+            recipients = tuple(recipients)
+            if recipients:
+                channels = self._recipient_connections.setdefault(queue_id, {})
+                for recipient in recipients:
+                    channels.setdefault(recipient, {})[connection_id] = event_queue
+                self._connection_recipients[connection_id] = recipients
             return connection_id, event_queue
     
     def remove_connection(self, queue_id: str, connection_id: str):
         """Remove an SSE connection"""
         with self._lock:
-            if queue_id in self._connections:
-                self._connections[queue_id].pop(connection_id, None)
-                if not self._connections[queue_id]:
-                    del self._connections[queue_id]
+            self._discard_connection(queue_id, connection_id)
+    
+    def _discard_connection(self, queue_id: str, connection_id: str):
+        """Drop a connection from every index (caller holds the lock)"""
+        recipients = self._connection_recipients.pop(connection_id, ())
+        if recipients:
+            channels = self._recipient_connections.get(queue_id, {})
+            for recipient in recipients:
+                recipient_connections = channels.get(recipient, {})
+                recipient_connections.pop(connection_id, None)
+                if not recipient_connections:
+                    channels.pop(recipient, None)
+            if not channels:
+                self._recipient_connections.pop(queue_id, None)
+        
+        if queue_id in self._connections:
+            self._connections[queue_id].pop(connection_id, None)
+            if not self._connections[queue_id]:
+                del self._connections[queue_id]
+                self._expiry_wheel.cancel(queue_id)
+    
+    def has_recipients(self, queue_id: str) -> bool:
+        """Check whether any connection of a queue listens on a private channel"""
+        return queue_id in self._recipient_connections
     
-    def broadcast_to_queue(self, queue_id: str, event_type: str, data: Dict[str, Any]):
+    def send_to(self, queue_id: str, recipient: str, event_type: str, data: Dict[str, Any], event_id: Optional[int] = None):
+        """Send an event only to the connections tagged with a recipient (O(1) lookup)"""
+        with self._lock:
+            recipient_connections = self._recipient_connections.get(queue_id, {}).get(recipient)
+            if not recipient_connections:
+                return
+            event_queues = list(recipient_connections.values())
+        
+        sse_data = self._format_sse_message(event_type, data, event_id)
+        for event_queue in event_queues:
+            event_queue.put(sse_data)
+    
+    def connection_count(self, queue_id: Optional[str] = None) -> int:
+        """Count open SSE connections in this worker, overall or for one queue"""
+        with self._lock:
+            if queue_id is not None:
+                return len(self._connections.get(queue_id, ()))
+            return sum(len(connections) for connections in self._connections.values())
+    
+    def expire_queue(self, queue_id: str):
+        """Send queue_expired to every connection of a queue, then close them"""
+        with self._lock:
+            connections = self._connections.pop(queue_id, {})
+            for connection_id in connections:
+                self._connection_recipients.pop(connection_id, None)
+            self._recipient_connections.pop(queue_id, None)
+            self._expiry_wheel.cancel(queue_id)
+        
+        sse_data = self._format_sse_message("queue_expired", {"id": queue_id})
+        for event_queue in connections.values():
+            event_queue.put(sse_data)
+            # Close sentinel: the stream generator exits when it reads None
+            event_queue.put(None)
+    
+    def broadcast_to_queue(self, queue_id: str, event_type: str, data: Dict[str, Any], event_id: Optional[int] = None):
         """Broadcast an event to all connections for a specific queue"""
         with self._lock:
             if queue_id not in self._connections:
                 return
             
             # Create SSE formatted message
-            sse_data = self._format_sse_message(event_type, data)
+            sse_data = self._format_sse_message(event_type, data, event_id)
             
             # Get copy of connections to avoid modification during iteration
             connections = dict(self._connections[queue_id])
@@ -57,30 +275,61 @@ class SSEManager:
         if dead_connections:
             with self._lock:
                 for connection_id in dead_connections:
-                    self._connections[queue_id].pop(connection_id, None)
-                # Remove empty queue entry if no connections remain
-                if not self._connections[queue_id]:
-                    del self._connections[queue_id]
+                    self._discard_connection(queue_id, connection_id)
     
-    def _format_sse_message(self, event_type: str, data: Dict[str, Any]) -> str:
-        """Format data as SSE message"""
+    def _format_sse_message(self, event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+        """Format data as SSE message (with an id for outbox events, echoed back as Last-Event-ID)"""
         json_data = json.dumps(data)
+        if event_id is not None:
+            return f"id: {event_id}\nevent: {event_type}\ndata: {json_data}\n\n"
         return f"event: {event_type}\ndata: {json_data}\n\n"
     
-    def create_event_stream(self, queue_id: str):
-        """Create a generator for SSE stream"""
+    @staticmethod
+    def _message_id(sse_data: str) -> Optional[int]:
+        if not sse_data.startswith("id: "):
+            return None
+        return int(sse_data[4:sse_data.index("\n")])
+    
+    def create_event_stream(self, queue_id: str, expires_at: Optional[datetime] = None, recipients: Iterable[str] = (),
+                            replay: Optional[Callable[[], Tuple[List[Tuple[int, str, Dict[str, Any]]], bool]]] = None):
+        """
+        Create a generator for SSE stream, closed when the queue expires
+        
+        replay loads the events a reconnecting client missed (see
+        services.outbox.replay_events). It runs once the connection is
+        registered, so nothing published meanwhile is lost; live events
+        that were also replayed are skipped.
+        """
         def event_generator():
-            connection_id, event_queue = self.add_connection(queue_id)
+            connection_id, event_queue = self.add_connection(queue_id, recipients)
+            if expires_at is not None:
+                self._expiry_wheel.schedule(queue_id, expires_at)
             
             try:
                 # Send initial connection message
                 yield "data: {\"event\": \"connected\"}\n\n"
                 
+                replayed_up_to = 0
+                if replay is not None:
+                    events, complete = replay()
+                    if not complete:
+                        # Some missed events are gone: the client has to refetch
+                        yield self._format_sse_message("resync", {})
+                    for event_id, event_type, data in events:
+                        yield self._format_sse_message(event_type, data, event_id)
+                        replayed_up_to = event_id
+                
                 # Listen for events
                 while True:
                     try:
                         # Wait for events with timeout for heartbeat
                         message = event_queue.get(timeout=30)
+                        if message is None:
+                            break
+                        if replayed_up_to:
+                            message_id = self._message_id(message)
+                            if message_id is not None and message_id <= replayed_up_to:
+                                continue
                         yield message
                     except queue.Empty:
                         # Send heartbeat if no events
@@ -113,32 +362,58 @@ class EventService:
             sse_manager.remove_connection(queue_id, connection_id)
     
     @staticmethod
-    def create_event_stream(queue_id: str):
+    def create_event_stream(queue_id: str, expires_at: Optional[datetime] = None, recipients: Iterable[str] = ()):
         """Create SSE event stream for a queue"""
-        return sse_manager.create_event_stream(queue_id)
+        return sse_manager.create_event_stream(queue_id, expires_at, recipients)
+    
+    @staticmethod
+    def _broadcast(queue_id: str, event_type: str, data: Dict[str, Any], batch: Optional[EventBatch] = None):
+        """Broadcast to a queue once the caller's changes are committed"""
+        if batch is not None:
+            batch.add(queue_id, None, event_type, data)
+            return
+        event = dict(queue_id=queue_id, event_type=event_type, data=data)
+        # Stored in the outbox for other workers and Last-Event-ID replay
+        event_id = record_event(queue_id, None, event_type, data)
+        if event_id is not None:
+            event["event_id"] = event_id
+        on_commit(lambda: sse_manager.broadcast_to_queue(**event))
+    
+    @staticmethod
+    def _send(queue_id: str, recipient: str, event_type: str, data: Dict[str, Any], batch: Optional[EventBatch] = None):
+        """Send to a private channel once the caller's changes are committed"""
+        if batch is not None:
+            batch.add(queue_id, recipient, event_type, data)
+            return
+        event = dict(queue_id=queue_id, recipient=recipient, event_type=event_type, data=data)
+        event_id = record_event(queue_id, recipient, event_type, data)
+        if event_id is not None:
+            event["event_id"] = event_id
+        on_commit(lambda: sse_manager.send_to(**event))
     
     @staticmethod
     def broadcast_new_message(queue_id: str, message_data: Dict[str, Any]):
         """Broadcast when a new message is created"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="new_message",
             data=message_data
         )
     
     @staticmethod
-    def broadcast_message_updated(queue_id: str, message_data: Dict[str, Any]):
+    def broadcast_message_updated(queue_id: str, message_data: Dict[str, Any], batch: Optional[EventBatch] = None):
         """Broadcast when a message is updated (vote count, read status, etc.)"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="message_updated",
-            data=message_data
+            data=message_data,
+            batch=batch
         )
     
     @staticmethod
     def broadcast_message_deleted(queue_id: str, message_id: str):
         """Broadcast when a message is deleted"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="message_deleted",
             data={"id": message_id}
@@ -147,7 +422,7 @@ class EventService:
     @staticmethod
     def broadcast_queue_updated(queue_id: str, queue_data: Dict[str, Any]):
         """Broadcast when queue settings are updated"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="queue_updated",
             data=queue_data
@@ -156,7 +431,7 @@ class EventService:
     @staticmethod
     def broadcast_hand_raise_new(queue_id: str, hand_raise_data: Dict[str, Any]):
         """Broadcast when a new hand is raised"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="hand_raise_new",
             data=hand_raise_data
@@ -165,17 +440,67 @@ class EventService:
     @staticmethod
     def broadcast_hand_raise_updated(queue_id: str, hand_raise_data: Dict[str, Any]):
         """Broadcast when a hand raise is updated (marked as completed)"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="hand_raise_updated",
             data=hand_raise_data
         )
 
+    @staticmethod
+    def broadcast_hand_raises_completed(queue_id: str, hand_raises_data: List[Dict[str, Any]]):
+        """Broadcast when the host completes several hand raises at once"""
+        EventService._broadcast(
+            queue_id=queue_id,
+            event_type="hand_raises_completed",
+            data={"hand_raises": hand_raises_data}
+        )
+
     @staticmethod
     def broadcast_hand_raise_removed(queue_id: str, hand_raise_id: str):
         """Broadcast when a hand raise is removed (user lowered hand)"""
-        sse_manager.broadcast_to_queue(
+        EventService._broadcast(
             queue_id=queue_id,
             event_type="hand_raise_removed",
             data={"id": hand_raise_id}
+        )
+
+    @staticmethod
+    def broadcast_positions_shifted(queue_id: str, from_position: int, delta: int):
+        """Broadcast that every active hand raise at from_position or later moved by delta places"""
+        EventService._broadcast(
+            queue_id=queue_id,
+            event_type="positions_shifted",
+            data={"from_position": from_position, "delta": delta}
+        )
+
+    @staticmethod
+    def send_position_changed(queue_id: str, user_token: str, position: Optional[int]):
+        """Tell a user their hand raise position changed (None once their hand is down)"""
+        EventService._send(
+            queue_id=queue_id,
+            recipient=user_recipient(user_token),
+            event_type="position_changed",
+            data={"queue_id": queue_id, "position": position}
+        )
+
+    @staticmethod
+    def send_vote_changed(queue_id: str, user_token: str, message_id: str, has_user_voted: bool, vote_count: int,
+                          batch: Optional[EventBatch] = None):
+        """Tell a voter (on all their connections) the result of their vote"""
+        EventService._send(
+            queue_id=queue_id,
+            recipient=user_recipient(user_token),
+            event_type="vote_changed",
+            data={"id": message_id, "has_user_voted": has_user_voted, "vote_count": vote_count},
+            batch=batch
+        )
+
+    @staticmethod
+    def send_message_moderated(queue_id: str, author_token: str, message_id: str, action: str):
+        """Tell a message's author the host marked it read/unread or deleted it"""
+        EventService._send(
+            queue_id=queue_id,
+            recipient=user_recipient(author_token),
+            event_type="message_moderated",
+            data={"id": message_id, "action": action}
         )
\ No newline at end of file
@@ -0,0 +1,101 @@
+import logging
+import threading
+from typing import Optional
+from config import get_config
+
+logger = logging.getLogger(__name__)
+
+class ExpiryReaper:
+    """Background worker that deletes expired queues off the request path"""
+
+    def __init__(self, interval_seconds: float = 60, batch_size: int = 500, max_batches: int = 20):
+        self._interval = interval_seconds
+        self._batch_size = batch_size
+        self._max_batches = max_batches
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self, app):
+        """Start the reaper once per worker process (cheap to call repeatedly)"""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._app = app
+            self._stop_event.clear()
+            # Under gunicorn's gevent worker this thread is a greenlet
+            self._thread = threading.Thread(target=self._run, name="expiry-reaper", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the reaper and wait for the current pass to finish"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self) -> int:
+        """
+        Run a single reaping pass
+
+        Returns:
+            Number of queues deleted
+        """
+        from database import db
+        from services.queue_service import QueueService
+        from services.partition_service import PartitionService
+        from services.stats import system_stats
+        from utils.rate_limit import DatabaseTokenBucketLimiter, client_limiter, queue_limiter
+        from utils.idempotency import DatabaseIdempotencyStore, idempotency_store
+
+        with self._app.app_context():
+            try:
+                # Whole expired days go with a partition drop; rows expiring today are deleted
+                if PartitionService.is_enabled():
+                    PartitionService.run_maintenance()
+
+                # Shared rate limit buckets that have refilled carry no state
+                for limiter in (client_limiter, queue_limiter):
+                    if isinstance(limiter, DatabaseTokenBucketLimiter):
+                        limiter.prune()
+
+                # Expired idempotency keys (the memory store is bounded instead)
+                if isinstance(idempotency_store, DatabaseIdempotencyStore):
+                    idempotency_store.prune()
+
+                # Keep /api/system/stats off the database on the request path
+                if system_stats.needs_reconcile():
+                    system_stats.reconcile()
+
+                return QueueService.cleanup_expired_queues(
+                    batch_size=self._batch_size,
+                    max_batches=self._max_batches
+                )
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                count = self.run_once()
+                if count:
+                    logger.info(f"Expiry reaper deleted {count} expired queues")
+            except Exception as e:
+                logger.error(f"Expiry reaper pass failed: {str(e)}")
+
+_config = get_config()
+
+# Global reaper instance (one per worker process)
+expiry_reaper = ExpiryReaper(
+    interval_seconds=_config.EXPIRY_REAPER_INTERVAL_SECONDS,
+    batch_size=_config.EXPIRY_REAPER_BATCH_SIZE
+)
@@ -0,0 +1,83 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+from config import get_config
+
+class MessageFragmentCache:
+    """Bounded LRU cache of serialized message JSON fragments"""
+
+    # Fields that change per viewer or per vote; patched in at render time
+    DYNAMIC_FIELDS = ("has_user_voted", "vote_count")
+
+    def __init__(self, max_entries: int = 10000):
+        # Format: {(message_id, updated_at): static_fragment}
+        self._fragments: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, message_id: str, updated_at: str, build: Callable[[], Dict[str, Any]]) -> str:
+        """
+        Get the static JSON fragment for a message, serializing it on a miss
+
+        Args:
+            message_id: Message UUID string
+            updated_at: Serialized updated_at timestamp of the message
+            build: Callable returning the message dictionary (only called on a miss)
+
+        Returns:
+            JSON object body (without braces) for all non-dynamic fields
+        """
+        key = (message_id, updated_at)
+
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        static_data = {
+            field: value for field, value in build().items()
+            if field not in self.DYNAMIC_FIELDS
+        }
+        fragment = json.dumps(static_data, sort_keys=True)[1:-1]
+
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self._max_entries:
+                self._fragments.popitem(last=False)
+
+        return fragment
+
+    def render(self, fragment: str, vote_count: int, has_user_voted: bool) -> str:
+        """Combine a cached fragment with the per-request dynamic fields"""
+        return '{%s,"has_user_voted":%s,"vote_count":%d}' % (
+            fragment,
+            "true" if has_user_voted else "false",
+            vote_count
+        )
+
+    def invalidate(self, message_id: str):
+        """Drop all cached fragments for a message (e.g. after deletion)"""
+        with self._lock:
+            stale_keys = [key for key in self._fragments if key[0] == message_id]
+            for key in stale_keys:
+                del self._fragments[key]
+
+    def clear(self):
+        """Drop all cached fragments"""
+        with self._lock:
+            self._fragments.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+# Global fragment cache instance (one per worker process)
+message_fragment_cache = MessageFragmentCache(get_config().MESSAGE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Connection, Engine
+from sqlalchemy.pool import SingletonThreadPool
+
+logger = logging.getLogger(__name__)
+
+class _WriteJob:
+    """One write waiting for its batch to commit"""
+
+    __slots__ = ("work", "done", "result", "error")
+
+    def __init__(self, work: Callable[[Connection], Any]):
+        self.work = work
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class GroupCommitWriter:
+    """
+    Single SQLite writer that commits concurrent writes in batches
+
+    SQLite allows one writer at a time; instead of request threads
+    fighting over the lock (and paying one fsync each), writes are queued
+    to one thread that runs whatever has queued up in a single
+    transaction. Each write gets its own savepoint, so a failing write is
+    rolled back alone.
+    """
+
+    def __init__(self, max_batch: int = 64, window_seconds: float = 0.002):
+        self._jobs: "queue.Queue[_WriteJob]" = queue.Queue()
+        self._max_batch = max(1, max_batch)
+        # How long to wait for more writes once the first one arrives
+        self._window = max(0.0, window_seconds)
+        self._engine: Optional[Engine] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._engine is not None
+
+    def configure(self, database_url: Union[str, URL], max_batch: Optional[int] = None, window_seconds: Optional[float] = None):
+        """Open the writer's own connection to a file-based SQLite database"""
+        if max_batch is not None:
+            self._max_batch = max(1, max_batch)
+        if window_seconds is not None:
+            self._window = max(0.0, window_seconds)
+
+        engine = create_engine(database_url, poolclass=SingletonThreadPool)
+
+        # pysqlite's implicit transactions end at the first RELEASE, so the
+        # writer issues BEGIN itself to keep savepoints inside one commit
+        @event.listens_for(engine, "connect")
+        def _disable_implicit_begin(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        self._engine = engine
+
+    def submit(self, work: Callable[[Connection], Any]) -> Any:
+        """
+        Run work(connection) on the writer and wait until its batch commits
+
+        Returns:
+            Whatever work returned
+
+        Raises:
+            The exception raised by work, or by the batch commit
+        """
+        if self._engine is None:
+            raise RuntimeError("Group commit writer is not configured")
+
+        self._ensure_started()
+        job = _WriteJob(work)
+        self._jobs.put(job)
+        job.done.wait()
+
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def run_batch(self, jobs: List[_WriteJob]):
+        """Run jobs in one transaction and wake their callers"""
+        try:
+            with self._engine.begin() as connection:
+                for job in jobs:
+                    try:
+                        with connection.begin_nested():
+                            job.result = job.work(connection)
+                    except Exception as e:
+                        job.error = e
+        except Exception as e:
+            # Nothing in the batch was written
+            logger.error(f"Group commit of {len(jobs)} writes failed: {e}")
+            for job in jobs:
+                job.result = None
+                job.error = job.error or e
+        finally:
+            for job in jobs:
+                job.done.set()
+
+    def _next_batch(self) -> List[_WriteJob]:
+        jobs = [self._jobs.get()]
+        deadline = time.monotonic() + self._window
+
+        while len(jobs) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    jobs.append(self._jobs.get(timeout=remaining))
+                else:
+                    jobs.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+
+        return jobs
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Under gunicorn's gevent worker this thread is a greenlet
+            self._thread = threading.Thread(target=self._run, name="sqlite-group-commit", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.run_batch(self._next_batch())
+
+# Global SQLite writer instance (one per worker process)
+sqlite_writer = GroupCommitWriter()
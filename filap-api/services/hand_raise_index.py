@@ -0,0 +1,155 @@
+import bisect
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from config import get_config
+
+# Sort key of an active raise: first come, first served, ties broken by id
+RaiseKey = Tuple[datetime, str]
+
+class _QueueRaises:
+    """Active raises of one queue in position order"""
+
+    __slots__ = ("keys", "by_token", "by_key", "valid_until")
+
+    def __init__(self, valid_until: float):
+        self.keys: List[RaiseKey] = []
+        # Format: {user_token: RaiseKey}
+        self.by_token: Dict[str, RaiseKey] = {}
+        # Format: {RaiseKey: user_token}
+        self.by_key: Dict[RaiseKey, str] = {}
+        self.valid_until = valid_until
+
+class HandRaiseIndex:
+    """Per-worker ordered index of active hand raises for O(log n) position lookups"""
+
+    # Sentinel returned by position() when the queue is not indexed
+    MISSING = object()
+
+    def __init__(self, ttl_seconds: float = 5, max_queues: int = 10000):
+        # Format: {queue_uuid: _QueueRaises}
+        self._queues: "OrderedDict[uuid.UUID, _QueueRaises]" = OrderedDict()
+        # Rebuilt after the TTL so raises made by other workers show up
+        self._ttl = ttl_seconds
+        self._max_queues = max(1, max_queues)
+        self._lock = threading.Lock()
+
+    def position(self, queue_uuid: uuid.UUID, user_token: str) -> Union[int, None, object]:
+        """
+        Look up a user's 1-based position among the active raises
+
+        Returns:
+            Position, None if the user has no active raise, MISSING if the queue is not indexed
+        """
+        with self._lock:
+            raises = self._get(queue_uuid)
+            if raises is None:
+                return self.MISSING
+
+            key = raises.by_token.get(user_token)
+            if key is None:
+                return None
+
+            return bisect.bisect_left(raises.keys, key) + 1
+
+    def count_ahead(self, queue_uuid: uuid.UUID, hand_raise_id: uuid.UUID, raised_at: datetime) -> Union[int, object]:
+        """
+        Count the active raises queued ahead of a raise
+
+        Args:
+            queue_uuid: Queue UUID
+            hand_raise_id: Raise to look ahead of (it may be removed already)
+            raised_at: When that raise was made
+
+        Returns:
+            Number of raises ahead, or MISSING if the queue is not indexed
+        """
+        with self._lock:
+            raises = self._get(queue_uuid)
+            if raises is None:
+                return self.MISSING
+
+            return bisect.bisect_left(raises.keys, (raised_at, str(hand_raise_id)))
+
+    def load(self, queue_uuid: uuid.UUID, active_raises: Iterable[Tuple[uuid.UUID, str, datetime]]):
+        """
+        Index a queue from its active raises
+
+        Args:
+            queue_uuid: Queue UUID
+            active_raises: (hand_raise_id, user_token, raised_at) rows
+        """
+        raises = _QueueRaises(time.monotonic() + self._ttl)
+        for hand_raise_id, user_token, raised_at in active_raises:
+            key = (raised_at, str(hand_raise_id))
+            raises.keys.append(key)
+            raises.by_token[user_token] = key
+            raises.by_key[key] = user_token
+        raises.keys.sort()
+
+        with self._lock:
+            self._queues[queue_uuid] = raises
+            self._queues.move_to_end(queue_uuid)
+            while len(self._queues) > self._max_queues:
+                self._queues.popitem(last=False)
+
+    def add(self, queue_uuid: uuid.UUID, hand_raise_id: uuid.UUID, user_token: str, raised_at: datetime):
+        """Record a raised hand (ignored if the queue is not indexed)"""
+        with self._lock:
+            raises = self._get(queue_uuid)
+            if raises is None or user_token in raises.by_token:
+                return
+
+            key = (raised_at, str(hand_raise_id))
+            bisect.insort(raises.keys, key)
+            raises.by_token[user_token] = key
+            raises.by_key[key] = user_token
+
+    def remove(self, queue_uuid: uuid.UUID, user_token: str):
+        """Forget a lowered or completed hand"""
+        with self._lock:
+            raises = self._get(queue_uuid)
+            if raises is None:
+                return
+
+            key = raises.by_token.pop(user_token, None)
+            if key is None:
+                return
+            raises.by_key.pop(key, None)
+
+            index = bisect.bisect_left(raises.keys, key)
+            if index < len(raises.keys) and raises.keys[index] == key:
+                del raises.keys[index]
+
+    def invalidate(self, queue_uuid: uuid.UUID):
+        """Drop the index of a queue"""
+        with self._lock:
+            self._queues.pop(queue_uuid, None)
+
+    def clear(self):
+        """Drop all indexed queues"""
+        with self._lock:
+            self._queues.clear()
+
+    def _get(self, queue_uuid: uuid.UUID) -> Optional[_QueueRaises]:
+        raises = self._queues.get(queue_uuid)
+        if raises is None:
+            return None
+
+        if raises.valid_until < time.monotonic():
+            del self._queues[queue_uuid]
+            return None
+
+        self._queues.move_to_end(queue_uuid)
+        return raises
+
+_config = get_config()
+
+# Global hand raise index instance (one per worker process)
+hand_raise_index = HandRaiseIndex(
+    ttl_seconds=_config.HAND_RAISE_INDEX_TTL_SECONDS,
+    max_queues=_config.HAND_RAISE_INDEX_MAX_QUEUES
+)
\ No newline at end of file
@@ -1,19 +1,46 @@
+import base64
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import desc, asc
-from database import db
-from models.models import Queue, HandRaise
+from sqlalchemy import Insert, delete, desc, asc, exists, func, lambda_stmt, select, tuple_, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from database import db, commit, on_commit, on_rollback, read_only
+from models.models import HandRaise, Queue
 from services.events import EventService
+from services.queue_service import QueueService
+from services.user_service import UserService
+from services.stats import system_stats
+from services.hand_raise_index import hand_raise_index
+from config import get_config
 import uuid
 
+_config = get_config()
+
+# Most hand raises a host can complete in one batch request
+MAX_BATCH_SIZE = 100
+# Most hand raises returned per list page
+MAX_PAGE_SIZE = 100
+
+class HandRaiseToggle(Enum):
+    """Outcome of toggling a user's hand"""
+    RAISED = "raised"
+    LOWERED = "lowered"
+    QUEUE_NOT_FOUND = "queue_not_found"
+
 class HandRaiseService:
     """Service layer for hand raise management operations"""
 
     @staticmethod
-    def raise_hand(queue_id: str, user_token: str, user_name: str) -> Optional[Dict[str, Any]]:
+    def toggle_hand(queue_id: str, user_token: str, user_name: str) -> Tuple[HandRaiseToggle, Optional[Dict[str, Any]]]:
         """
-        Raise a hand for a user in a queue (or lower if already raised)
+        Raise a hand for a user in a queue, or lower it if already raised
+
+        The toggle is a single DELETE ... RETURNING or INSERT ... ON CONFLICT
+        DO NOTHING; the partial unique index on active raises guarantees at
+        most one active raise per user.
 
         Args:
             queue_id: Queue UUID
@@ -21,84 +48,157 @@ class HandRaiseService:
             user_name: User's display name
 
         Returns:
-            Dict containing hand raise data or None if hand was lowered/queue not found
+            (HandRaiseToggle, hand raise data if the hand is raised)
         """
         try:
             queue_uuid = uuid.UUID(queue_id)
         except ValueError:
-            return None
+            return HandRaiseToggle.QUEUE_NOT_FOUND, None
 
         # Check if queue exists and is not expired
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
+        queue = QueueService.get_active_queue_metadata(queue_uuid)
 
         if not queue:
-            return None
+            return HandRaiseToggle.QUEUE_NOT_FOUND, None
 
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            HandRaiseService._delete_expired_queue(queue)
-            return None
+        # Reject tokens not minted for this queue (pure CPU)
+        if not UserService.validate_user_token(queue_uuid, user_token):
+            raise ValueError("Invalid user token")
+        user_token = UserService.normalize_user_token(user_token)
 
         # Validate inputs
         user_name = user_name.strip()
         if not user_name or len(user_name) > 100:
             raise ValueError("User name must be 1-100 characters")
 
-        # Check if user already has an active hand raise
-        existing_raise = db.session.query(HandRaise).filter_by(
-            queue_id=queue_uuid,
-            user_token=user_token,
-            completed=False
-        ).first()
+        table = HandRaise.__table__
 
-        if existing_raise:
-            # User already has active hand raise - remove it (toggle off)
-            try:
-                db.session.delete(existing_raise)
-                db.session.commit()
+        try:
+            # Lower the active raise if there is one (toggle off)
+            lowered = db.session.execute(lambda_stmt(
+                lambda: table.delete().where(
+                    table.c.queue_id == queue_uuid,
+                    table.c.user_token == user_token,
+                    table.c.completed == False
+                ).returning(table.c.id, table.c.raised_at)
+            )).first()
+
+            if lowered:
+                HandRaiseService._bump_counts(queue_uuid, active=-1)
+                commit()
+                on_commit(lambda: system_stats.hand_raise_changed(str(queue_uuid), -1))
+                hand_raise_index.remove(queue_uuid, user_token)
+                HandRaiseService._index_changed(queue_uuid)
 
                 # Broadcast real-time update
-                EventService.broadcast_hand_raise_removed(queue_id, str(existing_raise.id))
+                EventService.broadcast_hand_raise_removed(queue_id, str(lowered.id))
+                HandRaiseService._push_positions(queue_id, queue_uuid, lowered.id, user_token, lowered.raised_at, is_active=False)
+
+                return HandRaiseToggle.LOWERED, None
+
+            # A concurrent raise by the same user hits the partial unique index
+            raised = db.session.execute(HandRaiseService._raise_statement(db.engine.dialect.name), {
+                "id": uuid.uuid4(),
+                "queue_id": queue_uuid,
+                "user_token": user_token,
+                "user_name": user_name,
+                "raised_at": datetime.utcnow(),
+                "completed": False,
+                "expires_on": queue.expires_at.date()
+            }).first()
+            if raised is not None:
+                HandRaiseService._bump_counts(queue_uuid, active=1)
+            commit()
 
-                return None  # Indicates hand was lowered
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError("Failed to toggle hand raise")
 
-            except IntegrityError:
-                db.session.rollback()
-                raise ValueError("Failed to remove hand raise")
+        if raised is None:
+            # Lost the race: report the raise that won
+            existing = db.session.scalars(lambda_stmt(
+                lambda: select(HandRaise).where(
+                    HandRaise.queue_id == queue_uuid,
+                    HandRaise.user_token == user_token,
+                    HandRaise.completed == False
+                ).limit(1)
+            )).first()
+            if existing is None:
+                raise ValueError("Failed to toggle hand raise")
+            return HandRaiseToggle.RAISED, {**HandRaiseService._hand_raise_to_dict(existing), "user_token": existing.user_token}
 
-        # Create new hand raise
-        hand_raise = HandRaise(
-            queue_id=queue_uuid,
-            user_token=user_token,
-            user_name=user_name
-        )
+        on_commit(lambda: system_stats.hand_raise_changed(str(queue_uuid), 1))
+        hand_raise_index.add(queue_uuid, raised.id, user_token, raised.raised_at)
+        HandRaiseService._index_changed(queue_uuid)
 
-        try:
-            db.session.add(hand_raise)
-            db.session.commit()
+        hand_raise_data = HandRaiseService._hand_raise_to_dict(raised)
 
-            hand_raise_data = HandRaiseService._hand_raise_to_dict(hand_raise)
+        # Broadcast real-time update
+        EventService.broadcast_hand_raise_new(queue_id, hand_raise_data)
 
-            # Broadcast real-time update
-            EventService.broadcast_hand_raise_new(queue_id, hand_raise_data)
+        # The token is the user's credential, so only the user gets it back
+        return HandRaiseToggle.RAISED, {**hand_raise_data, "user_token": user_token}
 
-            return hand_raise_data
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _raise_statement(dialect_name: str) -> Insert:
+        """INSERT ... ON CONFLICT DO NOTHING for a new raise, built once per dialect and executed with a dict of values"""
+        if dialect_name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
 
-        except IntegrityError:
-            db.session.rollback()
-            raise ValueError("Failed to create hand raise")
+        table = HandRaise.__table__
+        return insert(table).on_conflict_do_nothing().returning(*table.c)
 
     @staticmethod
-    def get_hand_raises(queue_id: str, include_completed: bool = False) -> Optional[Dict[str, Any]]:
+    def raise_hand(queue_id: str, user_token: str, user_name: str) -> Optional[Dict[str, Any]]:
         """
-        Get hand raises for a queue
+        Raise a hand for a user in a queue (or lower if already raised)
+
+        Args:
+            queue_id: Queue UUID
+            user_token: User's token for identification
+            user_name: User's display name
+
+        Returns:
+            Dict containing hand raise data or None if hand was lowered/queue not found
+        """
+        _, hand_raise_data = HandRaiseService.toggle_hand(queue_id, user_token, user_name)
+        return hand_raise_data
+
+    @staticmethod
+    @read_only
+    def get_hand_raises(
+        queue_id: str,
+        include_completed: bool = False,
+        limit: int = MAX_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        completed_limit: Optional[int] = None,
+        completed_cursor: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a page of hand raises for a queue
+
+        Active raises are listed first come, first served and completed ones
+        most recent first; both pages use keyset cursors so each request
+        costs the same however long the queue has been running. Totals come
+        from the queue's counters.
 
         Args:
             queue_id: Queue UUID
             include_completed: Whether to include completed hand raises
+            limit: Number of active hand raises to return (max 100)
+            cursor: next_cursor of the previous active page
+            completed_limit: Number of completed hand raises to return (max 100,
+                defaults to HAND_RAISE_COMPLETED_HISTORY_LIMIT)
+            completed_cursor: completed_next_cursor of the previous completed page
 
         Returns:
             Dict with hand raises or None if queue not found
+
+        Raises:
+            ValueError: If a cursor is malformed
         """
         try:
             queue_uuid = uuid.UUID(queue_id)
@@ -106,43 +206,92 @@ class HandRaiseService:
             return None
 
         # Check if queue exists and is not expired
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
-
-        if not queue:
+        if not QueueService.get_active_queue_metadata(queue_uuid):
             return None
 
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            HandRaiseService._delete_expired_queue(queue)
-            return None
+        limit, completed_limit = HandRaiseService._page_limits(limit, completed_limit)
+        active_statement, completed_statement, totals_statement = HandRaiseService._page_statements(
+            queue_uuid, include_completed, limit, cursor, completed_limit, completed_cursor
+        )
 
-        # Build query
-        query = db.session.query(HandRaise).filter_by(queue_id=queue_uuid)
+        active = db.session.scalars(active_statement).all()
+        completed = db.session.scalars(completed_statement).all() if include_completed else []
+        totals = db.session.execute(totals_statement).one()
 
-        if not include_completed:
-            query = query.filter_by(completed=False)
+        return HandRaiseService._page_to_dict(active, completed, limit, completed_limit, totals)
 
-        # Order by raised_at (first come, first served)
-        query = query.order_by(asc(HandRaise.raised_at))
+    @staticmethod
+    def _page_limits(limit: int, completed_limit: Optional[int]) -> Tuple[int, int]:
+        """Clamp the active and completed page sizes"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if completed_limit is None:
+            completed_limit = _config.HAND_RAISE_COMPLETED_HISTORY_LIMIT
+        return limit, max(1, min(completed_limit, MAX_PAGE_SIZE))
 
-        hand_raises = query.all()
+    @staticmethod
+    def _page_statements(
+        queue_uuid: uuid.UUID,
+        include_completed: bool,
+        limit: int,
+        cursor: Optional[str],
+        completed_limit: int,
+        completed_cursor: Optional[str]
+    ) -> Tuple[StatementLambdaElement, Optional[StatementLambdaElement], StatementLambdaElement]:
+        """
+        Build the queries of a hand raise page (shared with the async services)
 
-        # Separate active and completed
-        active_raises = []
-        completed_raises = []
+        Each page query fetches one extra row, which tells whether there is
+        a next page (see _page). Lambda statements: only the queue, cursor
+        and limits are bound on each call.
 
-        for hand_raise in hand_raises:
-            hand_raise_data = HandRaiseService._hand_raise_to_dict(hand_raise)
-            if hand_raise.completed:
-                completed_raises.append(hand_raise_data)
-            else:
-                active_raises.append(hand_raise_data)
+        Returns:
+            Tuple of (active statement, completed statement or None, totals statement)
+
+        Raises:
+            ValueError: If a cursor is malformed
+        """
+        # Order by raised_at (first come, first served)
+        active = lambda_stmt(lambda: select(HandRaise).where(HandRaise.queue_id == queue_uuid, HandRaise.completed == False))
+        if cursor:
+            raised_at, hand_raise_id = HandRaiseService._decode_cursor(cursor)
+            # Row value comparisons are built outside the lambda (it binds their values)
+            after_cursor = tuple_(HandRaise.raised_at, HandRaise.id) > (raised_at, hand_raise_id)
+            active += lambda s: s.where(after_cursor)
+        active_rows = limit + 1
+        active += lambda s: s.order_by(asc(HandRaise.raised_at), asc(HandRaise.id)).limit(active_rows)
+
+        completed = None
+        if include_completed:
+            completed = lambda_stmt(lambda: select(HandRaise).where(HandRaise.queue_id == queue_uuid, HandRaise.completed == True))
+            if completed_cursor:
+                completed_at, hand_raise_id = HandRaiseService._decode_cursor(completed_cursor)
+                before_cursor = tuple_(HandRaise.completed_at, HandRaise.id) < (completed_at, hand_raise_id)
+                completed += lambda s: s.where(before_cursor)
+            completed_rows = completed_limit + 1
+            completed += lambda s: s.order_by(desc(HandRaise.completed_at), desc(HandRaise.id)).limit(completed_rows)
+
+        totals = lambda_stmt(lambda: select(
+            Queue.active_hand_raise_count,
+            Queue.completed_hand_raise_count
+        ).where(Queue.id == queue_uuid))
+
+        return active, completed, totals
+
+    @staticmethod
+    def _page_to_dict(active: List[HandRaise], completed: List[HandRaise], limit: int, completed_limit: int,
+                      totals: Tuple[int, int]) -> Dict[str, Any]:
+        """Serialize the rows loaded with _page_statements"""
+        active, next_cursor = HandRaiseService._page(list(active), limit, "raised_at")
+        completed, completed_next_cursor = HandRaiseService._page(list(completed), completed_limit, "completed_at")
+        total_active, total_completed = totals
 
         return {
-            "active_hand_raises": active_raises,
-            "completed_hand_raises": completed_raises,
-            "total_active": len(active_raises),
-            "total_completed": len(completed_raises)
+            "active_hand_raises": [HandRaiseService._hand_raise_to_dict(hand_raise) for hand_raise in active],
+            "completed_hand_raises": [HandRaiseService._hand_raise_to_dict(hand_raise) for hand_raise in completed],
+            "total_active": total_active,
+            "total_completed": total_completed,
+            "next_cursor": next_cursor,
+            "completed_next_cursor": completed_next_cursor
         }
 
     @staticmethod
@@ -162,22 +311,11 @@ class HandRaiseService:
         try:
             queue_uuid = uuid.UUID(queue_id)
             hand_raise_uuid = uuid.UUID(hand_raise_id)
-            secret_uuid = uuid.UUID(host_secret)
         except ValueError:
             return None
 
         # Verify host access
-        queue = db.session.query(Queue).filter_by(
-            id=queue_uuid,
-            host_secret=secret_uuid
-        ).first()
-
-        if not queue:
-            return None
-
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            HandRaiseService._delete_expired_queue(queue)
+        if not QueueService.verify_host_access(queue_id, host_secret):
             return None
 
         # Get hand raise
@@ -192,6 +330,7 @@ class HandRaiseService:
         # Update allowed fields
         allowed_fields = {"completed"}
         updated = False
+        was_completed = hand_raise.completed
 
         for field, value in updates.items():
             if field in allowed_fields:
@@ -208,13 +347,30 @@ class HandRaiseService:
 
         if updated:
             try:
-                db.session.commit()
+                if hand_raise.completed != was_completed:
+                    moved = 1 if hand_raise.completed else -1
+                    HandRaiseService._bump_counts(queue_uuid, active=-moved, completed=moved)
+                commit()
+                if hand_raise.completed != was_completed:
+                    delta = -1 if hand_raise.completed else 1
+                    on_commit(lambda: system_stats.hand_raise_changed(str(queue_uuid), delta))
+                    if hand_raise.completed:
+                        hand_raise_index.remove(queue_uuid, hand_raise.user_token)
+                    else:
+                        hand_raise_index.add(queue_uuid, hand_raise.id, hand_raise.user_token, hand_raise.raised_at)
+                    HandRaiseService._index_changed(queue_uuid)
 
                 hand_raise_data = HandRaiseService._hand_raise_to_dict(hand_raise)
 
                 # Broadcast real-time update
                 EventService.broadcast_hand_raise_updated(queue_id, hand_raise_data)
 
+                if hand_raise.completed != was_completed:
+                    HandRaiseService._push_positions(
+                        queue_id, queue_uuid, hand_raise.id, hand_raise.user_token, hand_raise.raised_at,
+                        is_active=not hand_raise.completed
+                    )
+
                 return hand_raise_data
 
             except IntegrityError:
@@ -224,10 +380,77 @@ class HandRaiseService:
         return HandRaiseService._hand_raise_to_dict(hand_raise)
 
     @staticmethod
+    def advance_hand_raises(queue_id: str, host_secret: str, count: int = 1) -> Optional[List[Dict[str, Any]]]:
+        """
+        Complete the next speakers in raise order (host only)
+
+        Args:
+            queue_id: Queue UUID
+            host_secret: Host authentication secret
+            count: Number of active raises to complete
+
+        Returns:
+            Completed hand raises in raise order, or None if unauthorized/not found
+        """
+        if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_BATCH_SIZE:
+            raise ValueError(f"count must be an integer between 1 and {MAX_BATCH_SIZE}")
+
+        # Verify host access
+        if not QueueService.verify_host_access(queue_id, host_secret):
+            return None
+
+        queue_uuid = uuid.UUID(queue_id)
+        table = HandRaise.__table__
+
+        # SKIP LOCKED (PostgreSQL only) lets concurrent advances take different speakers
+        next_raises = select(table.c.id).where(
+            table.c.queue_id == queue_uuid,
+            table.c.completed == False
+        ).order_by(table.c.raised_at, table.c.id).limit(count).with_for_update(skip_locked=True)
+
+        return HandRaiseService._complete_hand_raises(queue_id, queue_uuid, table.c.id.in_(next_raises))
+
+    @staticmethod
+    def complete_hand_raises(queue_id: str, host_secret: str, hand_raise_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Complete several hand raises at once (host only)
+
+        Raises that are already completed or lowered are skipped.
+
+        Args:
+            queue_id: Queue UUID
+            host_secret: Host authentication secret
+            hand_raise_ids: HandRaise UUIDs
+
+        Returns:
+            Completed hand raises in raise order, or None if unauthorized/not found
+        """
+        if not isinstance(hand_raise_ids, list) or not 1 <= len(hand_raise_ids) <= MAX_BATCH_SIZE:
+            raise ValueError(f"ids must be a list of 1-{MAX_BATCH_SIZE} hand raise ids")
+
+        try:
+            hand_raise_uuids = [uuid.UUID(str(hand_raise_id)) for hand_raise_id in hand_raise_ids]
+        except ValueError:
+            raise ValueError("Invalid hand raise id")
+
+        # Verify host access
+        if not QueueService.verify_host_access(queue_id, host_secret):
+            return None
+
+        queue_uuid = uuid.UUID(queue_id)
+        return HandRaiseService._complete_hand_raises(
+            queue_id, queue_uuid, HandRaise.__table__.c.id.in_(hand_raise_uuids)
+        )
+
+    @staticmethod
+    @read_only
     def get_user_position(queue_id: str, user_token: str) -> Optional[int]:
         """
         Get the position of a user in the hand raise queue
 
+        Answered from the in-memory index; the database is only read to
+        (re)build the index of a queue.
+
         Args:
             queue_id: Queue UUID
             user_token: User's token
@@ -240,24 +463,245 @@ class HandRaiseService:
         except ValueError:
             return None
 
-        # Get user's hand raise
-        user_raise = db.session.query(HandRaise).filter_by(
-            queue_id=queue_uuid,
-            user_token=user_token,
-            completed=False
-        ).first()
+        return HandRaiseService._indexed_position(queue_uuid, user_token)
+
+    @staticmethod
+    @read_only
+    def get_user_position_status(queue_id: str, user_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's position along with whether their hand is raised
+
+        Args:
+            queue_id: Queue UUID
+            user_token: User's token
+
+        Returns:
+            Dict with position and has_raised_hand, or None if queue not found
+        """
+        try:
+            queue_uuid = uuid.UUID(queue_id)
+        except ValueError:
+            return None
 
-        if not user_raise:
+        if not QueueService.get_active_queue_metadata(queue_uuid):
             return None
 
-        # Count how many hand raises came before this one
-        earlier_raises = db.session.query(HandRaise).filter(
-            HandRaise.queue_id == queue_uuid,
-            HandRaise.completed == False,
-            HandRaise.raised_at < user_raise.raised_at
-        ).count()
+        position = HandRaiseService._indexed_position(queue_uuid, user_token)
+        return {
+            "position": position,
+            "has_raised_hand": position is not None
+        }
 
-        return earlier_raises + 1  # 1-based position
+    @staticmethod
+    def _load_index(queue_uuid: uuid.UUID):
+        """Index a queue's active raises so positions are answered from memory"""
+        active_raises = db.session.execute(lambda_stmt(
+            lambda: select(
+                HandRaise.id,
+                HandRaise.user_token,
+                HandRaise.raised_at
+            ).where(
+                HandRaise.queue_id == queue_uuid,
+                HandRaise.completed == False
+            )
+        )).all()
+        hand_raise_index.load(queue_uuid, active_raises)
+        # Inside a unit of work the rows may include uncommitted changes
+        HandRaiseService._index_changed(queue_uuid)
+
+    @staticmethod
+    def _index_changed(queue_uuid: uuid.UUID):
+        """
+        Drop a queue's index if the current unit of work rolls back
+
+        The index is updated ahead of the commit because the position
+        pushes of the same request read it back.
+        """
+        on_rollback(lambda: hand_raise_index.invalidate(queue_uuid))
+
+    @staticmethod
+    def _indexed_position(queue_uuid: uuid.UUID, user_token: str) -> Optional[int]:
+        """Look up a position, indexing the queue first if needed"""
+        user_token = UserService.normalize_user_token(user_token)
+        if user_token is None:
+            return None
+
+        position = hand_raise_index.position(queue_uuid, user_token)
+        if position is hand_raise_index.MISSING:
+            HandRaiseService._load_index(queue_uuid)
+            position = hand_raise_index.position(queue_uuid, user_token)
+
+        return None if position is hand_raise_index.MISSING else position
+
+    @staticmethod
+    def _complete_hand_raises(queue_id: str, queue_uuid: uuid.UUID, condition) -> List[Dict[str, Any]]:
+        """Complete the active raises matching condition in one UPDATE ... RETURNING"""
+        table = HandRaise.__table__
+
+        try:
+            completed = db.session.execute(
+                table.update().where(
+                    table.c.queue_id == queue_uuid,
+                    table.c.completed == False,
+                    condition
+                ).values(
+                    completed=True,
+                    completed_at=datetime.utcnow()
+                ).returning(*table.c)
+            ).all()
+            if completed:
+                HandRaiseService._bump_counts(queue_uuid, active=-len(completed), completed=len(completed))
+            commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError("Failed to complete hand raises")
+
+        if not completed:
+            return []
+
+        # RETURNING order is unspecified
+        completed.sort(key=lambda row: (row.raised_at, str(row.id)))
+
+        on_commit(lambda: system_stats.hand_raise_changed(str(queue_uuid), -len(completed)))
+        for row in completed:
+            hand_raise_index.remove(queue_uuid, row.user_token)
+        HandRaiseService._index_changed(queue_uuid)
+
+        hand_raises_data = [HandRaiseService._hand_raise_to_dict(row) for row in completed]
+
+        # One broadcast for the whole batch
+        EventService.broadcast_hand_raises_completed(queue_id, hand_raises_data)
+
+        # Old positions of the completed raises (each one's raises ahead, plus
+        # the completed raises before it)
+        positions = []
+        for completed_before, row in enumerate(completed):
+            ahead = HandRaiseService._raises_ahead(queue_uuid, row.id, row.raised_at)
+            if ahead is None:
+                positions = []
+                break
+            positions.append(ahead + completed_before + 1)
+
+        for row in completed:
+            EventService.send_position_changed(queue_id, row.user_token, None)
+
+        # One shift per run of consecutive positions, the last run first so
+        # each shift's positions are still current when clients apply it
+        runs = []
+        for position in positions:
+            if runs and runs[-1][0] + runs[-1][1] == position:
+                runs[-1][1] += 1
+            else:
+                runs.append([position, 1])
+        for first_position, length in reversed(runs):
+            EventService.broadcast_positions_shifted(queue_id, first_position + length, -length)
+
+        return hand_raises_data
+
+    @staticmethod
+    def _raises_ahead(queue_uuid: uuid.UUID, hand_raise_id: uuid.UUID, raised_at: datetime) -> Optional[int]:
+        """Count the active raises ahead of one, indexing the queue first if needed"""
+        ahead = hand_raise_index.count_ahead(queue_uuid, hand_raise_id, raised_at)
+        if ahead is hand_raise_index.MISSING:
+            HandRaiseService._load_index(queue_uuid)
+            ahead = hand_raise_index.count_ahead(queue_uuid, hand_raise_id, raised_at)
+
+        return None if ahead is hand_raise_index.MISSING else ahead
+
+    @staticmethod
+    def _push_positions(queue_id: str, queue_uuid: uuid.UUID, hand_raise_id: uuid.UUID, user_token: str, raised_at: datetime, is_active: bool):
+        """
+        Push the position of a raise that was lowered, completed or reopened
+        to its owner, and one positions_shifted broadcast for everyone behind it
+        """
+        ahead = HandRaiseService._raises_ahead(queue_uuid, hand_raise_id, raised_at)
+        if ahead is None:
+            return
+
+        position = ahead + 1
+        if is_active:
+            # Shifted first: the owner's client has no position to move yet
+            EventService.broadcast_positions_shifted(queue_id, position, 1)
+            EventService.send_position_changed(queue_id, user_token, position)
+        else:
+            EventService.send_position_changed(queue_id, user_token, None)
+            EventService.broadcast_positions_shifted(queue_id, position + 1, -1)
+
+    @staticmethod
+    def recount_hand_raises():
+        """Rebuild every queue's hand raise counters from the hand_raises table"""
+        def count(completed: bool):
+            return select(func.count(HandRaise.id)).where(
+                HandRaise.queue_id == Queue.id,
+                HandRaise.completed == completed
+            ).scalar_subquery()
+
+        db.session.execute(
+            update(Queue).values(
+                active_hand_raise_count=count(False),
+                completed_hand_raise_count=count(True)
+            )
+        )
+        db.session.commit()
+
+    @staticmethod
+    def remove_duplicate_active_hand_raises() -> int:
+        """
+        Delete all but the earliest active hand raise of each user in a queue
+
+        Tables filled before the uq_active_hand_raise index existed may hold
+        several active raises per user; they must go before it is created.
+
+        Returns:
+            Number of hand raises deleted
+        """
+        earlier = aliased(HandRaise)
+        has_earlier_raise = exists().where(
+            earlier.queue_id == HandRaise.queue_id,
+            earlier.user_token == HandRaise.user_token,
+            earlier.completed == False,
+            tuple_(earlier.raised_at, earlier.id) < tuple_(HandRaise.raised_at, HandRaise.id)
+        )
+
+        deleted = db.session.execute(
+            delete(HandRaise).where(HandRaise.completed == False, has_earlier_raise)
+        ).rowcount
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def _bump_counts(queue_uuid: uuid.UUID, active: int = 0, completed: int = 0):
+        """Adjust the queue's hand raise counters (committed with the caller's transaction)"""
+        db.session.execute(lambda_stmt(
+            lambda: update(Queue).where(Queue.id == queue_uuid).values(
+                active_hand_raise_count=Queue.active_hand_raise_count + active,
+                completed_hand_raise_count=Queue.completed_hand_raise_count + completed
+            )
+        ))
+
+    @staticmethod
+    def _page(hand_raises: List[HandRaise], limit: int, sort_field: str) -> Tuple[List[HandRaise], Optional[str]]:
+        """Trim a limit + 1 result to the page and build the cursor of the next one"""
+        if len(hand_raises) <= limit:
+            return hand_raises, None
+
+        hand_raises = hand_raises[:limit]
+        last = hand_raises[-1]
+        return hand_raises, HandRaiseService._encode_cursor(getattr(last, sort_field), last.id)
+
+    @staticmethod
+    def _encode_cursor(sort_value: datetime, hand_raise_id: uuid.UUID) -> str:
+        raw = f"{sort_value.isoformat()}|{hand_raise_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            sort_value, hand_raise_id = raw.split("|")
+            return datetime.fromisoformat(sort_value), uuid.UUID(hand_raise_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
 
     @staticmethod
     def _hand_raise_to_dict(hand_raise: HandRaise) -> Dict[str, Any]:
@@ -268,25 +712,13 @@ class HandRaiseService:
             hand_raise: HandRaise model instance
 
         Returns:
-            Dictionary representation
+            Dictionary representation (without the user token, which is a credential)
         """
         return {
             "id": str(hand_raise.id),
             "queue_id": str(hand_raise.queue_id),
-            "user_token": hand_raise.user_token,
             "user_name": hand_raise.user_name,
             "raised_at": hand_raise.raised_at.isoformat() + "Z",
             "completed": hand_raise.completed,
             "completed_at": hand_raise.completed_at.isoformat() + "Z" if hand_raise.completed_at else None
-        }
-
-    @staticmethod
-    def _delete_expired_queue(queue: Queue) -> None:
-        """
-        Delete an expired queue
-
-        Args:
-            queue: Queue model instance to delete
-        """
-        db.session.delete(queue)
-        db.session.commit()
\ No newline at end of file
+        }
\ No newline at end of file
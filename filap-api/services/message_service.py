@@ -1,12 +1,25 @@
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import desc, asc
-from database import db
+from sqlalchemy import Row, desc, asc, func, lambda_stmt, select, update
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm.attributes import set_committed_value
+from database import db, commit, has_pending_writes, on_commit, read_only
 from models.models import Queue, Message, MessageUpvote
-from services.events import EventService
+from services.events import EventBatch, EventService
+from services.queue_service import QueueService
+from services.queue_cache import QueueMetadata
+from services.user_service import UserService
+from services.fragment_cache import message_fragment_cache
+from services.stats import system_stats
+from services.group_commit import sqlite_writer
+import json
 import uuid
 
+# Built once and executed with a dict of values (compiled once per process)
+_insert_vote = MessageUpvote.__table__.insert()
+
 class MessageService:
     """Service layer for message management operations"""
     
@@ -31,15 +44,14 @@ class MessageService:
             return None
         
         # Check if queue exists and is not expired
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
+        queue = QueueService.get_active_queue_metadata(queue_uuid)
         
         if not queue:
             return None
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            MessageService._delete_expired_queue(queue)
-            return None
+        
+        # Reject tokens not minted for this queue (pure CPU)
+        if not UserService.validate_user_token(queue_uuid, user_token):
+            raise ValueError("Invalid user token")
         
         # Validate and sanitize inputs
         text = text.strip()
@@ -58,25 +70,29 @@ class MessageService:
             queue_id=queue_uuid,
             text=text,
             user_token=user_uuid,
-            author_name=author_name
+            author_name=author_name,
+            expires_on=queue.expires_at.date()
         )
         
         try:
             db.session.add(message)
-            db.session.commit()
+            commit()
+            on_commit(lambda: system_stats.message_created(str(queue_uuid)))
             
             message_data = MessageService._message_to_dict(message)
             
             # Broadcast real-time update
             EventService.broadcast_new_message(queue_id, message_data)
             
-            return message_data
+            # The token is the author's credential, so only the author gets it back
+            return {**message_data, "user_token": str(message.user_token)}
             
         except IntegrityError:
             db.session.rollback()
             raise ValueError("Failed to create message")
     
     @staticmethod
+    @read_only
     def get_messages(queue_id: str, user_token: Optional[str] = None, sort_by: Optional[str] = None, limit: int = 50, offset: int = 0) -> Optional[Dict[str, Any]]:
         """
         Get messages for a queue with pagination and sorting
@@ -91,22 +107,102 @@ class MessageService:
         Returns:
             Dict with messages and total count, or None if queue not found
         """
+        page = MessageService._query_messages_page(queue_id, user_token, sort_by, limit, offset)
+        
+        if page is None:
+            return None
+        
+        return MessageService._page_to_dict(*page)
+    
+    @staticmethod
+    @read_only
+    def get_messages_json(queue_id: str, user_token: Optional[str] = None, sort_by: Optional[str] = None, limit: int = 50, offset: int = 0) -> Optional[str]:
+        """
+        Get a page of messages as a serialized JSON document
+        
+        Same contract as get_messages, but each message is assembled from its
+        cached serialized fragment so hot list endpoints skip re-encoding
+        unchanged messages.
+        
+        Returns:
+            JSON string with messages and total count, or None if queue not found
+        """
+        page = MessageService._query_messages_page(queue_id, user_token, sort_by, limit, offset)
+        
+        if page is None:
+            return None
+        
+        return MessageService._page_to_json(*page)
+    
+    @staticmethod
+    def _page_to_dict(rows: List[Tuple[Message, bool]], total_count: int, limit: int, offset: int, sort_by: str) -> Dict[str, Any]:
+        """Serialize a page loaded by _query_messages_page"""
+        return {
+            "messages": [MessageService._message_to_dict(message, has_voted) for message, has_voted in rows],
+            "total_count": total_count,
+            "limit": limit,
+            "offset": offset,
+            "sort_by": sort_by
+        }
+    
+    @staticmethod
+    def _page_to_json(rows: List[Tuple[Message, bool]], total_count: int, limit: int, offset: int, sort_by: str) -> str:
+        """Serialize a page loaded by _query_messages_page from cached message fragments"""
+        messages_json = ",".join(
+            message_fragment_cache.render(
+                MessageService._message_fragment(message),
+                message.vote_count,
+                has_voted
+            )
+            for message, has_voted in rows
+        )
+        
+        return '{"limit":%d,"messages":[%s],"offset":%d,"sort_by":%s,"total_count":%d}' % (
+            limit,
+            messages_json,
+            offset,
+            json.dumps(sort_by),
+            total_count
+        )
+    
+    @staticmethod
+    def _query_messages_page(queue_id: str, user_token: Optional[str], sort_by: Optional[str], limit: int, offset: int) -> Optional[Tuple[List[Tuple[Message, bool]], int, int, int, str]]:
+        """
+        Load one page of messages with the user's vote status
+        
+        Returns:
+            Tuple of ([(message, has_user_voted)], total_count, limit, offset, sort_by)
+            or None if queue not found/expired
+        """
         try:
             queue_uuid = uuid.UUID(queue_id)
         except ValueError:
             return None
         
         # Check if queue exists and is not expired
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
+        queue = QueueService.get_active_queue_metadata(queue_uuid)
         
         if not queue:
             return None
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            MessageService._delete_expired_queue(queue)
-            return None
         
+        user_token, sort_by, limit, offset = MessageService._page_params(queue, user_token, sort_by, limit, offset)
+        page_statement, count_statement = MessageService._page_statements(queue_uuid, user_token, sort_by, limit, offset)
+        
+        # Get total count before pagination
+        total_count = db.session.scalar(count_statement)
+        
+        rows = MessageService._page_rows(db.session.execute(page_statement).all(), user_token)
+        
+        return rows, total_count, limit, offset, sort_by
+    
+    @staticmethod
+    def _page_params(queue: QueueMetadata, user_token: Optional[str], sort_by: Optional[str], limit: int, offset: int) -> Tuple[Optional[str], str, int, int]:
+        """
+        Validate the parameters of a messages page
+        
+        Returns:
+            Tuple of (user_token, sort_by, limit, offset)
+        """
         # Validate pagination parameters
         limit = max(1, min(limit, 100))  # Between 1 and 100
         offset = max(0, offset)
@@ -115,49 +211,56 @@ class MessageService:
         if sort_by not in ["votes", "newest"]:
             sort_by = queue.default_sort_order
         
+        # Tokens that are not UUIDs cannot have voted
+        user_token = UserService.normalize_user_token(user_token) if user_token else None
+        
+        return user_token, sort_by, limit, offset
+    
+    @staticmethod
+    def _page_statements(queue_uuid: uuid.UUID, user_token: Optional[str], sort_by: str, limit: int, offset: int) -> Tuple[StatementLambdaElement, StatementLambdaElement]:
+        """
+        Build the queries of a messages page (shared with the async services)
+        
+        Lambda statements: each variant is constructed and compiled once per
+        process, later calls only bind the queue, token, limit and offset.
+        
+        Returns:
+            Tuple of (page statement, total count statement)
+        """
         # Build query with LEFT JOIN to get user vote status
         if user_token:
             # Query with vote status when user token is provided
-            query = db.session.query(
+            statement = lambda_stmt(lambda: select(
                 Message,
                 MessageUpvote.message_id.isnot(None).label('has_user_voted')
             ).outerjoin(
                 MessageUpvote,
                 (MessageUpvote.message_id == Message.id) & (MessageUpvote.user_token == user_token)
-            ).filter(Message.queue_id == queue_uuid)
+            ).where(Message.queue_id == queue_uuid))
         else:
             # Query without vote status when no user token
-            query = db.session.query(Message).filter_by(queue_id=queue_uuid)
+            statement = lambda_stmt(lambda: select(Message).where(Message.queue_id == queue_uuid))
         
         # Apply sorting
         if sort_by == "votes":
-            query = query.order_by(desc(Message.vote_count), desc(Message.created_at))
+            statement += lambda s: s.order_by(desc(Message.vote_count), desc(Message.created_at))
         else:  # newest
-            query = query.order_by(desc(Message.created_at))
+            statement += lambda s: s.order_by(desc(Message.created_at))
         
-        # Get total count before pagination
-        total_count = db.session.query(Message).filter_by(queue_id=queue_uuid).count()
+        statement += lambda s: s.offset(offset).limit(limit)
         
-        # Apply pagination and execute
-        results = query.offset(offset).limit(limit).all()
+        count_statement = lambda_stmt(
+            lambda: select(func.count()).select_from(Message).where(Message.queue_id == queue_uuid)
+        )
         
-        # Process results based on query type
+        return statement, count_statement
+    
+    @staticmethod
+    def _page_rows(results: List[Row], user_token: Optional[str]) -> List[Tuple[Message, bool]]:
+        """Normalize page results to (message, has_user_voted) pairs"""
         if user_token:
-            # Extract message and vote status from tuple results
-            messages_data = []
-            for message, has_voted in results:
-                messages_data.append(MessageService._message_to_dict(message, bool(has_voted)))
-        else:
-            # Simple message results without vote status
-            messages_data = [MessageService._message_to_dict(msg) for msg in results]
-        
-        return {
-            "messages": messages_data,
-            "total_count": total_count,
-            "limit": limit,
-            "offset": offset,
-            "sort_by": sort_by
-        }
+            return [(message, bool(has_voted)) for message, has_voted in results]
+        return [(message, False) for message, in results]
     
     @staticmethod
     def update_message(queue_id: str, message_id: str, auth_token: str, updates: Dict[str, Any], is_host: bool = True) -> Optional[Dict[str, Any]]:
@@ -183,17 +286,7 @@ class MessageService:
         
         if is_host:
             # Verify host access
-            queue = db.session.query(Queue).filter_by(
-                id=queue_uuid,
-                host_secret=token_uuid
-            ).first()
-            
-            if not queue:
-                return None
-                
-            # Check if queue has expired
-            if queue.expires_at < datetime.utcnow():
-                MessageService._delete_expired_queue(queue)
+            if not QueueService.verify_host_access(queue_id, auth_token):
                 return None
             
             # Get message
@@ -202,6 +295,9 @@ class MessageService:
                 queue_id=queue_uuid
             ).first()
         else:
+            if not UserService.validate_user_token(queue_uuid, auth_token):
+                return None
+            
             # Verify author access - check both message and queue existence/expiry
             message = db.session.query(Message).join(Queue).filter(
                 Message.id == message_uuid,
@@ -216,6 +312,7 @@ class MessageService:
         # Update allowed fields
         allowed_fields = {"is_read"}
         updated = False
+        was_read = message.is_read
         
         for field, value in updates.items():
             if field in allowed_fields:
@@ -224,13 +321,20 @@ class MessageService:
         
         if updated:
             try:
-                db.session.commit()
+                commit()
                 
                 message_data = MessageService._message_to_dict(message)
                 
                 # Broadcast real-time update
                 EventService.broadcast_message_updated(queue_id, message_data)
                 
+                # Let the author know privately when the host acted on their message
+                if is_host and message.is_read != was_read:
+                    EventService.send_message_moderated(
+                        queue_id, str(message.user_token), message_id,
+                        "read" if message.is_read else "unread"
+                    )
+                
                 return message_data
                 
             except IntegrityError:
@@ -255,22 +359,11 @@ class MessageService:
         try:
             queue_uuid = uuid.UUID(queue_id)
             message_uuid = uuid.UUID(message_id)
-            secret_uuid = uuid.UUID(host_secret)
         except ValueError:
             return False
         
         # Verify host access
-        queue = db.session.query(Queue).filter_by(
-            id=queue_uuid,
-            host_secret=secret_uuid
-        ).first()
-        
-        if not queue:
-            return False
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            MessageService._delete_expired_queue(queue)
+        if not QueueService.verify_host_access(queue_id, host_secret):
             return False
         
         # Get message
@@ -284,10 +377,15 @@ class MessageService:
         
         try:
             db.session.delete(message)
-            db.session.commit()
+            commit()
+            
+            vote_count = message.vote_count
+            on_commit(lambda: message_fragment_cache.invalidate(str(message_uuid)))
+            on_commit(lambda: system_stats.message_deleted(str(queue_uuid), vote_count))
             
             # Broadcast real-time update
             EventService.broadcast_message_deleted(queue_id, message_id)
+            EventService.send_message_moderated(queue_id, str(message.user_token), message_id, "deleted")
             
             return True
             
@@ -296,13 +394,37 @@ class MessageService:
             return False
     
     @staticmethod
-    def upvote_message(message_id: str, user_token: str) -> Optional[Dict[str, Any]]:
+    def get_message_queue_id(message_id: str) -> Optional[str]:
+        """
+        Get the queue a message belongs to
+        
+        Args:
+            message_id: Message UUID
+            
+        Returns:
+            Queue UUID string or None if the message does not exist
+        """
+        try:
+            message_uuid = uuid.UUID(message_id)
+        except ValueError:
+            return None
+        
+        queue_id = db.session.scalar(lambda_stmt(
+            lambda: select(Message.queue_id).where(Message.id == message_uuid)
+        ))
+        return str(queue_id) if queue_id else None
+    
+    @staticmethod
+    def upvote_message(message_id: str, user_token: str, group_commit: bool = True) -> Optional[Dict[str, Any]]:
         """
         Add an upvote to a message
         
         Args:
             message_id: Message UUID
             user_token: User's token identifier
+            group_commit: Whether the vote may be committed by the SQLite
+                group-commit writer, apart from the request (False when
+                something must commit with it, e.g. an Idempotency-Key result)
             
         Returns:
             Updated message data or None if not found/already voted
@@ -321,70 +443,129 @@ class MessageService:
         if not message:
             return None
         
-        # Check if user already voted
-        existing_vote = db.session.query(MessageUpvote).filter_by(
-            message_id=message_uuid,
-            user_token=user_token
-        ).first()
+        # Reject tokens not minted for the message's queue (pure CPU)
+        if not UserService.validate_user_token(message.queue_id, user_token):
+            raise ValueError("Invalid user token")
+        user_token = UserService.normalize_user_token(user_token)
         
-        if existing_vote:
-            # User already voted - remove the vote (toggle off)
-            try:
-                db.session.delete(existing_vote)
-                
-                # Atomically decrement vote count
-                db.session.query(Message).filter_by(id=message_uuid).update({
-                    Message.vote_count: Message.vote_count - 1
-                })
-                
-                db.session.commit()
-                
-                # Refresh message to get updated vote count
-                db.session.refresh(message)
-                
-                # User just removed their vote, so has_user_voted = False
-                message_data = MessageService._message_to_dict(message, False)
-                
-                # Broadcast real-time update
-                EventService.broadcast_message_updated(str(message.queue_id), message_data)
-                
-                return message_data
-                
-            except IntegrityError:
-                db.session.rollback()
-                return None
-        
-        # Create upvote
-        upvote = MessageUpvote(
-            message_id=message_uuid,
-            user_token=user_token
-        )
+        # SQLite: queue the vote so concurrent votes share one commit. Not
+        # while the session holds writes: their SQLite lock would block the
+        # writer until the busy timeout (the request waits on the writer).
+        if group_commit and sqlite_writer.enabled and not has_pending_writes():
+            return MessageService._group_commit_vote(message, message_id, user_token)
         
         try:
-            db.session.add(upvote)
-            
-            # Atomically increment vote count
-            db.session.query(Message).filter_by(id=message_uuid).update({
-                Message.vote_count: Message.vote_count + 1
-            })
-            
-            db.session.commit()
-            
-            # Refresh message to get updated vote count
-            db.session.refresh(message)
-            
-            # User just added their vote, so has_user_voted = True
-            message_data = MessageService._message_to_dict(message, True)
-            
-            # Broadcast real-time update
-            EventService.broadcast_message_updated(str(message.queue_id), message_data)
-            
-            return message_data
-            
+            has_user_voted, vote_count = MessageService._toggle_vote(
+                db.session.connection(), message_uuid, user_token, message.expires_on
+            )
+            commit()
         except IntegrityError:
             # Race condition - user voted between check and insert
             db.session.rollback()
             return None
+        
+        vote_delta = 1 if has_user_voted else -1
+        on_commit(lambda: system_stats.vote_changed(str(message.queue_id), vote_delta))
+        set_committed_value(message, 'vote_count', vote_count)
+        
+        message_data = MessageService._message_to_dict(message, has_user_voted)
+        
+        # Broadcast real-time update
+        EventService.broadcast_message_updated(str(message.queue_id), message_data)
+        EventService.send_vote_changed(str(message.queue_id), user_token, message_id, has_user_voted, vote_count)
+        
+        return message_data
+    
+    @staticmethod
+    def _group_commit_vote(message: Message, message_id: str, user_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Toggle a vote on the SQLite group-commit writer
+
+        The writer commits the vote on its own connection, outside the
+        request's unit of work: it stays committed even if the request
+        later rolls back. Its events are stored in the outbox in the same
+        transaction, so they are never lost or sent without the vote.
+        """
+        queue_id = str(message.queue_id)
+        message_uuid = message.id
+        expires_on = message.expires_on
+        # Built here: the job runs on the writer's thread
+        message_data = MessageService._message_to_dict(message)
+        
+        def vote(connection: Connection) -> Tuple[Dict[str, Any], EventBatch]:
+            has_user_voted, vote_count = MessageService._toggle_vote(connection, message_uuid, user_token, expires_on)
+            voted_data = {**message_data, "vote_count": vote_count, "has_user_voted": has_user_voted}
+            events = EventBatch(connection)
+            EventService.broadcast_message_updated(queue_id, voted_data, batch=events)
+            EventService.send_vote_changed(queue_id, user_token, message_id, has_user_voted, vote_count, batch=events)
+            return voted_data, events
+        
+        try:
+            voted_data, events = sqlite_writer.submit(vote)
+        except IntegrityError:
+            # Race condition - user voted between check and insert
+            return None
+        
+        # Already committed
+        system_stats.vote_changed(queue_id, 1 if voted_data["has_user_voted"] else -1)
+        set_committed_value(message, 'vote_count', voted_data["vote_count"])
+        events.deliver()
+        
+        return voted_data
+    
+    @staticmethod
+    def _toggle_vote(connection: Connection, message_uuid: uuid.UUID, user_token: str, expires_on) -> Tuple[bool, int]:
+        """
+        Add the user's vote, or remove it if they already voted
+        
+        Returns:
+            (has_user_voted, vote_count) after the toggle
+        """
+        upvotes = MessageUpvote.__table__
+        messages = Message.__table__
+        
+        removed = connection.execute(lambda_stmt(
+            lambda: upvotes.delete()
+            .where(upvotes.c.message_id == message_uuid, upvotes.c.user_token == user_token)
+            .returning(upvotes.c.id)
+        )).first()
+        
+        if removed is None:
+            connection.execute(_insert_vote, {
+                "id": uuid.uuid4(),
+                "message_id": message_uuid,
+                "user_token": user_token,
+                "created_at": datetime.utcnow(),
+                "expires_on": expires_on
+            })
+        
+        # Atomically adjust the vote count (a vote is not an edit,
+        # so updated_at is kept and cached fragments stay valid)
+        delta = 1 if removed is None else -1
+        vote_count = connection.execute(lambda_stmt(
+            lambda: messages.update()
+            .where(messages.c.id == message_uuid)
+            .values(
+                vote_count=messages.c.vote_count + delta,
+                updated_at=messages.c.updated_at
+            )
+            .returning(messages.c.vote_count)
+        )).scalar_one()
+        
+        return removed is None, vote_count
+    
+    @staticmethod
+    def recount_votes():
+        """Rebuild every message's vote_count from the message_upvotes table"""
+        db.session.execute(
+            update(Message).values(
+                vote_count=select(func.count(MessageUpvote.id)).where(
+                    MessageUpvote.message_id == Message.id
+                ).scalar_subquery(),
+                updated_at=Message.updated_at
+            )
+        )
+        db.session.commit()
     
     @staticmethod
     def _message_to_dict(message: Message, has_user_voted: bool = False) -> Dict[str, Any]:
@@ -396,14 +577,13 @@ class MessageService:
             has_user_voted: Whether the user has voted for this message
             
         Returns:
-            Dictionary representation
+            Dictionary representation (without the user token, which is a credential)
         """
         return {
             "id": str(message.id),
             "queue_id": str(message.queue_id),
             "text": message.text,
             "author_name": message.author_name,
-            "user_token": str(message.user_token),
             "vote_count": message.vote_count,
             "is_read": message.is_read,
             "has_user_voted": has_user_voted,
@@ -412,12 +592,18 @@ class MessageService:
         }
     
     @staticmethod
-    def _delete_expired_queue(queue: Queue) -> None:
+    def _message_fragment(message: Message) -> str:
         """
-        Delete an expired queue
+        Get the cached static JSON fragment for a message
         
         Args:
-            queue: Queue model instance to delete
+            message: Message model instance
+            
+        Returns:
+            Serialized fragment without the vote_count/has_user_voted fields
         """
-        db.session.delete(queue)
-        db.session.commit()
\ No newline at end of file
+        return message_fragment_cache.get_or_build(
+            str(message.id),
+            message.updated_at.isoformat() + "Z",
+            lambda: MessageService._message_to_dict(message)
+        )
\ No newline at end of file
@@ -0,0 +1,266 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.engine import Connection, Engine
+from config import get_config
+from database import db, in_unit_of_work
+from models.models import EventOutbox
+
+logger = logging.getLogger(__name__)
+
+# Identifies this worker's rows in the outbox (it delivers those to its own clients directly)
+WORKER_ID = str(uuid.uuid4())
+
+# Most missing ids remembered per poll (see OutboxRelay.poll)
+MAX_TRACKED_GAPS = 1000
+
+_config = get_config()
+
+def record_event(queue_id: str, recipient: Optional[str], event_type: str, data: Dict[str, Any]) -> Optional[int]:
+    """
+    Store an event in the outbox, in the transaction of the current unit of work
+
+    Only write requests run in a unit of work; other callers have already
+    committed, so their events are delivered directly without a row.
+
+    Args:
+        queue_id: Queue UUID
+        recipient: Private channel, or None for every connection of the queue
+        event_type: SSE event name
+        data: Event payload
+
+    Returns:
+        Event id (the SSE id), or None if the event was not stored
+    """
+    if not _config.EVENT_OUTBOX_ENABLED or not in_unit_of_work():
+        return None
+
+    try:
+        queue_uuid = uuid.UUID(queue_id)
+    except ValueError:
+        return None
+
+    event = EventOutbox(
+        queue_id=queue_uuid,
+        recipient=recipient,
+        event_type=event_type,
+        data=json.dumps(data),
+        origin=WORKER_ID
+    )
+    db.session.add(event)
+    # Assigns the id; the row commits with the rest of the request
+    db.session.flush()
+    return event.id
+
+def store_event(connection: Connection, queue_id: str, recipient: Optional[str], event_type: str, data: Dict[str, Any]) -> Optional[int]:
+    """
+    Store an event on the connection of a write committed outside the unit of work
+
+    Used by writes the SQLite group-commit writer commits on its own
+    connection: their events commit with them, not with the request.
+
+    Args:
+        connection: Connection the write runs on
+        queue_id: Queue UUID
+        recipient: Private channel, or None for every connection of the queue
+        event_type: SSE event name
+        data: Event payload
+
+    Returns:
+        Event id (the SSE id), or None if the event was not stored
+    """
+    if not _config.EVENT_OUTBOX_ENABLED:
+        return None
+
+    try:
+        queue_uuid = uuid.UUID(queue_id)
+    except ValueError:
+        return None
+
+    table = EventOutbox.__table__
+    return connection.execute(
+        table.insert().values(
+            queue_id=queue_uuid,
+            recipient=recipient,
+            event_type=event_type,
+            data=json.dumps(data),
+            origin=WORKER_ID
+        ).returning(table.c.id)
+    ).scalar_one()
+
+def replay_events(engine: Engine, queue_id: str, after_id: int, recipients: Iterable[str] = (),
+                  limit: int = 1000) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], bool]:
+    """
+    Load a queue's events after a client's Last-Event-ID
+
+    Args:
+        engine: Engine to read from (called from the SSE stream, outside the app context)
+        queue_id: Queue UUID
+        after_id: Last event id the client received
+        recipients: Private channels of the connection
+        limit: Most events returned
+
+    Returns:
+        ([(event_id, event_type, data)], complete) where complete is False if
+        events the client missed may already be pruned. Every id below the
+        oldest retained one is pruned (or never committed), so the history is
+        complete when the client has seen up to that id or nothing is retained
+    """
+    table = EventOutbox.__table__
+    recipients = list(recipients)
+    channel = table.c.recipient.is_(None)
+    if recipients:
+        channel = or_(channel, table.c.recipient.in_(recipients))
+
+    with engine.connect() as connection:
+        oldest = connection.execute(select(func.min(table.c.id))).scalar()
+        rows = connection.execute(
+            select(table.c.id, table.c.event_type, table.c.data)
+            .where(table.c.queue_id == uuid.UUID(queue_id), table.c.id > after_id, channel)
+            .order_by(table.c.id)
+            .limit(limit)
+        ).all()
+
+    events = [(row.id, row.event_type, json.loads(row.data)) for row in rows]
+    complete = (oldest is None or after_id >= oldest - 1) and len(rows) < limit
+    return events, complete
+
+class OutboxRelay:
+    """
+    Background worker that delivers other workers' outbox events to this worker's SSE clients
+
+    Reads the outbox in id order, in batches. An id can become visible
+    after a higher one (its transaction committed later), so ids skipped
+    by a batch are looked for again for gap_grace_seconds.
+    """
+
+    def __init__(self, poll_interval_seconds: float = 0.25, batch_size: int = 500, retention_seconds: float = 600,
+                 gap_grace_seconds: float = 5, prune_interval_seconds: float = 60):
+        self._interval = poll_interval_seconds
+        self._batch_size = max(1, batch_size)
+        self._retention = retention_seconds
+        self._gap_grace = gap_grace_seconds
+        self._prune_interval = prune_interval_seconds
+        # Highest id read so far (None until the first poll)
+        self._last_id: Optional[int] = None
+        # Format: {event_id: monotonic time it was first skipped}
+        self._gaps: Dict[int, float] = {}
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self, app):
+        """Start the relay once per worker process (cheap to call repeatedly)"""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._app = app
+            self._stop_event.clear()
+            # Under gunicorn's gevent worker this thread is a greenlet
+            self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the relay and wait for the current poll to finish"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def poll(self) -> int:
+        """
+        Deliver outbox rows committed since the last poll
+
+        The first poll only notes where the outbox ends: older events are
+        for Last-Event-ID replay.
+
+        Returns:
+            Number of events delivered to this worker's connections
+        """
+        from services.events import sse_manager
+
+        table = EventOutbox.__table__
+        with db.engine.connect() as connection:
+            if self._last_id is None:
+                self._last_id = connection.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+                return 0
+
+            rows = connection.execute(
+                select(table).where(table.c.id > self._last_id).order_by(table.c.id).limit(self._batch_size)
+            ).all()
+            late_rows = connection.execute(
+                select(table).where(table.c.id.in_(list(self._gaps))).order_by(table.c.id)
+            ).all() if self._gaps else []
+
+        now = time.monotonic()
+        for row in late_rows:
+            self._gaps.pop(row.id, None)
+
+        for row in rows:
+            for missing in range(self._last_id + 1, min(row.id, self._last_id + 1 + MAX_TRACKED_GAPS)):
+                self._gaps.setdefault(missing, now)
+            self._last_id = row.id
+
+        for event_id, skipped_at in list(self._gaps.items()):
+            if now - skipped_at > self._gap_grace:
+                del self._gaps[event_id]
+
+        delivered = 0
+        for row in late_rows + rows:
+            if row.origin == WORKER_ID:
+                continue
+
+            queue_id = str(row.queue_id)
+            data = json.loads(row.data)
+            if row.recipient is None:
+                sse_manager.broadcast_to_queue(queue_id, row.event_type, data, event_id=row.id)
+            else:
+                sse_manager.send_to(queue_id, row.recipient, row.event_type, data, event_id=row.id)
+            delivered += 1
+
+        return delivered
+
+    def prune(self) -> int:
+        """
+        Delete events older than the retention period
+
+        Returns:
+            Number of events deleted
+        """
+        table = EventOutbox.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=self._retention)
+        with db.engine.begin() as connection:
+            return connection.execute(delete(table).where(table.c.created_at < cutoff)).rowcount
+
+    def _run(self):
+        next_prune = time.monotonic()
+        while not self._stop_event.wait(self._interval):
+            try:
+                with self._app.app_context():
+                    self.poll()
+                    if time.monotonic() >= next_prune:
+                        next_prune = time.monotonic() + self._prune_interval
+                        self.prune()
+            except Exception as e:
+                logger.error(f"Outbox relay poll failed: {str(e)}")
+
+# Global outbox relay instance (one per worker process)
+outbox_relay = OutboxRelay(
+    poll_interval_seconds=_config.EVENT_OUTBOX_POLL_INTERVAL_MS / 1000,
+    batch_size=_config.EVENT_OUTBOX_BATCH_SIZE,
+    retention_seconds=_config.EVENT_OUTBOX_RETENTION_SECONDS
+)
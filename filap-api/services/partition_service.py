@@ -0,0 +1,194 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import Column, ForeignKeyConstraint, Index, MetaData, PrimaryKeyConstraint, Table, UniqueConstraint, text
+from database import db
+from models.models import Base
+from config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Parent tables first: children hold composite foreign keys to them
+PARTITIONED_TABLES = ("queues", "messages", "message_upvotes", "hand_raises")
+PARTITION_KEY = "expires_on"
+
+class PartitionService:
+    """Optional PostgreSQL schema range-partitioned by queue expiry day"""
+
+    # Advisory lock key so only one worker runs partition DDL at a time
+    MAINTENANCE_LOCK_ID = 0x46494C4151
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Check whether the partitioned schema is configured and supported"""
+        return get_config().PARTITIONED_SCHEMA and db.engine.dialect.name == 'postgresql'
+
+    @staticmethod
+    def build_partitioned_metadata() -> MetaData:
+        """
+        Derive partitioned table definitions from the ORM models
+
+        Every primary key, unique constraint and foreign key gains the
+        partition key, and foreign keys cascade between partitions of the
+        same day.
+
+        Returns:
+            MetaData holding the partitioned tables
+        """
+        metadata = MetaData()
+
+        for table_name in PARTITIONED_TABLES:
+            source = Base.metadata.tables[table_name]
+            columns = []
+            constraints = []
+
+            for column in source.columns:
+                columns.append(Column(
+                    column.name,
+                    column.type,
+                    nullable=False if (column.primary_key or column.name == PARTITION_KEY) else column.nullable
+                ))
+
+            pk_columns = [column.name for column in source.primary_key.columns]
+            constraints.append(PrimaryKeyConstraint(*pk_columns, PARTITION_KEY))
+
+            # Includes column-level unique=True constraints
+            for constraint in source.constraints:
+                if isinstance(constraint, UniqueConstraint):
+                    constraints.append(UniqueConstraint(
+                        *[column.name for column in constraint.columns], PARTITION_KEY,
+                        name=constraint.name
+                    ))
+
+            for foreign_key in source.foreign_keys:
+                target = foreign_key.column.table.name
+                constraints.append(ForeignKeyConstraint(
+                    [foreign_key.parent.name, PARTITION_KEY],
+                    [f"{target}.{foreign_key.column.name}", f"{target}.{PARTITION_KEY}"],
+                    ondelete='CASCADE'
+                ))
+
+            table = Table(
+                table_name, metadata, *columns, *constraints,
+                postgresql_partition_by=f"RANGE ({PARTITION_KEY})"
+            )
+
+            for index in source.indexes:
+                index_columns = [column.name for column in index.columns]
+                if index.unique and PARTITION_KEY not in index_columns:
+                    index_columns.append(PARTITION_KEY)
+                Index(index.name, *[table.c[name] for name in index_columns], unique=index.unique, **index.dialect_kwargs)
+
+        return metadata
+
+    @staticmethod
+    def create_partitioned_schema(days_ahead: Optional[int] = None) -> None:
+        """Create partitioned tables, the remaining regular tables and initial partitions"""
+        PartitionService.build_partitioned_metadata().create_all(bind=db.engine)
+
+        other_tables = [table for name, table in Base.metadata.tables.items() if name not in PARTITIONED_TABLES]
+        Base.metadata.create_all(bind=db.engine, tables=other_tables)
+
+        PartitionService.ensure_partitions(days_ahead)
+
+    @staticmethod
+    def partition_name(table_name: str, day: date) -> str:
+        """Name of the partition holding rows expiring on the given day"""
+        return f"{table_name}_p{day:%Y%m%d}"
+
+    @staticmethod
+    def ensure_partitions(days_ahead: Optional[int] = None, today: Optional[date] = None) -> int:
+        """
+        Create partitions from today up to the furthest possible expiry day
+
+        Args:
+            days_ahead: Extra days beyond today (defaults to queue lifetime + PARTITION_PREMAKE_DAYS)
+            today: Override for the current day
+
+        Returns:
+            Number of days covered
+        """
+        config = get_config()
+        today = today or datetime.utcnow().date()
+        if days_ahead is None:
+            days_ahead = -(-config.QUEUE_EXPIRY_HOURS // 24) + config.PARTITION_PREMAKE_DAYS
+
+        with db.engine.begin() as connection:
+            if not PartitionService._try_lock(connection):
+                return 0
+
+            for offset in range(days_ahead + 1):
+                day = today + timedelta(days=offset)
+                for table_name in PARTITIONED_TABLES:
+                    connection.execute(text(
+                        f'CREATE TABLE IF NOT EXISTS "{PartitionService.partition_name(table_name, day)}" '
+                        f'PARTITION OF "{table_name}" '
+                        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                    ))
+
+        return days_ahead + 1
+
+    @staticmethod
+    def list_partition_days() -> List[date]:
+        """List the expiry days that currently have a queues partition"""
+        rows = db.session.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'queues'"
+        )).scalars().all()
+        db.session.rollback()
+
+        days = []
+        for name in rows:
+            try:
+                days.append(datetime.strptime(name.rsplit("_p", 1)[1], "%Y%m%d").date())
+            except (IndexError, ValueError):
+                continue
+        return sorted(days)
+
+    @staticmethod
+    def drop_expired_partitions(today: Optional[date] = None) -> int:
+        """
+        Detach and drop every partition whose rows have all expired
+
+        Rows expiring before today are all past their expires_at, so the
+        whole day is removed with catalog operations instead of row deletes.
+
+        Returns:
+            Number of days dropped
+        """
+        today = today or datetime.utcnow().date()
+        expired_days = [day for day in PartitionService.list_partition_days() if day < today]
+
+        with db.engine.begin() as connection:
+            if not PartitionService._try_lock(connection):
+                return 0
+
+            for day in expired_days:
+                # Children first so no foreign key points into the queues partition
+                for table_name in reversed(PARTITIONED_TABLES):
+                    partition = PartitionService.partition_name(table_name, day)
+                    connection.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{partition}"'))
+                    connection.execute(text(f'DROP TABLE "{partition}"'))
+
+        return len(expired_days)
+
+    @staticmethod
+    def run_maintenance() -> Dict[str, int]:
+        """Create upcoming partitions and drop expired ones"""
+        created_days = PartitionService.ensure_partitions()
+        dropped_days = PartitionService.drop_expired_partitions()
+
+        if dropped_days:
+            logger.info(f"Dropped {dropped_days} expired partition days")
+
+        return {"created_days": created_days, "dropped_days": dropped_days}
+
+    @staticmethod
+    def _try_lock(connection) -> bool:
+        """Take the maintenance advisory lock for the current transaction"""
+        return bool(connection.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": PartitionService.MAINTENANCE_LOCK_ID}
+        ).scalar())
@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional, Union
+from config import get_config
+
+def digest_host_secret(host_secret: uuid.UUID) -> bytes:
+    """Hash a host secret so the plain value never sits in the cache"""
+    return hashlib.sha256(host_secret.bytes).digest()
+
+class QueueMetadata(NamedTuple):
+    """Immutable snapshot of the queue fields needed on the request path"""
+    id: uuid.UUID
+    name: Optional[str]
+    default_sort_order: str
+    created_at: datetime
+    expires_at: datetime
+    host_secret_digest: bytes
+
+    @classmethod
+    def from_queue(cls, queue) -> "QueueMetadata":
+        """Build metadata from a Queue model instance"""
+        return cls(
+            id=queue.id,
+            name=queue.name,
+            default_sort_order=queue.default_sort_order,
+            created_at=queue.created_at,
+            expires_at=queue.expires_at,
+            host_secret_digest=digest_host_secret(queue.host_secret)
+        )
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        """Check whether the queue has expired"""
+        return self.expires_at < (now or datetime.utcnow())
+
+    def check_host_secret(self, host_secret: uuid.UUID) -> bool:
+        """Compare a host secret against the stored digest in constant time"""
+        return hmac.compare_digest(self.host_secret_digest, digest_host_secret(host_secret))
+
+class QueueMetadataCache:
+    """Per-worker TTL cache of queue metadata with negative caching"""
+
+    # Sentinel returned by get() when nothing is cached for the id
+    MISSING = object()
+
+    def __init__(self, ttl_seconds: float = 30, negative_ttl_seconds: float = 10, max_entries: int = 10000):
+        # Format: {queue_uuid: (QueueMetadata or None, expires_at_monotonic)}
+        self._entries: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, queue_uuid: uuid.UUID) -> Union[QueueMetadata, None, object]:
+        """
+        Look up cached metadata
+
+        Returns:
+            QueueMetadata if cached, None if cached as unknown, MISSING otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(queue_uuid)
+            if entry is None:
+                return self.MISSING
+
+            metadata, valid_until = entry
+            if valid_until < time.monotonic():
+                del self._entries[queue_uuid]
+                return self.MISSING
+
+            self._entries.move_to_end(queue_uuid)
+            return metadata
+
+    def put(self, queue_uuid: uuid.UUID, metadata: Optional[QueueMetadata]):
+        """Cache metadata for a queue, or None to remember that it does not exist"""
+        ttl = self._ttl if metadata is not None else self._negative_ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[queue_uuid] = (metadata, time.monotonic() + ttl)
+            self._entries.move_to_end(queue_uuid)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, queue_uuid: uuid.UUID):
+        """Drop the cached entry for a queue"""
+        with self._lock:
+            self._entries.pop(queue_uuid, None)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_config = get_config()
+
+# Global queue metadata cache instance (one per worker process)
+queue_cache = QueueMetadataCache(
+    ttl_seconds=_config.QUEUE_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=_config.QUEUE_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=_config.QUEUE_CACHE_MAX_ENTRIES
+)
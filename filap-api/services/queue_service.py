@@ -1,16 +1,25 @@
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy import lambda_stmt, select, text
 from sqlalchemy.exc import IntegrityError
-from database import db
-from models.models import Queue, Message, MessageUpvote
-from services.events import EventService
+from database import db, commit, on_commit, on_primary, read_only
+from models.models import Queue, MessageUpvote
+from services.events import EventService, sse_manager
+from services.queue_cache import QueueMetadata, queue_cache
+from services.stats import statement_cache_stats, system_stats
 from config import get_config
+from utils.tokens import issue_host_token, signing_enabled, verify_host_token
 import uuid
 
+_config = get_config()
+
 class QueueService:
     """Service layer for queue management operations"""
     
+    # Advisory lock key shared by all workers running the expiry reaper
+    REAPER_LOCK_ID = 0x46494C4150
+    
     @staticmethod
     def create_queue(name: Optional[str] = None, default_sort_order: str = "votes") -> Dict[str, Any]:
         """
@@ -21,7 +30,8 @@ class QueueService:
             default_sort_order: Default sorting method ("votes" or "newest")
             
         Returns:
-            Dict containing queue data including host_secret
+            Dict containing queue data including host_secret (and host_token
+            when signed host tokens are enabled)
         """
         # Validate sort order
         if default_sort_order not in ["votes", "newest"]:
@@ -35,9 +45,19 @@ class QueueService:
         
         try:
             db.session.add(queue)
-            db.session.commit()
+            commit()
+            
+            # Warm the metadata cache (also clears any negative entry)
+            metadata = QueueMetadata.from_queue(queue)
+            on_commit(lambda: queue_cache.put(metadata.id, metadata))
+            on_commit(lambda: system_stats.queue_created(str(metadata.id), metadata.expires_at))
             
-            return QueueService._queue_to_dict(queue, include_secret=True)
+            queue_data = QueueService._queue_to_dict(queue, include_secret=True)
+            
+            if _config.SIGNED_HOST_TOKENS and signing_enabled():
+                queue_data["host_token"] = issue_host_token(queue.id, queue.expires_at)
+            
+            return queue_data
             
         except IntegrityError:
             db.session.rollback()
@@ -59,18 +79,61 @@ class QueueService:
         except ValueError:
             return None
         
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
+        metadata = QueueService.get_active_queue_metadata(queue_uuid)
         
-        if not queue:
+        if not metadata:
             return None
+        
+        return QueueService._queue_to_dict(metadata, include_secret=False)
+    
+    @staticmethod
+    def get_queue_metadata(queue_uuid: uuid.UUID) -> Optional[QueueMetadata]:
+        """
+        Get cached queue metadata, loading it from the database on a miss
+        
+        Unknown ids are cached negatively so repeated probes skip the database.
+        
+        Args:
+            queue_uuid: Queue UUID
             
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            # Queue expired, delete it
-            QueueService._delete_expired_queue(queue)
+        Returns:
+            QueueMetadata or None if the queue does not exist
+        """
+        metadata = queue_cache.get(queue_uuid)
+        if metadata is not queue_cache.MISSING:
+            return metadata
+        
+        # Always the primary: a lagging replica would cache a new queue as missing
+        with on_primary():
+            queue = db.session.scalars(lambda_stmt(
+                lambda: select(Queue).where(Queue.id == queue_uuid).limit(1)
+            )).first()
+        metadata = QueueMetadata.from_queue(queue) if queue else None
+        queue_cache.put(queue_uuid, metadata)
+        
+        return metadata
+    
+    @staticmethod
+    def get_active_queue_metadata(queue_uuid: uuid.UUID) -> Optional[QueueMetadata]:
+        """
+        Get metadata for a queue that exists and has not expired
+        
+        Args:
+            queue_uuid: Queue UUID
+            
+        Returns:
+            QueueMetadata or None if not found/expired
+        """
+        metadata = QueueService.get_queue_metadata(queue_uuid)
+        
+        if not metadata:
+            return None
+            
+        # Expired queues are plain 404s; the expiry reaper deletes them
+        if metadata.is_expired():
             return None
         
-        return QueueService._queue_to_dict(queue, include_secret=False)
+        return metadata
     
     @staticmethod
     def update_queue(queue_id: str, host_secret: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -85,24 +148,13 @@ class QueueService:
         Returns:
             Updated queue data or None if unauthorized/not found
         """
-        try:
-            queue_uuid = uuid.UUID(queue_id)
-            secret_uuid = uuid.UUID(host_secret)
-        except ValueError:
+        if not QueueService.verify_host_access(queue_id, host_secret):
             return None
         
-        queue = db.session.query(Queue).filter_by(
-            id=queue_uuid,
-            host_secret=secret_uuid
-        ).first()
+        queue = db.session.query(Queue).filter_by(id=uuid.UUID(queue_id)).first()
         
         if not queue:
             return None
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            QueueService._delete_expired_queue(queue)
-            return None
         
         # Update allowed fields
         allowed_fields = {"name", "default_sort_order"}
@@ -118,7 +170,11 @@ class QueueService:
         
         if updated:
             try:
-                db.session.commit()
+                commit()
+                
+                # Settings changed, drop this worker's cached metadata
+                queue_uuid = queue.id
+                on_commit(lambda: queue_cache.invalidate(queue_uuid))
                 
                 # Broadcast queue update to all connected clients
                 queue_data = QueueService._queue_to_dict(queue, include_secret=False)
@@ -137,9 +193,12 @@ class QueueService:
         """
         Verify if the provided host_secret is valid for the queue
         
+        Signed host tokens are checked with pure CPU; legacy host secrets
+        fall back to the (cached) queue lookup.
+        
         Args:
             queue_id: Queue UUID
-            host_secret: Host authentication secret
+            host_secret: Host authentication secret or signed host token
             
         Returns:
             True if valid, False otherwise
@@ -150,74 +209,102 @@ class QueueService:
         except ValueError:
             return False
         
-        queue = db.session.query(Queue).filter_by(
-            id=queue_uuid,
-            host_secret=secret_uuid
-        ).first()
+        if _config.SIGNED_HOST_TOKENS and verify_host_token(queue_uuid, host_secret):
+            return True
         
-        if not queue:
-            return False
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            QueueService._delete_expired_queue(queue)
+        metadata = QueueService.get_active_queue_metadata(queue_uuid)
+        
+        if not metadata:
             return False
             
-        return True
+        return metadata.check_host_secret(secret_uuid)
     
     @staticmethod
-    def cleanup_expired_queues() -> int:
+    def cleanup_expired_queues(batch_size: int = 500, max_batches: Optional[int] = None) -> int:
         """
-        Clean up all expired queues (for background tasks)
+        Clean up expired queues in bounded chunks (for background tasks)
         
+        Each chunk is one short transaction. On PostgreSQL a transaction-level
+        advisory lock makes sure only one worker reaps at a time; if another
+        worker holds it, this call returns immediately.
+        
+        Args:
+            batch_size: Maximum queues deleted per transaction
+            max_batches: Optional limit on chunks per call (None = until done)
+            
         Returns:
             Number of queues cleaned up
         """
-        current_time = datetime.utcnow()
-        expired_queues = db.session.query(Queue).filter(
-            Queue.expires_at < current_time
-        ).all()
-        
-        count = len(expired_queues)
+        total = 0
+        batches = 0
         
-        for queue in expired_queues:
-            db.session.delete(queue)
-        
-        if count > 0:
+        while max_batches is None or batches < max_batches:
+            if not QueueService._try_reaper_lock():
+                db.session.rollback()
+                break
+            
+            expired_ids = [queue_id for (queue_id,) in db.session.query(Queue.id).filter(
+                Queue.expires_at < datetime.utcnow()
+            ).order_by(Queue.expires_at).limit(batch_size).all()]
+            
+            if not expired_ids:
+                db.session.rollback()
+                break
+            
+            # Single statement; messages, upvotes and hand raises go via ON DELETE CASCADE
+            total += db.session.query(Queue).filter(
+                Queue.id.in_(expired_ids)
+            ).delete(synchronize_session=False)
             db.session.commit()
+            batches += 1
+            
+            for queue_id in expired_ids:
+                queue_cache.put(queue_id, None)
+            
+            if len(expired_ids) < batch_size:
+                break
         
-        return count
+        return total
     
     @staticmethod
-    def get_queue_stats() -> Dict[str, int]:
+    @read_only
+    def get_queue_stats(detailed: bool = False, limit: int = 10) -> Dict[str, Any]:
         """
-        Get system statistics
+        Get system statistics from the write-time counters
         
+        Counters are rebuilt from the database only when stale (normally by
+        the expiry reaper), so this is O(1) otherwise.
+        
+        Args:
+            detailed: Whether to include the most active queues
+            limit: Number of queues in the detailed listing
+            
         Returns:
-            Dict with current queue count and other stats
+            Dict with live queue, message, vote, hand raise and SSE connection
+            counts, and this worker's compiled statement cache hit rate
         """
-        current_time = datetime.utcnow()
+        if system_stats.needs_reconcile():
+            system_stats.reconcile()
         
-        active_queues = db.session.query(Queue).filter(
-            Queue.expires_at > current_time
-        ).count()
+        stats = system_stats.snapshot()
+        stats["sse_connections"] = sse_manager.connection_count()
+        stats["statement_cache"] = statement_cache_stats.snapshot()
         
-        total_messages = db.session.query(Message).join(Queue).filter(
-            Queue.expires_at > current_time
-        ).count()
+        if detailed:
+            top_queues = system_stats.top_queues(limit)
+            for queue_stats in top_queues:
+                queue_stats["sse_connections"] = sse_manager.connection_count(queue_stats["id"])
+            stats["top_queues"] = top_queues
         
-        return {
-            "active_queues": active_queues,
-            "total_messages": total_messages
-        }
+        return stats
     
     @staticmethod
-    def _queue_to_dict(queue: Queue, include_secret: bool = False) -> Dict[str, Any]:
+    def _queue_to_dict(queue: Union[Queue, QueueMetadata], include_secret: bool = False) -> Dict[str, Any]:
         """
-        Convert Queue model to dictionary
+        Convert Queue model (or cached QueueMetadata) to dictionary
         
         Args:
-            queue: Queue model instance
+            queue: Queue model instance or QueueMetadata
             include_secret: Whether to include host_secret
             
         Returns:
@@ -237,12 +324,17 @@ class QueueService:
         return data
     
     @staticmethod
-    def _delete_expired_queue(queue: Queue) -> None:
+    def _try_reaper_lock() -> bool:
         """
-        Delete an expired queue
+        Take the cross-worker reaper lock for the current transaction
         
-        Args:
-            queue: Queue model instance to delete
+        Returns:
+            True if this worker may reap (always True on non-PostgreSQL databases)
         """
-        db.session.delete(queue)
-        db.session.commit()
\ No newline at end of file
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return True
+        
+        return bool(db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": QueueService.REAPER_LOCK_ID}
+        ).scalar())
\ No newline at end of file
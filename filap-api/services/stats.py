@@ -0,0 +1,232 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from database import db
+from models.models import Queue, Message, HandRaise
+from config import get_config
+
+COUNTERS = ("messages", "votes", "hand_raises")
+
+class SystemStats:
+    """Per-worker activity counters, updated at write time and reconciled from the database"""
+
+    def __init__(self, reconcile_interval_seconds: float = 300):
+        self._reconcile_interval = reconcile_interval_seconds
+        # Format: {queue_id: {"expires_at": datetime or None, "messages": n, "votes": n, "hand_raises": n}}
+        # expires_at is None for queues created by another worker since the last reconcile
+        self._queues: Dict[str, Dict[str, Any]] = {}
+        # Min-heap of (expires_at, queue_id) so expired queues are dropped without a scan
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        self._totals = dict.fromkeys(COUNTERS, 0)
+        self._active_queues = 0
+        self._reconciled_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def needs_reconcile(self) -> bool:
+        return self._reconciled_at is None or time.monotonic() - self._reconciled_at >= self._reconcile_interval
+
+    def queue_created(self, queue_id: str, expires_at: datetime):
+        """Record a new queue"""
+        with self._lock:
+            entry = self._entry(queue_id)
+            if entry["expires_at"] is None:
+                entry["expires_at"] = expires_at
+                self._active_queues += 1
+                heapq.heappush(self._expiry_heap, (expires_at, queue_id))
+
+    def message_created(self, queue_id: str):
+        self._add(queue_id, messages=1)
+
+    def message_deleted(self, queue_id: str, vote_count: int):
+        self._add(queue_id, messages=-1, votes=-vote_count)
+
+    def vote_changed(self, queue_id: str, delta: int):
+        self._add(queue_id, votes=delta)
+
+    def hand_raise_changed(self, queue_id: str, delta: int):
+        """Record a hand going up (+1) or being lowered or completed (-1)"""
+        self._add(queue_id, hand_raises=delta)
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Get the global counters for live queues
+
+        Returns:
+            Dict with active_queues, total_messages, total_votes and active_hand_raises
+        """
+        with self._lock:
+            self._drop_expired(now or datetime.utcnow())
+            return {
+                "active_queues": self._active_queues,
+                "total_messages": self._totals["messages"],
+                "total_votes": self._totals["votes"],
+                "active_hand_raises": self._totals["hand_raises"]
+            }
+
+    def top_queues(self, limit: int = 10, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most active live queues
+
+        Activity is messages + votes + raised hands.
+
+        Args:
+            limit: Number of queues to return
+            now: Override for the current time
+
+        Returns:
+            List of per-queue counters, most active first
+        """
+        with self._lock:
+            self._drop_expired(now or datetime.utcnow())
+            ranked = heapq.nlargest(
+                limit,
+                self._queues.items(),
+                key=lambda item: sum(item[1][counter] for counter in COUNTERS)
+            )
+            return [
+                {
+                    "id": queue_id,
+                    **{counter: entry[counter] for counter in COUNTERS},
+                    "activity": sum(entry[counter] for counter in COUNTERS)
+                }
+                for queue_id, entry in ranked
+            ]
+
+    def reconcile(self):
+        """
+        Rebuild all counters from the database
+
+        Picks up writes made by other workers. Increments racing with the
+        queries are lost until the next reconcile.
+        """
+        now = datetime.utcnow()
+
+        live_queues = db.session.query(Queue.id, Queue.expires_at).filter(
+            Queue.expires_at > now
+        ).all()
+
+        message_counts = db.session.query(
+            Message.queue_id,
+            func.count(Message.id),
+            func.coalesce(func.sum(Message.vote_count), 0)
+        ).join(Queue).filter(
+            Queue.expires_at > now
+        ).group_by(Message.queue_id).all()
+
+        hand_raise_counts = db.session.query(
+            HandRaise.queue_id,
+            func.count(HandRaise.id)
+        ).join(Queue).filter(
+            Queue.expires_at > now,
+            HandRaise.completed == False
+        ).group_by(HandRaise.queue_id).all()
+
+        queues = {
+            str(queue_id): {"expires_at": expires_at, **dict.fromkeys(COUNTERS, 0)}
+            for queue_id, expires_at in live_queues
+        }
+        for queue_id, messages, votes in message_counts:
+            entry = queues.get(str(queue_id))
+            if entry is not None:
+                entry["messages"], entry["votes"] = messages, int(votes)
+        for queue_id, hand_raises in hand_raise_counts:
+            entry = queues.get(str(queue_id))
+            if entry is not None:
+                entry["hand_raises"] = hand_raises
+
+        expiry_heap = [(entry["expires_at"], queue_id) for queue_id, entry in queues.items()]
+        heapq.heapify(expiry_heap)
+
+        with self._lock:
+            self._queues = queues
+            self._expiry_heap = expiry_heap
+            self._active_queues = len(queues)
+            self._totals = {
+                counter: sum(entry[counter] for entry in queues.values())
+                for counter in COUNTERS
+            }
+            self._reconciled_at = time.monotonic()
+
+    def reset(self):
+        """Drop all counters (the next read reconciles)"""
+        with self._lock:
+            self._queues = {}
+            self._expiry_heap = []
+            self._totals = dict.fromkeys(COUNTERS, 0)
+            self._active_queues = 0
+            self._reconciled_at = None
+
+    def _entry(self, queue_id: str) -> Dict[str, Any]:
+        entry = self._queues.get(queue_id)
+        if entry is None:
+            entry = self._queues[queue_id] = {"expires_at": None, **dict.fromkeys(COUNTERS, 0)}
+        return entry
+
+    def _add(self, queue_id: str, **deltas: int):
+        with self._lock:
+            entry = self._entry(queue_id)
+            for counter, delta in deltas.items():
+                entry[counter] += delta
+                self._totals[counter] += delta
+
+    def _drop_expired(self, now: datetime):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, queue_id = heapq.heappop(self._expiry_heap)
+            entry = self._queues.pop(queue_id, None)
+            if entry is None:
+                continue
+            self._active_queues -= 1
+            for counter in COUNTERS:
+                self._totals[counter] -= entry[counter]
+
+class StatementCacheStats:
+    """Per-worker counts of statements served from SQLAlchemy's compiled cache"""
+
+    def __init__(self):
+        # Format: {CacheStats: executions}
+        self._counts = dict.fromkeys(CacheStats, 0)
+        self._lock = threading.Lock()
+
+    def record(self, cache_hit: CacheStats):
+        with self._lock:
+            self._counts[cache_hit] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the compiled cache counters since the worker started
+
+        Returns:
+            Dict with hits, misses, uncached (raw SQL, DDL) executions and
+            hit_rate (hits / (hits + misses), None before any cacheable statement)
+        """
+        with self._lock:
+            hits = self._counts[CacheStats.CACHE_HIT]
+            misses = self._counts[CacheStats.CACHE_MISS]
+            uncached = sum(self._counts.values()) - hits - misses
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "uncached": uncached,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(CacheStats, 0)
+
+# Global stats instance (one per worker process)
+system_stats = SystemStats(get_config().STATS_RECONCILE_INTERVAL_SECONDS)
+
+# Global statement cache stats instance (one per worker process)
+statement_cache_stats = StatementCacheStats()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_statement_cache(connection, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        statement_cache_stats.record(context.cache_hit)
\ No newline at end of file
@@ -1,13 +1,19 @@
 from typing import Dict, Any, Optional
+from config import get_config
+from utils.tokens import issue_user_token, verify_user_token
 import uuid
 
+_config = get_config()
+
 class UserService:
     """Service layer for user token management"""
     
     @staticmethod
     def generate_user_token(queue_id: str) -> Optional[Dict[str, Any]]:
         """
-        Generate a new user token for a queue
+        Generate a new signed user token for a queue
+        
+        Minting is pure CPU once the queue metadata is cached.
         
         Args:
             queue_id: Queue UUID to validate existence
@@ -15,33 +21,74 @@ class UserService:
         Returns:
             Dict containing user_token or None if queue not found
         """
-        from datetime import datetime
-        from database import db
-        from models.models import Queue
+        from services.queue_service import QueueService
         
         try:
             queue_uuid = uuid.UUID(queue_id)
         except ValueError:
             return None
         
-        # Check if queue exists and is not expired
-        queue = db.session.query(Queue).filter_by(id=queue_uuid).first()
+        # Check if queue exists and is not expired (served from the metadata cache)
+        queue = QueueService.get_active_queue_metadata(queue_uuid)
         
         if not queue:
             return None
-            
-        # Check if queue has expired
-        if queue.expires_at < datetime.utcnow():
-            # Delete expired queue
-            db.session.delete(queue)
-            db.session.commit()
-            return None
         
-        # Generate new user token
-        user_token = str(uuid.uuid4())
+        return UserService._issue_token(queue_id, queue)
+    
+    @staticmethod
+    def _issue_token(queue_id: str, queue) -> Dict[str, Any]:
+        """Mint a signed user token for an active queue (shared with the async services)"""
+        # Generate new signed user token bound to this queue
+        user_token = issue_user_token(queue.id)
         
         return {
             "user_token": user_token,
             "queue_id": queue_id,
             "expires_at": queue.expires_at.isoformat() + "Z"
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def validate_user_token(queue_uuid: uuid.UUID, user_token: str) -> bool:
+        """
+        Check that a user token may act on a queue (no database access)
+        
+        Signed tokens must carry a valid signature for the queue. Unsigned
+        UUID tokens (minted before signing existed) are accepted unless
+        REQUIRE_SIGNED_USER_TOKENS is enabled.
+        
+        Args:
+            queue_uuid: Queue UUID
+            user_token: Token presented by the client
+            
+        Returns:
+            True if the token is acceptable for the queue
+        """
+        if verify_user_token(queue_uuid, user_token):
+            return True
+        
+        if _config.REQUIRE_SIGNED_USER_TOKENS:
+            return False
+        
+        try:
+            uuid.UUID(user_token)
+        except (ValueError, AttributeError, TypeError):
+            return False
+        
+        return True
+    
+    @staticmethod
+    def normalize_user_token(user_token: Optional[str]) -> Optional[str]:
+        """
+        Canonical form of a user token, as stored in the token columns
+        
+        Args:
+            user_token: Token presented by the client
+            
+        Returns:
+            Lowercase hyphenated UUID string, or None if the token is not UUID-shaped
+        """
+        try:
+            return str(uuid.UUID(user_token))
+        except (ValueError, AttributeError, TypeError):
+            return None
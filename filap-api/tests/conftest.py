@@ -1,10 +1,18 @@
 import pytest
 import os
 import tempfile
+
+# Signed tokens are disabled under the public default SECRET_KEY
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+
 from app import app
 from database import db
 from models.models import Base
 from config import TestingConfig
+from services.queue_cache import queue_cache
+from services.fragment_cache import message_fragment_cache
+from services.stats import system_stats
+from services.hand_raise_index import hand_raise_index
 
 @pytest.fixture(scope='session')
 def test_app():
@@ -24,9 +32,17 @@ def test_app():
 def test_db(test_app):
     """Create a fresh database for each test"""
     Base.metadata.create_all(bind=db.engine)
+    queue_cache.clear()
+    message_fragment_cache.clear()
+    system_stats.reset()
+    hand_raise_index.clear()
     yield db
     db.session.remove()
     Base.metadata.drop_all(bind=db.engine)
+    queue_cache.clear()
+    message_fragment_cache.clear()
+    system_stats.reset()
+    hand_raise_index.clear()
 
 @pytest.fixture
 def client(test_app, test_db):
@@ -4,7 +4,8 @@ import time
 import threading
 import uuid
 from unittest.mock import patch, MagicMock
-from services.events import SSEManager, EventService, sse_manager
+from datetime import datetime, timedelta
+from services.events import SSEManager, EventService, ExpiryTimerWheel, user_recipient, sse_manager
 import queue as queue_module
 
 @pytest.mark.unit
@@ -295,4 +296,148 @@ class TestSSEPerformance:
         
         # Should not have any errors
         assert len(errors) == 0
-        assert len(connections) == 100
\ No newline at end of file
+        assert len(connections) == 100
+
+@pytest.mark.unit
+class TestExpiryTimerWheel:
+    
+    def test_tick_fires_due_queues_only(self):
+        """Test only queues past their deadline are expired"""
+        expired = []
+        wheel = ExpiryTimerWheel(expired.append)
+        soon, later = str(uuid.uuid4()), str(uuid.uuid4())
+        
+        wheel.schedule(soon, datetime.utcnow() + timedelta(hours=1))
+        wheel.schedule(later, datetime.utcnow() + timedelta(hours=3))
+        
+        assert wheel.tick(time.time() + 2 * 3600) == [soon]
+        assert expired == [soon]
+        assert not wheel.is_scheduled(soon)
+        assert wheel.is_scheduled(later)
+    
+    def test_cancel(self):
+        """Test cancelled queues never fire"""
+        expired = []
+        wheel = ExpiryTimerWheel(expired.append)
+        queue_id = str(uuid.uuid4())
+        
+        wheel.schedule(queue_id, datetime.utcnow() + timedelta(hours=1))
+        wheel.cancel(queue_id)
+        
+        assert wheel.tick(time.time() + 2 * 3600) == []
+        assert expired == []
+    
+    def test_overdue_deadline_fires_on_next_tick(self):
+        """Test a deadline already in the past fires immediately"""
+        expired = []
+        wheel = ExpiryTimerWheel(expired.append)
+        queue_id = str(uuid.uuid4())
+        
+        wheel.schedule(queue_id, datetime.utcnow() - timedelta(minutes=5))
+        wheel.tick(time.time() + 1)
+        
+        assert expired == [queue_id]
+
+@pytest.mark.unit
+class TestSSEQueueExpiry:
+    
+    def test_expired_queue_closes_streams(self):
+        """Test streams receive queue_expired, end, and free their state"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        
+        stream = manager.create_event_stream(queue_id, datetime.utcnow() + timedelta(hours=1))
+        next(stream)
+        assert manager._expiry_wheel.is_scheduled(queue_id)
+        
+        manager._expiry_wheel.tick(time.time() + 2 * 3600)
+        
+        assert queue_id not in manager._connections
+        assert next(stream) == "event: queue_expired\ndata: {\"id\": \"%s\"}\n\n" % queue_id
+        with pytest.raises(StopIteration):
+            next(stream)
+    
+    def test_last_connection_cancels_timer(self):
+        """Test the timer is dropped once nobody listens to the queue"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        
+        stream = manager.create_event_stream(queue_id, datetime.utcnow() + timedelta(hours=1))
+        next(stream)
+        stream.close()
+        
+        assert queue_id not in manager._connections
+        assert not manager._expiry_wheel.is_scheduled(queue_id)
+
+@pytest.mark.unit
+class TestSSERecipientChannels:
+    
+    def test_send_to_reaches_only_that_recipient(self):
+        """Test private events skip the rest of the queue"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        _, public_queue = manager.add_connection(queue_id)
+        _, private_queue = manager.add_connection(queue_id, [user_recipient("token-a")])
+        
+        manager.send_to(queue_id, user_recipient("token-a"), "position_changed", {"position": 2})
+        manager.send_to(queue_id, user_recipient("token-b"), "position_changed", {"position": 1})
+        
+        assert private_queue.get_nowait() == "event: position_changed\ndata: {\"position\": 2}\n\n"
+        assert private_queue.empty()
+        assert public_queue.empty()
+    
+    def test_connection_with_several_recipients(self):
+        """Test one connection can listen on several private channels"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        _, event_queue = manager.add_connection(queue_id, [user_recipient("token-a"), user_recipient("token-b")])
+        
+        manager.send_to(queue_id, user_recipient("token-b"), "other_event", {})
+        manager.send_to(queue_id, user_recipient("token-a"), "user_event", {})
+        
+        assert event_queue.qsize() == 2
+    
+    def test_recipient_index_cleanup(self):
+        """Test removing the last private connection frees the recipient index"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        connection_id, _ = manager.add_connection(queue_id, [user_recipient("token-a")])
+        assert manager.has_recipients(queue_id)
+        
+        manager.remove_connection(queue_id, connection_id)
+        
+        assert not manager.has_recipients(queue_id)
+        assert manager._connection_recipients == {}
+    
+    def test_user_recipient_is_canonical(self):
+        """Test user tokens map to the same channel regardless of case"""
+        token = uuid.uuid4()
+        assert user_recipient(str(token).upper()) == user_recipient(str(token))
+    
+    def test_user_recipient_hides_token(self):
+        """Test channel keys (stored in the outbox) do not contain the token"""
+        token = str(uuid.uuid4())
+        assert token not in user_recipient(token)
+        assert user_recipient(token) != user_recipient(str(uuid.uuid4()))
+    
+    def test_send_position_changed(self):
+        """Test EventService pushes position changes to the user's channel"""
+        with patch('services.events.sse_manager') as mock_sse_manager:
+            EventService.send_position_changed("queue-1", "token-a", 3)
+            
+            mock_sse_manager.send_to.assert_called_once_with(
+                queue_id="queue-1",
+                recipient=user_recipient("token-a"),
+                event_type="position_changed",
+                data={"queue_id": "queue-1", "position": 3}
+            )    
+    def test_broadcast_positions_shifted(self):
+        """Test EventService broadcasts one shift for every raise behind a change"""
+        with patch('services.events.sse_manager') as mock_sse_manager:
+            EventService.broadcast_positions_shifted("queue-1", 4, -2)
+            
+            mock_sse_manager.broadcast_to_queue.assert_called_once_with(
+                queue_id="queue-1",
+                event_type="positions_shifted",
+                data={"from_position": 4, "delta": -2}
+            )
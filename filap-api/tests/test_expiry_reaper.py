@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from services.expiry_reaper import ExpiryReaper
+from models.models import Queue
+
+class TestExpiryReaper:
+    
+    def test_run_once_deletes_expired_queues(self, test_app, test_db):
+        """Test a reaper pass removes expired queues only"""
+        test_db.session.add_all([
+            Queue(name="Expired", expires_at=datetime.utcnow() - timedelta(minutes=5)),
+            Queue(name="Live")
+        ])
+        test_db.session.commit()
+        
+        reaper = ExpiryReaper(batch_size=10)
+        reaper._app = test_app
+        
+        assert reaper.run_once() == 1
+        assert [q.name for q in test_db.session.query(Queue).all()] == ["Live"]
+    
+    def test_ensure_started_is_idempotent(self, test_app):
+        """Test the reaper thread is started once and can be stopped"""
+        reaper = ExpiryReaper(interval_seconds=3600)
+        
+        reaper.ensure_started(test_app)
+        thread = reaper._thread
+        reaper.ensure_started(test_app)
+        
+        assert reaper._thread is thread
+        assert reaper.running
+        
+        reaper.stop(timeout=1)
+        assert not reaper.running
@@ -0,0 +1,107 @@
+import pytest
+import json
+import uuid
+from services.fragment_cache import MessageFragmentCache
+from services.message_service import MessageService
+from services.queue_service import QueueService
+
+def _message_data(message_id="msg-1", updated_at="2024-01-01T12:00:00Z", text="Hello"):
+    return {
+        "id": message_id,
+        "queue_id": "queue-1",
+        "text": text,
+        "author_name": None,
+        "user_token": "user-1",
+        "vote_count": 3,
+        "is_read": False,
+        "has_user_voted": True,
+        "created_at": "2024-01-01T12:00:00Z",
+        "updated_at": updated_at
+    }
+
+@pytest.mark.unit
+class TestMessageFragmentCache:
+    
+    def test_fragment_excludes_dynamic_fields(self):
+        """Test cached fragment leaves vote fields to be patched in"""
+        cache = MessageFragmentCache()
+        data = _message_data()
+        
+        fragment = cache.get_or_build(data["id"], data["updated_at"], lambda: data)
+        rendered = json.loads(cache.render(fragment, 7, False))
+        
+        assert "vote_count" not in fragment
+        assert rendered["vote_count"] == 7
+        assert rendered["has_user_voted"] is False
+        assert rendered["text"] == "Hello"
+    
+    def test_fragment_reused_until_updated_at_changes(self):
+        """Test fragments are keyed by (id, updated_at)"""
+        cache = MessageFragmentCache()
+        data = _message_data()
+        builds = []
+        
+        def build():
+            builds.append(1)
+            return data
+        
+        cache.get_or_build("msg-1", "t1", build)
+        cache.get_or_build("msg-1", "t1", build)
+        assert len(builds) == 1
+        assert cache.hits == 1
+        
+        cache.get_or_build("msg-1", "t2", build)
+        assert len(builds) == 2
+    
+    def test_cache_is_bounded(self):
+        """Test least recently used fragments are evicted"""
+        cache = MessageFragmentCache(max_entries=2)
+        
+        for i in range(3):
+            data = _message_data(message_id=f"msg-{i}")
+            cache.get_or_build(data["id"], data["updated_at"], lambda: data)
+        
+        assert len(cache) == 2
+    
+    def test_invalidate_message(self):
+        """Test invalidation drops every revision of a message"""
+        cache = MessageFragmentCache()
+        data = _message_data()
+        cache.get_or_build("msg-1", "t1", lambda: data)
+        cache.get_or_build("msg-1", "t2", lambda: data)
+        
+        cache.invalidate("msg-1")
+        
+        assert len(cache) == 0
+
+class TestMessagesJson:
+    
+    def test_get_messages_json_matches_dict_output(self, test_db):
+        """Test fragment-assembled page matches get_messages"""
+        queue_data = QueueService.create_queue("Test Queue")
+        queue_id = queue_data['id']
+        author_token = str(uuid.uuid4())
+        voter_token = str(uuid.uuid4())
+        
+        message = MessageService.create_message(queue_id, "First \"quoted\" message", author_token)
+        MessageService.create_message(queue_id, "Second message", author_token)
+        MessageService.upvote_message(message['id'], voter_token)
+        
+        expected = MessageService.get_messages(queue_id, user_token=voter_token)
+        result = MessageService.get_messages_json(queue_id, user_token=voter_token)
+        
+        assert json.loads(result) == expected
+    
+    def test_vote_keeps_updated_at(self, test_db):
+        """Test votes patch vote_count without changing the fragment key"""
+        queue_data = QueueService.create_queue("Test Queue")
+        message = MessageService.create_message(queue_data['id'], "Message", str(uuid.uuid4()))
+        
+        upvoted = MessageService.upvote_message(message['id'], str(uuid.uuid4()))
+        
+        assert upvoted['vote_count'] == 1
+        assert upvoted['updated_at'] == message['updated_at']
+    
+    def test_get_messages_json_unknown_queue(self, test_db):
+        """Test unknown queue returns None"""
+        assert MessageService.get_messages_json(str(uuid.uuid4())) is None
@@ -0,0 +1,156 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import call, patch
+from models.models import EventOutbox, HandRaise
+from services.hand_raise_index import HandRaiseIndex, hand_raise_index
+from services.hand_raise_service import HandRaiseService
+from services.queue_service import QueueService
+
+def _rows(count):
+    start = datetime.utcnow()
+    return [(uuid.uuid4(), f"user-{i}", start + timedelta(seconds=i)) for i in range(count)]
+
+@pytest.mark.unit
+class TestHandRaiseIndex:
+
+    def test_unindexed_queue_is_missing(self):
+        """Test queues that were never loaded return MISSING"""
+        index = HandRaiseIndex()
+        assert index.position(uuid.uuid4(), "user-0") is index.MISSING
+
+    def test_positions_follow_raise_order(self):
+        """Test positions are 1-based in raised_at order"""
+        index = HandRaiseIndex()
+        queue_uuid = uuid.uuid4()
+        index.load(queue_uuid, reversed(_rows(3)))
+
+        assert [index.position(queue_uuid, f"user-{i}") for i in range(3)] == [1, 2, 3]
+        assert index.position(queue_uuid, "nobody") is None
+
+    def test_add_and_remove(self):
+        """Test incremental updates shift later positions"""
+        index = HandRaiseIndex()
+        queue_uuid = uuid.uuid4()
+        rows = _rows(3)
+        index.load(queue_uuid, rows[1:])
+
+        index.add(queue_uuid, *rows[0])
+        assert index.position(queue_uuid, "user-2") == 3
+
+        index.remove(queue_uuid, "user-0")
+        index.remove(queue_uuid, "user-1")
+        assert index.position(queue_uuid, "user-2") == 1
+        assert index.position(queue_uuid, "user-1") is None
+
+    def test_entries_expire(self):
+        """Test a queue is rebuilt after the TTL"""
+        index = HandRaiseIndex(ttl_seconds=5)
+        queue_uuid = uuid.uuid4()
+
+        with patch('services.hand_raise_index.time.monotonic', return_value=100.0):
+            index.load(queue_uuid, _rows(1))
+        with patch('services.hand_raise_index.time.monotonic', return_value=106.0):
+            assert index.position(queue_uuid, "user-0") is index.MISSING
+
+class TestHandRaisePosition:
+
+    def test_position_lookup_uses_index(self, test_db):
+        """Test positions track raises, lowering and completion"""
+        queue_data = QueueService.create_queue("Hands Queue")
+        queue_id = queue_data['id']
+        tokens = [str(uuid.uuid4()) for _ in range(3)]
+        raises = [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+
+        assert HandRaiseService.get_user_position(queue_id, tokens[2]) == 3
+
+        # Lowering a hand moves everyone behind it up
+        HandRaiseService.raise_hand(queue_id, tokens[0], "User 0")
+        HandRaiseService.update_hand_raise(queue_id, raises[1]['id'], queue_data['host_secret'], {"completed": True})
+
+        with patch('services.hand_raise_service.db.session.query') as mock_query:
+            assert HandRaiseService.get_user_position(queue_id, tokens[2]) == 1
+            assert HandRaiseService.get_user_position(queue_id, tokens[0]) is None
+            mock_query.assert_not_called()
+
+    def test_index_is_rebuilt_from_database(self, test_db):
+        """Test raises written by another worker show up after a rebuild"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        token = str(uuid.uuid4())
+        HandRaiseService.raise_hand(queue_id, token, "User")
+
+        hand_raise_index.clear()
+
+        assert HandRaiseService.get_user_position(queue_id, token) == 1
+
+    def test_completion_pushes_one_shift(self, test_db):
+        """Test completing a raise tells its owner and broadcasts one shift for the users behind"""
+        queue_data = QueueService.create_queue("Hands Queue")
+        queue_id = queue_data['id']
+        tokens = [str(uuid.uuid4()) for _ in range(3)]
+        raises = [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+
+        with patch('services.hand_raise_service.EventService.send_position_changed') as mock_send, \
+             patch('services.hand_raise_service.EventService.broadcast_positions_shifted') as mock_shift:
+            HandRaiseService.update_hand_raise(queue_id, raises[0]['id'], queue_data['host_secret'], {"completed": True})
+
+        mock_send.assert_called_once_with(queue_id, tokens[0], None)
+        mock_shift.assert_called_once_with(queue_id, 2, -1)
+
+    def test_reopening_shifts_before_owner_position(self, test_db):
+        """Test a reopened raise shifts the raises from its position back, then tells its owner"""
+        queue_data = QueueService.create_queue("Hands Queue")
+        queue_id = queue_data['id']
+        tokens = [str(uuid.uuid4()) for _ in range(3)]
+        raises = [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+        HandRaiseService.update_hand_raise(queue_id, raises[1]['id'], queue_data['host_secret'], {"completed": True})
+
+        with patch('services.hand_raise_service.EventService') as mock_events:
+            HandRaiseService.update_hand_raise(queue_id, raises[1]['id'], queue_data['host_secret'], {"completed": False})
+
+        assert [call for call in mock_events.mock_calls if 'position' in call[0]] == [
+            call.broadcast_positions_shifted(queue_id, 2, 1),
+            call.send_position_changed(queue_id, tokens[1], 2)
+        ]
+
+    def test_batch_completion_shifts_per_run(self, test_db):
+        """Test completed raises send one shift per run of positions, the last run first"""
+        queue_data = QueueService.create_queue("Hands Queue")
+        queue_id = queue_data['id']
+        tokens = [str(uuid.uuid4()) for _ in range(6)]
+        raises = [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+        completed_ids = [uuid.UUID(raises[i]['id']) for i in (0, 1, 3)]
+
+        with patch('services.hand_raise_service.EventService.broadcast_positions_shifted') as mock_shift:
+            HandRaiseService._complete_hand_raises(
+                queue_id, uuid.UUID(queue_id), HandRaise.__table__.c.id.in_(completed_ids)
+            )
+
+        assert mock_shift.call_args_list == [call(queue_id, 5, -1), call(queue_id, 3, -2)]
+
+        # Applying the shifts in order gives every remaining raise its new position
+        positions = {token: position for position, token in enumerate(tokens, start=1)}
+        for token in (tokens[0], tokens[1], tokens[3]):
+            positions[token] = None
+        for (_, from_position, delta), _ in mock_shift.call_args_list:
+            positions = {
+                token: position + delta if position is not None and position >= from_position else position
+                for token, position in positions.items()
+            }
+        assert positions == {
+            token: HandRaiseService.get_user_position(queue_id, token) for token in tokens
+        }
+
+    def test_lowering_writes_constant_outbox_rows(self, client, test_db):
+        """Test lowering a hand in a long queue stores a fixed number of events"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        tokens = [client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token'] for _ in range(50)]
+        for i, token in enumerate(tokens):
+            HandRaiseService.raise_hand(queue_id, token, f"User {i}")
+
+        response = client.post(f'/api/queues/{queue_id}/handraise', json={'user_token': tokens[0], 'user_name': "User 0"})
+
+        assert response.status_code == 200
+        assert sorted(event.event_type for event in test_db.session.query(EventOutbox)) == [
+            "hand_raise_removed", "position_changed", "positions_shifted"
+        ]
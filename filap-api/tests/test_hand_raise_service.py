@@ -0,0 +1,213 @@
+import pytest
+import uuid
+from unittest.mock import patch
+from sqlalchemy.exc import IntegrityError
+from models.models import HandRaise
+from services.hand_raise_service import HandRaiseService, HandRaiseToggle
+from services.queue_service import QueueService
+
+class TestHandRaiseToggle:
+
+    def test_toggle_raises_then_lowers(self, test_db):
+        """Test the toggle reports each outcome explicitly"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        token = str(uuid.uuid4())
+
+        result, hand_raise_data = HandRaiseService.toggle_hand(queue_id, token, "User")
+        assert result is HandRaiseToggle.RAISED
+        assert hand_raise_data['user_token'] == token
+
+        result, hand_raise_data = HandRaiseService.toggle_hand(queue_id, token, "User")
+        assert result is HandRaiseToggle.LOWERED
+        assert hand_raise_data is None
+        assert test_db.session.query(HandRaise).count() == 0
+
+    def test_user_token_only_returned_to_user(self, test_db):
+        """Test the user's token stays out of broadcasts and lists (it is a credential)"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        token = str(uuid.uuid4())
+
+        with patch('services.hand_raise_service.EventService.broadcast_hand_raise_new') as mock_broadcast:
+            _, hand_raise_data = HandRaiseService.toggle_hand(queue_id, token, "User")
+
+        assert hand_raise_data['user_token'] == token
+        assert 'user_token' not in mock_broadcast.call_args[0][1]
+        assert 'user_token' not in HandRaiseService.get_hand_raises(queue_id)['active_hand_raises'][0]
+
+    def test_toggle_unknown_queue(self, test_db):
+        """Test a missing queue is told apart from a lowered hand"""
+        result, hand_raise_data = HandRaiseService.toggle_hand(str(uuid.uuid4()), str(uuid.uuid4()), "User")
+
+        assert result is HandRaiseToggle.QUEUE_NOT_FOUND
+        assert hand_raise_data is None
+
+    def test_one_active_raise_per_user(self, test_db):
+        """Test the partial unique index rejects a second active raise but not history"""
+        queue_data = QueueService.create_queue("Hands Queue")
+        queue_uuid = uuid.UUID(queue_data['id'])
+        token = str(uuid.uuid4())
+
+        test_db.session.add(HandRaise(queue_id=queue_uuid, user_token=token, user_name="User", completed=True))
+        test_db.session.add(HandRaise(queue_id=queue_uuid, user_token=token, user_name="User"))
+        test_db.session.commit()
+
+        test_db.session.add(HandRaise(queue_id=queue_uuid, user_token=token, user_name="User"))
+        with pytest.raises(IntegrityError):
+            test_db.session.commit()
+        test_db.session.rollback()
+
+class TestHandRaiseRoutes:
+
+    def test_lowering_skips_list_query(self, client):
+        """Test lowering a hand answers 200 without loading the hand raise list"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        body = {'user_token': str(uuid.uuid4()), 'user_name': 'User'}
+
+        assert client.post(f'/api/queues/{queue_id}/handraise', json=body).status_code == 201
+
+        with patch('routes.hand_raises.HandRaiseService.get_hand_raises') as mock_list:
+            response = client.post(f'/api/queues/{queue_id}/handraise', json=body)
+
+        assert response.status_code == 200
+        mock_list.assert_not_called()
+
+    def test_raise_hand_unknown_queue(self, client):
+        """Test raising a hand in a missing queue returns 404"""
+        body = {'user_token': str(uuid.uuid4()), 'user_name': 'User'}
+
+        response = client.post(f'/api/queues/{uuid.uuid4()}/handraise', json=body)
+
+        assert response.status_code == 404
+
+    def test_user_position(self, client):
+        """Test the position endpoint reports the raise and 404s for missing queues"""
+        queue_id = QueueService.create_queue("Hands Queue")['id']
+        token = str(uuid.uuid4())
+        HandRaiseService.raise_hand(queue_id, token, "User")
+
+        response = client.get(f'/api/queues/{queue_id}/user-position?user_token={token}')
+        assert response.get_json() == {'position': 1, 'has_raised_hand': True}
+
+        response = client.get(f'/api/queues/{uuid.uuid4()}/user-position?user_token={token}')
+        assert response.status_code == 404
+
+class TestHandRaiseBatch:
+
+    def _raise_hands(self, queue_id, count):
+        tokens = [str(uuid.uuid4()) for _ in range(count)]
+        return [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+
+    def test_advance_completes_next_speakers(self, test_db):
+        """Test advancing completes the first N raises with a single broadcast"""
+        queue_data = QueueService.create_queue("Panel Queue")
+        queue_id = queue_data['id']
+        raises = self._raise_hands(queue_id, 4)
+
+        with patch('services.hand_raise_service.EventService.broadcast_hand_raises_completed') as mock_broadcast, \
+             patch('services.hand_raise_service.EventService.broadcast_hand_raise_updated') as mock_single:
+            completed = HandRaiseService.advance_hand_raises(queue_id, queue_data['host_secret'], count=2)
+
+        assert [hand_raise['id'] for hand_raise in completed] == [raises[0]['id'], raises[1]['id']]
+        assert all(hand_raise['completed'] for hand_raise in completed)
+        mock_broadcast.assert_called_once_with(queue_id, completed)
+        mock_single.assert_not_called()
+        assert HandRaiseService.get_user_position(queue_id, raises[2]['user_token']) == 1
+
+    def test_complete_skips_inactive_raises(self, test_db):
+        """Test batch completion ignores raises that are already completed"""
+        queue_data = QueueService.create_queue("Panel Queue")
+        queue_id = queue_data['id']
+        raises = self._raise_hands(queue_id, 3)
+        HandRaiseService.update_hand_raise(queue_id, raises[0]['id'], queue_data['host_secret'], {"completed": True})
+
+        completed = HandRaiseService.complete_hand_raises(
+            queue_id, queue_data['host_secret'], [raises[0]['id'], raises[2]['id']]
+        )
+
+        assert [hand_raise['id'] for hand_raise in completed] == [raises[2]['id']]
+
+    def test_batch_requires_host(self, test_db):
+        """Test a wrong host secret completes nothing"""
+        queue_id = QueueService.create_queue("Panel Queue")['id']
+        self._raise_hands(queue_id, 1)
+
+        assert HandRaiseService.advance_hand_raises(queue_id, str(uuid.uuid4())) is None
+        assert HandRaiseService.get_hand_raises(queue_id)['total_active'] == 1
+
+    def test_advance_route(self, client):
+        """Test the advance endpoint validates count and returns the completed raises"""
+        queue_data = QueueService.create_queue("Panel Queue")
+        queue_id = queue_data['id']
+        self._raise_hands(queue_id, 2)
+        headers = {'X-Queue-Secret': queue_data['host_secret']}
+
+        assert client.post(f'/api/queues/{queue_id}/handraises/advance', json={'count': 0}, headers=headers).status_code == 400
+        assert client.post(f'/api/queues/{queue_id}/handraises/advance', json={'count': 1}).status_code == 401
+
+        response = client.post(f'/api/queues/{queue_id}/handraises/advance', json={'count': 5}, headers=headers)
+
+        assert response.status_code == 200
+        assert response.get_json()['total_completed'] == 2
+
+class TestHandRaiseListing:
+
+    def _raise_hands(self, queue_id, count):
+        tokens = [str(uuid.uuid4()) for _ in range(count)]
+        return [HandRaiseService.raise_hand(queue_id, token, f"User {i}") for i, token in enumerate(tokens)]
+
+    def test_active_pages_follow_raise_order(self, test_db):
+        """Test keyset pages walk the active raises without gaps or repeats"""
+        queue_id = QueueService.create_queue("Class Queue")['id']
+        raises = self._raise_hands(queue_id, 5)
+
+        first = HandRaiseService.get_hand_raises(queue_id, limit=2)
+        second = HandRaiseService.get_hand_raises(queue_id, limit=2, cursor=first['next_cursor'])
+        last = HandRaiseService.get_hand_raises(queue_id, limit=2, cursor=second['next_cursor'])
+
+        listed = first['active_hand_raises'] + second['active_hand_raises'] + last['active_hand_raises']
+        assert [hand_raise['id'] for hand_raise in listed] == [hand_raise['id'] for hand_raise in raises]
+        assert last['next_cursor'] is None
+        assert first['total_active'] == 5
+
+    def test_completed_history_is_capped(self, test_db):
+        """Test completed raises come newest first, capped by default"""
+        queue_data = QueueService.create_queue("Class Queue")
+        queue_id = queue_data['id']
+        self._raise_hands(queue_id, 3)
+        for _ in range(3):
+            HandRaiseService.advance_hand_raises(queue_id, queue_data['host_secret'])
+
+        with patch('services.hand_raise_service._config.HAND_RAISE_COMPLETED_HISTORY_LIMIT', 2):
+            data = HandRaiseService.get_hand_raises(queue_id, include_completed=True)
+
+        assert [hand_raise['user_name'] for hand_raise in data['completed_hand_raises']] == ["User 2", "User 1"]
+        assert data['total_completed'] == 3
+        assert data['total_active'] == 0
+
+        older = HandRaiseService.get_hand_raises(
+            queue_id, include_completed=True, completed_cursor=data['completed_next_cursor']
+        )
+        assert [hand_raise['user_name'] for hand_raise in older['completed_hand_raises']] == ["User 0"]
+
+    def test_counters_follow_writes(self, test_db):
+        """Test counters track raising, lowering and completion"""
+        queue_data = QueueService.create_queue("Class Queue")
+        queue_id = queue_data['id']
+        raises = self._raise_hands(queue_id, 3)
+        HandRaiseService.raise_hand(queue_id, raises[0]['user_token'], "User 0")
+        HandRaiseService.update_hand_raise(queue_id, raises[1]['id'], queue_data['host_secret'], {"completed": True})
+
+        data = HandRaiseService.get_hand_raises(queue_id)
+        assert (data['total_active'], data['total_completed']) == (1, 1)
+
+        HandRaiseService.recount_hand_raises()
+        data = HandRaiseService.get_hand_raises(queue_id)
+        assert (data['total_active'], data['total_completed']) == (1, 1)
+
+    def test_invalid_cursor(self, client):
+        """Test a malformed cursor is rejected"""
+        queue_id = QueueService.create_queue("Class Queue")['id']
+
+        response = client.get(f'/api/queues/{queue_id}/handraises?cursor=not-a-cursor')
+
+        assert response.status_code == 400
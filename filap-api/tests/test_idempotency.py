@@ -0,0 +1,163 @@
+import pytest
+import uuid
+from unittest.mock import patch
+from models.models import EventOutbox, Message
+from utils.idempotency import IdempotencyStore, DatabaseIdempotencyStore
+from services.queue_service import QueueService
+
+@pytest.mark.unit
+class TestIdempotencyStore:
+
+    def test_reserve_then_replay(self):
+        """Test a completed key returns its fingerprint and response"""
+        store = IdempotencyStore(ttl_seconds=60)
+
+        assert store.reserve("key", "abc", now=100.0) == (True, None, None)
+        assert store.reserve("key", "abc", now=101.0) == (False, "abc", None)
+
+        store.complete("key", (201, b"{}", "application/json"), now=101.0)
+        assert store.reserve("key", "abc", now=150.0) == (False, "abc", (201, b"{}", "application/json"))
+        assert store.reserve("key", "abc", now=162.0) == (True, None, None)
+
+    def test_release_frees_running_key(self):
+        """Test a released reservation can be taken again but a stored response stays"""
+        store = IdempotencyStore()
+        store.reserve("key", "abc", now=100.0)
+        store.release("key")
+        assert store.reserve("key", "abc", now=100.0)[0] is True
+
+        store.complete("key", (201, b"{}", "application/json"), now=100.0)
+        store.release("key")
+        assert store.reserve("key", "abc", now=100.0)[0] is False
+
+    def test_size_is_bounded(self):
+        """Test the oldest keys are evicted once the store is full"""
+        store = IdempotencyStore(max_entries=2)
+
+        for key in ("a", "b", "c"):
+            store.reserve(key, "abc", now=100.0)
+
+        assert list(store._entries) == ["b", "c"]
+
+class TestDatabaseIdempotencyStore:
+
+    def test_shared_store(self, test_db):
+        """Test the database store reserves, replays and expires like the in-memory one"""
+        store = DatabaseIdempotencyStore(ttl_seconds=60, lock_seconds=10)
+
+        assert store.reserve("key", "abc", now=100.0) == (True, None, None)
+        assert store.reserve("key", "abc", now=105.0) == (False, "abc", None)
+
+        store.complete("key", (201, b"{}", "application/json"), now=105.0)
+        assert store.reserve("key", "abc", now=150.0) == (False, "abc", (201, b"{}", "application/json"))
+        assert store.reserve("key", "xyz", now=170.0) == (True, None, None)
+
+    def test_prune_removes_expired_keys(self, test_db):
+        """Test expired keys are deleted"""
+        store = DatabaseIdempotencyStore(ttl_seconds=60, lock_seconds=10)
+        store.reserve("old", "abc", now=100.0)
+        store.reserve("new", "abc", now=200.0)
+
+        assert store.prune(now=201.0) == 1
+
+class TestIdempotentDecorator:
+
+    @pytest.fixture(autouse=True)
+    def store(self):
+        with patch('utils.idempotency.idempotency_store', IdempotencyStore()) as store:
+            yield store
+
+    def test_retry_returns_first_response(self, client, test_db):
+        """Test a retried message post is created and broadcast once"""
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        body = {'text': 'Question?', 'user_token': str(uuid.uuid4())}
+        headers = {'Idempotency-Key': 'attempt-1'}
+
+        with patch('services.events.sse_manager.broadcast_to_queue') as mock_broadcast:
+            first = client.post(f'/api/queues/{queue_id}/messages', json=body, headers=headers)
+            second = client.post(f'/api/queues/{queue_id}/messages', json=body, headers=headers)
+
+        assert first.status_code == second.status_code == 201
+        assert second.get_json() == first.get_json()
+        assert second.headers['Idempotent-Replayed'] == 'true'
+        assert test_db.session.query(Message).count() == 1
+        assert mock_broadcast.call_count == 1
+
+    def test_vote_retry_does_not_toggle_back(self, client):
+        """Test a retried upvote keeps the vote"""
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        message = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()
+        headers = {'X-User-Token': str(uuid.uuid4()), 'Idempotency-Key': 'vote-1'}
+
+        client.post(f'/api/messages/{message["id"]}/upvote', headers=headers)
+        retry = client.post(f'/api/messages/{message["id"]}/upvote', headers=headers)
+
+        assert retry.get_json()['has_user_voted'] is True
+        assert retry.get_json()['vote_count'] == 1
+
+    def test_key_reused_for_other_request(self, client):
+        """Test a key sent with a different body is rejected"""
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        user_token = str(uuid.uuid4())
+        headers = {'Idempotency-Key': 'attempt-1'}
+
+        client.post(f'/api/queues/{queue_id}/messages', json={'text': 'One', 'user_token': user_token}, headers=headers)
+        response = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Two', 'user_token': user_token}, headers=headers)
+
+        assert response.status_code == 422
+
+    def test_failed_request_is_not_stored(self, client, store):
+        """Test an error response leaves the key free for a corrected retry"""
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        headers = {'Idempotency-Key': 'attempt-1'}
+
+        response = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?'}, headers=headers)
+
+        assert response.status_code == 400
+        assert len(store._entries) == 0
+
+class TestGroupCommittedVotes:
+    """Votes the SQLite writer commits apart from the request"""
+
+    @pytest.fixture(autouse=True)
+    def writer(self):
+        from services.group_commit import sqlite_writer
+        if not sqlite_writer.enabled:
+            pytest.skip("SQLite group commit is not enabled")
+        return sqlite_writer
+
+    def test_idempotent_vote_commits_with_request(self, client, writer):
+        """Test a vote sent with an Idempotency-Key is not group committed"""
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        message = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()
+        headers = {'X-User-Token': str(uuid.uuid4())}
+
+        with patch.object(writer, 'submit', wraps=writer.submit) as mock_submit:
+            client.post(f'/api/messages/{message["id"]}/upvote', headers={**headers, 'Idempotency-Key': 'vote-1'})
+            assert mock_submit.call_count == 0
+
+            client.post(f'/api/messages/{message["id"]}/upvote', headers=headers)
+            assert mock_submit.call_count == 1
+
+    def test_vote_keeps_its_events_when_request_fails(self, client, test_db):
+        """Test a group-committed vote and its outbox events survive a later request failure"""
+        from routes.messages import MessageService as RouteMessageService
+        queue_id = QueueService.create_queue("Retry Queue")['id']
+        message = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()
+        upvote_message = RouteMessageService.upvote_message
+
+        def vote_then_fail(*args, **kwargs):
+            upvote_message(*args, **kwargs)
+            raise RuntimeError("boom")
+
+        with patch('routes.messages.MessageService.upvote_message', side_effect=vote_then_fail), \
+             patch('services.events.sse_manager') as mock_sse_manager:
+            response = client.post(f'/api/messages/{message["id"]}/upvote', headers={'X-User-Token': str(uuid.uuid4())})
+
+        assert response.status_code == 500
+        test_db.session.expire_all()
+        assert test_db.session.get(Message, uuid.UUID(message['id'])).vote_count == 1
+        stored = {event.event_type: event.id for event in test_db.session.query(EventOutbox).filter(EventOutbox.event_type != "new_message")}
+        assert sorted(stored) == ["message_updated", "vote_changed"]
+        assert mock_sse_manager.broadcast_to_queue.call_args.kwargs['event_id'] == stored["message_updated"]
+        assert mock_sse_manager.send_to.call_args.kwargs['event_id'] == stored["vote_changed"]
@@ -98,8 +98,8 @@ class TestMessageRoutes:
             'sort_by': 'newest'
         }
         
-        with patch('services.message_service.MessageService.get_messages') as mock_get:
-            mock_get.return_value = mock_result
+        with patch('services.message_service.MessageService.get_messages_json') as mock_get:
+            mock_get.return_value = json.dumps(mock_result)
             
             response = client.get('/api/queues/queue-123/messages')
             
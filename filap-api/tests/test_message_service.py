@@ -29,8 +29,9 @@ class TestMessageService:
         assert message_data['text'] == "Test message"
         assert message_data['author_name'] == "Test User"
         
-        # Verify SSE broadcast was called
-        mock_broadcast.assert_called_once_with(queue_id, message_data)
+        # Verify SSE broadcast was called (without the author's token)
+        public_data = {key: value for key, value in message_data.items() if key != 'user_token'}
+        mock_broadcast.assert_called_once_with(queue_id, public_data)
     
     def test_create_message_success(self, test_db):
         """Test successful message creation"""
@@ -54,6 +55,19 @@ class TestMessageService:
         assert message_data['vote_count'] == 0
         assert message_data['is_read'] == False
     
+    def test_user_token_only_returned_to_author(self, test_db):
+        """Test the author's token stays out of broadcasts and lists (it is a credential)"""
+        queue_id = QueueService.create_queue("Test Queue")['id']
+        user_token = str(uuid.uuid4())
+        
+        with patch('services.message_service.EventService.broadcast_new_message') as mock_broadcast:
+            message_data = MessageService.create_message(queue_id, "Test message", user_token)
+        
+        assert message_data['user_token'] == user_token
+        assert 'user_token' not in mock_broadcast.call_args[0][1]
+        assert 'user_token' not in MessageService.get_messages(queue_id)['messages'][0]
+        assert user_token not in MessageService.get_messages_json(queue_id)
+    
     def test_create_message_invalid_queue(self, test_db):
         """Test message creation with invalid queue"""
         fake_queue_id = str(uuid.uuid4())
@@ -89,8 +103,9 @@ class TestMessageService:
         assert upvoted_message is not None
         assert upvoted_message['vote_count'] == 1
         
-        # Verify SSE broadcast was called
-        mock_broadcast.assert_called_once_with(queue_id, upvoted_message)
+        # Verify SSE broadcast was called (stored with the vote under group commit)
+        mock_broadcast.assert_called_once()
+        assert mock_broadcast.call_args.args == (queue_id, upvoted_message)
     
     def test_upvote_message_success(self, test_db):
         """Test successful message upvoting"""
@@ -165,7 +180,47 @@ class TestMessageService:
         
         # Verify SSE broadcast was called
         mock_broadcast.assert_called_once_with(queue_id, updated_message)
-    
+
+    @patch('services.message_service.EventService.send_vote_changed')
+    def test_upvote_message_sends_private_vote_status(self, mock_send, test_db):
+        """Test the voter gets their own vote status on their private channel"""
+        queue_id = QueueService.create_queue("Test Queue")['id']
+        message_id = MessageService.create_message(queue_id, "Test message", str(uuid.uuid4()))['id']
+
+        voter_token = str(uuid.uuid4())
+        MessageService.upvote_message(message_id, voter_token)
+
+        mock_send.assert_called_once()
+        assert mock_send.call_args.args == (queue_id, voter_token, message_id, True, 1)
+
+    def test_get_messages_with_malformed_token(self, test_db):
+        """Test a token that is not a UUID lists messages without vote status"""
+        queue_id = QueueService.create_queue("Test Queue")['id']
+        MessageService.create_message(queue_id, "Test message", str(uuid.uuid4()))
+
+        data = MessageService.get_messages(queue_id, user_token="not-a-uuid")
+
+        assert data['total_count'] == 1
+        assert data['messages'][0]['has_user_voted'] is False
+
+    @patch('services.message_service.EventService.send_message_moderated')
+    def test_host_moderation_notifies_author(self, mock_send, test_db):
+        """Test the author is told when the host marks their message read"""
+        queue_data = QueueService.create_queue("Test Queue")
+        queue_id = queue_data['id']
+        author_token = str(uuid.uuid4())
+        message_id = MessageService.create_message(queue_id, "Test message", author_token)['id']
+
+        MessageService.update_message(
+            queue_id=queue_id,
+            message_id=message_id,
+            auth_token=queue_data['host_secret'],
+            updates={'is_read': True},
+            is_host=True
+        )
+
+        mock_send.assert_called_once_with(queue_id, author_token, message_id, "read")
+
     def test_update_message_by_author(self, test_db):
         """Test message update by author"""
         # Create queue and message
@@ -1,7 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
 import uuid
-from models.models import Queue, Message, MessageUpvote
+from models.models import Queue, Message, MessageUpvote, HandRaise
 from app import db
 
 @pytest.mark.unit
@@ -61,7 +61,7 @@ class TestQueueModel:
         # Create upvote
         upvote = MessageUpvote(
             message_id=message.id,
-            user_token="test-token"
+            user_token=str(uuid.uuid4())
         )
         test_db.session.add(upvote)
         test_db.session.commit()
@@ -164,16 +164,17 @@ class TestMessageUpvoteModel:
         test_db.session.add(message)
         test_db.session.commit()
         
+        voter_token = str(uuid.uuid4())
         upvote = MessageUpvote(
             message_id=message.id,
-            user_token="unique-voter-token"
+            user_token=voter_token
         )
         test_db.session.add(upvote)
         test_db.session.commit()
         
         assert upvote.id is not None
         assert upvote.message_id == message.id
-        assert upvote.user_token == "unique-voter-token"
+        assert upvote.user_token == voter_token
         assert upvote.created_at is not None
     
     def test_unique_constraint(self, test_db):
@@ -191,9 +192,10 @@ class TestMessageUpvoteModel:
         test_db.session.commit()
         
         # First upvote
+        voter_token = str(uuid.uuid4())
         upvote1 = MessageUpvote(
             message_id=message.id,
-            user_token="same-token"
+            user_token=voter_token
         )
         test_db.session.add(upvote1)
         test_db.session.commit()
@@ -201,7 +203,7 @@ class TestMessageUpvoteModel:
         # Second upvote with same token should fail
         upvote2 = MessageUpvote(
             message_id=message.id,
-            user_token="same-token"
+            user_token=voter_token
         )
         test_db.session.add(upvote2)
         
@@ -241,8 +243,8 @@ class TestModelRelationships:
         test_db.session.add(message)
         test_db.session.commit()
         
-        upvote1 = MessageUpvote(message_id=message.id, user_token="token1")
-        upvote2 = MessageUpvote(message_id=message.id, user_token="token2")
+        upvote1 = MessageUpvote(message_id=message.id, user_token=str(uuid.uuid4()))
+        upvote2 = MessageUpvote(message_id=message.id, user_token=str(uuid.uuid4()))
         test_db.session.add_all([upvote1, upvote2])
         test_db.session.commit()
         
@@ -253,4 +255,148 @@ class TestModelRelationships:
         
         # Test back reference
         assert upvote1.message == message
-        assert upvote2.message == message
\ No newline at end of file
+        assert upvote2.message == message
+class TestSchemaUpgrade:
+
+    def test_add_missing_columns(self, test_db):
+        """Test columns added to a model are added to an existing table"""
+        from sqlalchemy import text
+        from database import add_missing_columns
+        from models.models import Base
+
+        with test_db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE queues DROP COLUMN completed_hand_raise_count'))
+
+        assert add_missing_columns(Base.metadata) == [('queues', 'completed_hand_raise_count')]
+        assert add_missing_columns(Base.metadata) == []
+
+    def test_migrate_text_uuids_to_bytes(self, test_db):
+        """Test UUIDs stored as text are rewritten as 16 bytes"""
+        from sqlalchemy import text
+        from database import migrate_uuid_columns
+        from models.models import Base
+
+        queue = Queue(name="Legacy Queue")
+        test_db.session.add(queue)
+        test_db.session.commit()
+        message = Message(queue_id=queue.id, text="Legacy message", user_token=uuid.uuid4())
+        test_db.session.add(message)
+        test_db.session.commit()
+        voter_token = str(uuid.uuid4())
+        message_id = message.id
+
+        # Rows as the previous string columns stored them
+        with test_db.engine.begin() as connection:
+            connection.execute(text("PRAGMA defer_foreign_keys=ON"))
+            connection.execute(text("UPDATE queues SET id = :id"), {"id": queue.id.hex})
+            connection.execute(text("UPDATE messages SET id = :id, queue_id = :queue_id"), {"id": message_id.hex, "queue_id": queue.id.hex})
+            connection.execute(
+                text("INSERT INTO message_upvotes (id, message_id, user_token, created_at) VALUES (:id, :message_id, :user_token, CURRENT_TIMESTAMP)"),
+                {"id": uuid.uuid4().hex, "message_id": message_id.hex, "user_token": voter_token}
+            )
+        test_db.session.expire_all()
+
+        assert ('message_upvotes', 'user_token') in migrate_uuid_columns(Base.metadata)[0]
+        assert migrate_uuid_columns(Base.metadata) == ([], 0)
+
+        with test_db.engine.connect() as connection:
+            assert connection.execute(text("SELECT typeof(user_token), length(user_token) FROM message_upvotes")).one() == ('blob', 16)
+
+        upvote = test_db.session.query(MessageUpvote).filter_by(user_token=voter_token).one()
+        assert upvote.message_id == message_id
+        assert upvote.message.queue_id == queue.id
+
+    def test_migrate_skips_non_uuid_tokens(self, test_db):
+        """Test rows with a legacy non-UUID token are deleted instead of aborting the migration"""
+        from sqlalchemy import text
+        from database import migrate_uuid_columns
+        from models.models import Base
+
+        queue = Queue(name="Legacy Queue")
+        test_db.session.add(queue)
+        test_db.session.commit()
+        valid_token = str(uuid.uuid4())
+
+        with test_db.engine.begin() as connection:
+            for hand_raise_id, user_token in ((uuid.uuid4(), "legacy-token"), (uuid.uuid4(), valid_token)):
+                connection.execute(
+                    text("INSERT INTO hand_raises (id, queue_id, user_token, user_name, raised_at, completed) "
+                         "VALUES (:id, :queue_id, :user_token, 'User', CURRENT_TIMESTAMP, 0)"),
+                    {"id": hand_raise_id.bytes, "queue_id": queue.id.bytes, "user_token": user_token}
+                )
+
+        migrated, deleted_rows = migrate_uuid_columns(Base.metadata)
+        assert ('hand_raises', 'user_token') in migrated
+        assert deleted_rows == 1
+
+        assert [hand_raise.user_token for hand_raise in test_db.session.query(HandRaise).all()] == [valid_token]
+
+    def test_upgrade_recounts_after_deleting_legacy_rows(self, test_db):
+        """Test counters match the remaining rows once legacy token rows are deleted"""
+        from sqlalchemy import text
+        from app import create_tables
+
+        queue = Queue(name="Legacy Queue", active_hand_raise_count=2)
+        test_db.session.add(queue)
+        test_db.session.commit()
+        message = Message(queue_id=queue.id, text="Legacy message", user_token=uuid.uuid4(), vote_count=2)
+        test_db.session.add(message)
+        test_db.session.commit()
+
+        # Rows as a database from before token validation may hold them
+        with test_db.engine.begin() as connection:
+            for user_token in ("legacy-token", str(uuid.uuid4())):
+                connection.execute(
+                    text("INSERT INTO hand_raises (id, queue_id, user_token, user_name, raised_at, completed) "
+                         "VALUES (:id, :queue_id, :user_token, 'User', CURRENT_TIMESTAMP, 0)"),
+                    {"id": uuid.uuid4().bytes, "queue_id": queue.id.bytes, "user_token": user_token}
+                )
+                connection.execute(
+                    text("INSERT INTO message_upvotes (id, message_id, user_token, created_at) "
+                         "VALUES (:id, :message_id, :user_token, CURRENT_TIMESTAMP)"),
+                    {"id": uuid.uuid4().bytes, "message_id": message.id.bytes, "user_token": user_token}
+                )
+
+        create_tables()
+
+        test_db.session.expire_all()
+        assert test_db.session.query(HandRaise).count() == 1
+        assert test_db.session.query(MessageUpvote).count() == 1
+        assert test_db.session.get(Queue, queue.id).active_hand_raise_count == 1
+        assert test_db.session.get(Message, message.id).vote_count == 1
+
+    def test_unique_index_on_duplicate_active_raises(self, test_db):
+        """Test duplicate active raises from before the unique index are reduced to the earliest"""
+        from sqlalchemy import inspect, text
+        from app import create_tables
+
+        queue = Queue(name="Legacy Queue")
+        test_db.session.add(queue)
+        test_db.session.commit()
+        user_token, other_token = uuid.uuid4(), uuid.uuid4()
+        raised_at = datetime.utcnow()
+
+        # A table created before the index existed
+        with test_db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX uq_active_hand_raise"))
+
+        rows = [
+            (user_token, raised_at, False),
+            (user_token, raised_at + timedelta(seconds=1), False),
+            (user_token, raised_at - timedelta(seconds=1), True),
+            (other_token, raised_at + timedelta(seconds=2), False),
+        ]
+        for token, row_raised_at, completed in rows:
+            test_db.session.add(HandRaise(queue_id=queue.id, user_token=token, user_name="User", raised_at=row_raised_at, completed=completed))
+        test_db.session.commit()
+
+        create_tables()
+
+        assert 'uq_active_hand_raise' in {index["name"] for index in inspect(test_db.engine).get_indexes('hand_raises')}
+        active = test_db.session.query(HandRaise).filter_by(completed=False).order_by(HandRaise.raised_at).all()
+        assert [(hand_raise.user_token, hand_raise.raised_at) for hand_raise in active] == [
+            (str(user_token), raised_at), (str(other_token), raised_at + timedelta(seconds=2))
+        ]
+        assert test_db.session.query(HandRaise).filter_by(completed=True).count() == 1
+        test_db.session.refresh(queue)
+        assert (queue.active_hand_raise_count, queue.completed_hand_raise_count) == (2, 1)
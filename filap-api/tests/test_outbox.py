@@ -0,0 +1,189 @@
+import pytest
+import json
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from models.models import EventOutbox
+from services.events import SSEManager, user_recipient
+from services.outbox import OutboxRelay, replay_events, WORKER_ID
+from services.message_service import MessageService
+from services.queue_service import QueueService
+
+def _add_event(session, queue_id, event_type="new_message", recipient=None, origin="other-worker", **columns):
+    event = EventOutbox(
+        queue_id=uuid.UUID(queue_id), recipient=recipient, event_type=event_type,
+        data=json.dumps({"type": event_type}), origin=origin, **columns
+    )
+    session.add(event)
+    session.commit()
+    return event.id
+
+class TestOutboxWrites:
+
+    def test_write_request_stores_event(self, client, test_db):
+        """Test a write stores its event and delivers it locally with the outbox id"""
+        queue_id = QueueService.create_queue("Outbox Queue")['id']
+        user_token = client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token']
+
+        with patch('services.events.sse_manager.broadcast_to_queue') as mock_broadcast:
+            response = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': user_token})
+
+        assert response.status_code == 201
+        event = test_db.session.query(EventOutbox).one()
+        assert (event.event_type, event.origin) == ("new_message", WORKER_ID)
+        assert mock_broadcast.call_args.kwargs['event_id'] == event.id
+
+    def test_failed_request_stores_nothing(self, client, test_db):
+        """Test events of a rolled back request never reach the outbox"""
+        queue_id = QueueService.create_queue("Outbox Queue")['id']
+        user_token = client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token']
+
+        def create_then_fail(*args, **kwargs):
+            MessageService.create_message(*args, **kwargs)
+            raise RuntimeError("boom")
+
+        with patch('routes.messages.MessageService.create_message', side_effect=create_then_fail), \
+             patch('services.events.sse_manager.broadcast_to_queue') as mock_broadcast:
+            response = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': user_token})
+
+        assert response.status_code == 500
+        assert test_db.session.query(EventOutbox).count() == 0
+        mock_broadcast.assert_not_called()
+
+class TestOutboxRelay:
+
+    def test_relays_other_workers_events(self, test_db):
+        """Test the relay delivers new rows from other workers, in id order"""
+        queue_id = str(uuid.uuid4())
+        relay = OutboxRelay()
+        _add_event(test_db.session, queue_id)
+        relay.poll()  # Starts at the end of the outbox
+
+        first = _add_event(test_db.session, queue_id)
+        _add_event(test_db.session, queue_id, origin=WORKER_ID)
+        private = _add_event(test_db.session, queue_id, event_type="vote_changed", recipient=user_recipient("a"))
+
+        with patch('services.events.sse_manager') as mock_sse_manager:
+            assert relay.poll() == 2
+
+        mock_sse_manager.broadcast_to_queue.assert_called_once_with(queue_id, "new_message", {"type": "new_message"}, event_id=first)
+        mock_sse_manager.send_to.assert_called_once_with(
+            queue_id, user_recipient("a"), "vote_changed", {"type": "vote_changed"}, event_id=private
+        )
+
+    def test_relays_position_events(self, client, test_db):
+        """Test a hand lowered on another worker reaches the owner's channel and the users behind here"""
+        queue_id = QueueService.create_queue("Outbox Queue")['id']
+        first_token, second_token = (
+            client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token'] for _ in range(2)
+        )
+        for user_token, user_name in ((first_token, "First"), (second_token, "Second")):
+            client.post(f'/api/queues/{queue_id}/handraise', json={'user_token': user_token, 'user_name': user_name})
+
+        relay = OutboxRelay()
+        relay.poll()
+        manager = SSEManager()
+        _, first_queue = manager.add_connection(queue_id, [user_recipient(first_token)])
+        _, second_queue = manager.add_connection(queue_id, [user_recipient(second_token)])
+
+        # The first user lowers their hand on another worker
+        with patch('services.outbox.WORKER_ID', 'other-worker'), patch('services.events.sse_manager'):
+            client.post(f'/api/queues/{queue_id}/handraise', json={'user_token': first_token, 'user_name': "First"})
+
+        with patch('services.events.sse_manager', manager):
+            relay.poll()
+
+        events = {event.event_type: event.id for event in test_db.session.query(EventOutbox)}
+        owner_event = f"id: {events['position_changed']}\nevent: position_changed\ndata: {{\"queue_id\": \"{queue_id}\", \"position\": null}}\n\n"
+        shift_event = f"id: {events['positions_shifted']}\nevent: positions_shifted\ndata: {{\"from_position\": 2, \"delta\": -1}}\n\n"
+        assert owner_event in list(first_queue.queue)
+        assert owner_event not in list(second_queue.queue)
+        assert shift_event in list(second_queue.queue)
+
+    def test_late_commits_are_not_skipped(self, test_db):
+        """Test an id that commits after a higher one is still delivered"""
+        queue_id = str(uuid.uuid4())
+        relay = OutboxRelay()
+        last_id = _add_event(test_db.session, queue_id)
+        relay.poll()
+
+        _add_event(test_db.session, queue_id, id=last_id + 2)
+        with patch('services.events.sse_manager'):
+            relay.poll()
+
+        late = _add_event(test_db.session, queue_id, id=last_id + 1)
+        with patch('services.events.sse_manager') as mock_sse_manager:
+            assert relay.poll() == 1
+
+        assert mock_sse_manager.broadcast_to_queue.call_args.kwargs['event_id'] == late
+
+    def test_prune_keeps_recent_events(self, test_db):
+        """Test events past the retention period are deleted"""
+        queue_id = str(uuid.uuid4())
+        _add_event(test_db.session, queue_id, created_at=datetime.utcnow() - timedelta(hours=1))
+        _add_event(test_db.session, queue_id)
+
+        assert OutboxRelay(retention_seconds=600).prune() == 1
+        assert test_db.session.query(EventOutbox).count() == 1
+
+class TestOutboxReplay:
+
+    def test_replay_after_last_event_id(self, test_db):
+        """Test replay returns the queue's public and own private events after the id"""
+        queue_id = str(uuid.uuid4())
+        seen = _add_event(test_db.session, queue_id)
+        missed = _add_event(test_db.session, queue_id)
+        _add_event(test_db.session, str(uuid.uuid4()))
+        _add_event(test_db.session, queue_id, event_type="vote_changed", recipient=user_recipient("b"))
+        own = _add_event(test_db.session, queue_id, event_type="vote_changed", recipient=user_recipient("a"))
+
+        events, complete = replay_events(test_db.engine, queue_id, seen, [user_recipient("a")])
+
+        assert [event_id for event_id, _, _ in events] == [missed, own]
+        assert complete is True
+
+    def test_pruned_history_asks_for_resync(self, test_db):
+        """Test replay reports when missed events may already be gone"""
+        queue_id = str(uuid.uuid4())
+        first = _add_event(test_db.session, queue_id)
+
+        _, complete = replay_events(test_db.engine, queue_id, first - 5)
+
+        assert complete is False
+
+    def test_history_up_to_oldest_event_is_complete(self, test_db):
+        """Test a client that saw every pruned event needs no resync"""
+        queue_id = str(uuid.uuid4())
+        _add_event(test_db.session, queue_id, created_at=datetime.utcnow() - timedelta(hours=1))
+        last_pruned = _add_event(test_db.session, queue_id, created_at=datetime.utcnow() - timedelta(hours=1))
+        _add_event(test_db.session, queue_id)
+        OutboxRelay(retention_seconds=600).prune()
+
+        assert replay_events(test_db.engine, queue_id, last_pruned)[1] is True
+        assert replay_events(test_db.engine, queue_id, last_pruned - 1)[1] is False
+
+    def test_empty_outbox_is_complete(self, test_db):
+        """Test replay after everything was pruned reports complete"""
+        queue_id = str(uuid.uuid4())
+        last_pruned = _add_event(test_db.session, queue_id, created_at=datetime.utcnow() - timedelta(hours=1))
+        OutboxRelay(retention_seconds=600).prune()
+
+        events, complete = replay_events(test_db.engine, queue_id, last_pruned)
+
+        assert (events, complete) == ([], True)
+
+    @pytest.mark.unit
+    def test_stream_replays_then_skips_duplicates(self):
+        """Test a reconnecting stream gets missed events once"""
+        manager = SSEManager()
+        queue_id = str(uuid.uuid4())
+        stream = manager.create_event_stream(queue_id, replay=lambda: ([(7, "new_message", {"id": "m"})], True))
+
+        assert next(stream) == "data: {\"event\": \"connected\"}\n\n"
+        assert next(stream) == "id: 7\nevent: new_message\ndata: {\"id\": \"m\"}\n\n"
+
+        manager.broadcast_to_queue(queue_id, "new_message", {"id": "m"}, event_id=7)
+        manager.broadcast_to_queue(queue_id, "message_updated", {"id": "m"}, event_id=8)
+
+        assert next(stream) == "id: 8\nevent: message_updated\ndata: {\"id\": \"m\"}\n\n"
+        stream.close()
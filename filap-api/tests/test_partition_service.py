@@ -0,0 +1,50 @@
+import pytest
+import uuid
+from datetime import date
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+from services.partition_service import PartitionService, PARTITIONED_TABLES, PARTITION_KEY
+from services.queue_service import QueueService
+from services.message_service import MessageService
+from services.hand_raise_service import HandRaiseService
+from models.models import Queue, Message, MessageUpvote, HandRaise
+
+@pytest.mark.unit
+class TestPartitionedSchema:
+    
+    def test_partition_key_in_every_primary_key(self):
+        """Test partitioned tables include expires_on in their primary keys"""
+        metadata = PartitionService.build_partitioned_metadata()
+        
+        for table_name in PARTITIONED_TABLES:
+            table = metadata.tables[table_name]
+            assert PARTITION_KEY in [column.name for column in table.primary_key.columns]
+            assert table.dialect_options['postgresql']['partition_by'] == f"RANGE ({PARTITION_KEY})"
+    
+    def test_foreign_keys_are_composite_and_cascade(self):
+        """Test children reference parents within the same expiry day"""
+        metadata = PartitionService.build_partitioned_metadata()
+        ddl = str(CreateTable(metadata.tables['message_upvotes']).compile(dialect=postgresql.dialect()))
+        
+        assert "FOREIGN KEY(message_id, expires_on) REFERENCES messages (id, expires_on) ON DELETE CASCADE" in ddl
+        assert "UNIQUE (message_id, user_token, expires_on)" in ddl
+    
+    def test_partition_name(self):
+        """Test partition naming by expiry day"""
+        assert PartitionService.partition_name("messages", date(2024, 1, 31)) == "messages_p20240131"
+
+class TestPartitionKeyPopulation:
+    
+    def test_children_inherit_queue_expiry_day(self, test_db):
+        """Test rows carry their queue's expiry day"""
+        queue_data = QueueService.create_queue("Test Queue")
+        queue = test_db.session.query(Queue).filter_by(id=uuid.UUID(queue_data['id'])).first()
+        
+        message = MessageService.create_message(queue_data['id'], "Hello", str(uuid.uuid4()))
+        MessageService.upvote_message(message['id'], str(uuid.uuid4()))
+        HandRaiseService.raise_hand(queue_data['id'], str(uuid.uuid4()), "Speaker")
+        
+        assert queue.expires_on == queue.expires_at.date()
+        assert test_db.session.query(Message).one().expires_on == queue.expires_on
+        assert test_db.session.query(MessageUpvote).one().expires_on == queue.expires_on
+        assert test_db.session.query(HandRaise).one().expires_on == queue.expires_on
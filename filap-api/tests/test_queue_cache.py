@@ -0,0 +1,104 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from services.queue_cache import QueueMetadata, QueueMetadataCache, digest_host_secret, queue_cache
+from services.queue_service import QueueService
+
+def _metadata(expires_in_hours=1, host_secret=None):
+    return QueueMetadata(
+        id=uuid.uuid4(),
+        name="Test Queue",
+        default_sort_order="votes",
+        created_at=datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(hours=expires_in_hours),
+        host_secret_digest=digest_host_secret(host_secret or uuid.uuid4())
+    )
+
+@pytest.mark.unit
+class TestQueueMetadataCache:
+    
+    def test_miss_returns_sentinel(self):
+        """Test uncached ids return MISSING"""
+        cache = QueueMetadataCache()
+        assert cache.get(uuid.uuid4()) is cache.MISSING
+    
+    def test_put_and_get(self):
+        """Test cached metadata is returned"""
+        cache = QueueMetadataCache()
+        metadata = _metadata()
+        cache.put(metadata.id, metadata)
+        assert cache.get(metadata.id) == metadata
+    
+    def test_negative_entry(self):
+        """Test unknown ids are cached as None"""
+        cache = QueueMetadataCache()
+        queue_uuid = uuid.uuid4()
+        cache.put(queue_uuid, None)
+        assert cache.get(queue_uuid) is None
+    
+    def test_entries_expire(self):
+        """Test entries are dropped after their TTL"""
+        cache = QueueMetadataCache(ttl_seconds=10)
+        metadata = _metadata()
+        
+        with patch('services.queue_cache.time.monotonic', return_value=100.0):
+            cache.put(metadata.id, metadata)
+        with patch('services.queue_cache.time.monotonic', return_value=111.0):
+            assert cache.get(metadata.id) is cache.MISSING
+    
+    def test_invalidate(self):
+        """Test explicit invalidation"""
+        cache = QueueMetadataCache()
+        metadata = _metadata()
+        cache.put(metadata.id, metadata)
+        cache.invalidate(metadata.id)
+        assert cache.get(metadata.id) is cache.MISSING
+    
+    def test_check_host_secret(self):
+        """Test host secret check against the digest"""
+        host_secret = uuid.uuid4()
+        metadata = _metadata(host_secret=host_secret)
+        
+        assert metadata.check_host_secret(host_secret) is True
+        assert metadata.check_host_secret(uuid.uuid4()) is False
+    
+    def test_is_expired(self):
+        """Test expiry check"""
+        assert _metadata(expires_in_hours=-1).is_expired() is True
+        assert _metadata(expires_in_hours=1).is_expired() is False
+
+class TestQueueServiceCaching:
+    
+    def test_unknown_queue_is_negatively_cached(self, test_db):
+        """Test repeated lookups of an unknown id hit the database once"""
+        queue_uuid = uuid.uuid4()
+        
+        assert QueueService.get_queue_metadata(queue_uuid) is None
+        assert queue_cache.get(queue_uuid) is None
+        
+        with patch('services.queue_service.db.session.query') as mock_query:
+            assert QueueService.get_queue(str(queue_uuid)) is None
+            mock_query.assert_not_called()
+    
+    def test_get_queue_served_from_cache(self, test_db):
+        """Test created queues are served without a database query"""
+        created = QueueService.create_queue(name="Cached Queue")
+        
+        with patch('services.queue_service.db.session.query') as mock_query:
+            result = QueueService.get_queue(created['id'])
+            assert QueueService.verify_host_access(created['id'], created['host_secret']) is True
+            mock_query.assert_not_called()
+        
+        assert result['name'] == "Cached Queue"
+        assert result['expires_at'] == created['expires_at']
+    
+    @patch('services.queue_service.EventService.broadcast_queue_updated')
+    def test_update_queue_invalidates_cache(self, mock_broadcast, test_db):
+        """Test update_queue drops stale metadata"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        QueueService.update_queue(created['id'], created['host_secret'], {"default_sort_order": "newest"})
+        
+        assert queue_cache.get(uuid.UUID(created['id'])) is queue_cache.MISSING
+        assert QueueService.get_queue(created['id'])['default_sort_order'] == "newest"
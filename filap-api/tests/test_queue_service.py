@@ -1,6 +1,9 @@
 import pytest
+import uuid
+from datetime import datetime, timedelta
 from unittest.mock import patch
 from services.queue_service import QueueService
+from models.models import Queue, Message, MessageUpvote, HandRaise
 
 @pytest.mark.unit
 class TestQueueService:
@@ -45,4 +48,48 @@ class TestQueueService:
         result = QueueService.update_queue(queue_id, host_secret, updates)
         
         # Verify SSE broadcast was called
-        mock_broadcast.assert_called_once_with(queue_id, result)
\ No newline at end of file
+        mock_broadcast.assert_called_once_with(queue_id, result)
+    
+    def test_cleanup_expired_queues_cascades_in_database(self, test_db):
+        """Test expired queue cleanup removes children via ON DELETE CASCADE"""
+        queue = Queue(name="Old Queue", expires_at=datetime.utcnow() - timedelta(hours=1))
+        live_queue = Queue(name="Live Queue")
+        test_db.session.add_all([queue, live_queue])
+        test_db.session.commit()
+        
+        message = Message(queue_id=queue.id, text="Old", user_token=uuid.uuid4())
+        test_db.session.add(message)
+        test_db.session.commit()
+        test_db.session.add_all([
+            MessageUpvote(message_id=message.id, user_token=str(uuid.uuid4())),
+            HandRaise(queue_id=queue.id, user_token=str(uuid.uuid4()), user_name="Speaker")
+        ])
+        test_db.session.commit()
+        test_db.session.expunge_all()
+        
+        count = QueueService.cleanup_expired_queues()
+        
+        assert count == 1
+        assert test_db.session.query(Queue).count() == 1
+        assert test_db.session.query(Message).count() == 0
+        assert test_db.session.query(MessageUpvote).count() == 0
+        assert test_db.session.query(HandRaise).count() == 0
+    
+    def test_expired_queue_is_404_without_writes(self, test_db):
+        """Test request paths treat expired queues as missing and leave deletion to the reaper"""
+        queue = Queue(name="Old Queue", expires_at=datetime.utcnow() - timedelta(hours=1))
+        test_db.session.add(queue)
+        test_db.session.commit()
+        
+        assert QueueService.get_queue(str(queue.id)) is None
+        assert test_db.session.query(Queue).count() == 1
+    
+    def test_cleanup_expired_queues_in_batches(self, test_db):
+        """Test cleanup deletes in bounded chunks"""
+        expired_at = datetime.utcnow() - timedelta(hours=1)
+        test_db.session.add_all([Queue(expires_at=expired_at) for _ in range(5)])
+        test_db.session.commit()
+        
+        assert QueueService.cleanup_expired_queues(batch_size=2, max_batches=1) == 2
+        assert QueueService.cleanup_expired_queues(batch_size=2) == 3
+        assert test_db.session.query(Queue).count() == 0
\ No newline at end of file
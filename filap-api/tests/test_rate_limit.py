@@ -0,0 +1,165 @@
+import pytest
+import uuid
+from unittest.mock import patch
+from utils.rate_limit import TokenBucketLimiter, DatabaseTokenBucketLimiter
+from services.queue_service import QueueService
+
+@pytest.mark.unit
+class TestTokenBucketLimiter:
+
+    def test_allows_burst_then_limits(self):
+        """Test a full bucket allows its capacity and then rejects"""
+        limiter = TokenBucketLimiter(rate_per_minute=60, burst=3)
+
+        assert [limiter.acquire("key", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("key", now=100.0) == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        """Test tokens refill at the configured rate"""
+        limiter = TokenBucketLimiter(rate_per_minute=60, burst=1)
+
+        assert limiter.acquire("key", now=100.0) == 0.0
+        assert limiter.acquire("key", now=100.5) == pytest.approx(0.5)
+        assert limiter.acquire("key", now=101.5) == 0.0
+
+    def test_keys_are_independent(self):
+        """Test one key running dry does not affect another"""
+        limiter = TokenBucketLimiter(rate_per_minute=60, burst=1)
+
+        assert limiter.acquire("a", now=100.0) == 0.0
+        assert limiter.acquire("a", now=100.0) > 0
+        assert limiter.acquire("b", now=100.0) == 0.0
+
+    def test_shard_size_is_bounded(self):
+        """Test old keys are evicted once a shard is full"""
+        limiter = TokenBucketLimiter(rate_per_minute=60, shard_count=1, max_keys_per_shard=2)
+
+        for key in ("a", "b", "c"):
+            limiter.acquire(key, now=100.0)
+
+        assert list(limiter._shards[0]) == ["b", "c"]
+
+class TestDatabaseTokenBucketLimiter:
+
+    def test_shared_bucket(self, test_db):
+        """Test the database bucket limits and refills like the in-memory one"""
+        limiter = DatabaseTokenBucketLimiter(rate_per_minute=60, burst=2)
+
+        assert limiter.acquire("key", now=100.0) == 0.0
+        assert limiter.acquire("key", now=100.0) == 0.0
+        assert limiter.acquire("key", now=100.0) == pytest.approx(1.0)
+        assert limiter.acquire("key", now=101.0) == 0.0
+
+    def test_prune_removes_refilled_buckets(self, test_db):
+        """Test buckets idle long enough to refill are deleted"""
+        limiter = DatabaseTokenBucketLimiter(rate_per_minute=60, burst=2)
+        limiter.acquire("old", now=100.0)
+        limiter.acquire("new", now=200.0)
+
+        assert limiter.prune(now=201.0) == 1
+
+class TestRateLimitDecorator:
+
+    def test_returns_429_with_retry_after(self, test_app, client):
+        """Test a client over its limit gets 429 and Retry-After"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        body = {'text': 'Question?', 'user_token': str(uuid.uuid4())}
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.client_limiter', TokenBucketLimiter(rate_per_minute=6, burst=1)):
+            first = client.post(f'/api/queues/{queue_id}/messages', json=body)
+            second = client.post(f'/api/queues/{queue_id}/messages', json=body)
+
+        assert first.status_code == 201
+        assert second.status_code == 429
+        assert second.headers['Retry-After'] == '10'
+        assert second.get_json()['error'] == 'Rate limit exceeded'
+
+    def test_queue_limit_applies_across_clients(self, test_app, client):
+        """Test the per-queue bucket is shared by every user token"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.queue_limiter', TokenBucketLimiter(rate_per_minute=60, burst=1)):
+            first = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'One', 'user_token': str(uuid.uuid4())})
+            second = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Two', 'user_token': str(uuid.uuid4())})
+
+        assert first.status_code == 201
+        assert second.status_code == 429
+
+    def test_queue_id_spellings_share_a_bucket(self, test_app, client):
+        """Test other spellings of the same queue id hit the same queue limit"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        spellings = [
+            queue_id, queue_id.upper(), queue_id.replace('-', ''),
+            f'{{{queue_id}}}', f'urn:uuid:{queue_id}'
+        ]
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.queue_limiter', TokenBucketLimiter(rate_per_minute=60, burst=1)):
+            responses = [
+                client.post(f'/api/queues/{spelling}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())})
+                for spelling in spellings
+            ]
+
+        assert [response.status_code for response in responses] == [201, 429, 429, 429, 429]
+
+    def test_signed_token_spellings_share_a_bucket(self, test_app, client):
+        """Test other spellings of one signed token hit the same client limit"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        message_id = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()['id']
+        token = client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token']
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.client_limiter', TokenBucketLimiter(rate_per_minute=6, burst=1)):
+            responses = [
+                client.post(f'/api/messages/{message_id}/upvote', headers={'X-User-Token': spelling})
+                for spelling in (token, token.upper(), token.replace('-', ''), f'urn:uuid:{token}')
+            ]
+
+        assert responses[0].status_code == 201
+        assert all(response.status_code == 429 for response in responses[1:])
+
+    def test_rotating_vote_tokens_share_a_bucket(self, test_app, client):
+        """Test votes with a fresh unsigned token each time still hit the client limit"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        message_id = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()['id']
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.client_limiter', TokenBucketLimiter(rate_per_minute=6, burst=1)):
+            first = client.post(f'/api/messages/{message_id}/upvote', headers={'X-User-Token': str(uuid.uuid4())})
+            second = client.post(f'/api/messages/{message_id}/upvote', headers={'X-User-Token': str(uuid.uuid4())})
+
+        assert first.status_code == 201
+        assert second.status_code == 429
+
+    def test_signed_vote_tokens_get_own_buckets(self, test_app, client):
+        """Test tokens minted for the queue are limited separately"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        message_id = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()['id']
+        tokens = [client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token'] for _ in range(2)]
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.client_limiter', TokenBucketLimiter(rate_per_minute=6, burst=1)):
+            responses = [client.post(f'/api/messages/{message_id}/upvote', headers={'X-User-Token': token}) for token in tokens]
+
+        assert [response.status_code for response in responses] == [201, 201]
+
+    def test_queue_limit_applies_to_votes(self, test_app, client):
+        """Test votes count against the message's queue bucket"""
+        queue_id = QueueService.create_queue("Limited Queue")['id']
+        message_id = client.post(f'/api/queues/{queue_id}/messages', json={'text': 'Question?', 'user_token': str(uuid.uuid4())}).get_json()['id']
+        tokens = [client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token'] for _ in range(2)]
+
+        with patch.dict(test_app.config, {'RATE_LIMIT_ENABLED': True}), \
+             patch('utils.rate_limit.queue_limiter', TokenBucketLimiter(rate_per_minute=60, burst=1)):
+            responses = [client.post(f'/api/messages/{message_id}/upvote', headers={'X-User-Token': token}) for token in tokens]
+
+        assert [response.status_code for response in responses] == [201, 429]
+
+    def test_disabled_in_testing(self, client):
+        """Test the limiter is bypassed when RATE_LIMIT_ENABLED is off"""
+        with patch('utils.rate_limit.client_limiter', TokenBucketLimiter(rate_per_minute=6, burst=1)):
+            responses = [client.post('/api/queues', json={}) for _ in range(3)]
+
+        assert all(response.status_code == 201 for response in responses)
@@ -1,4 +1,8 @@
 import pytest
+import uuid
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from models.models import Queue
 from services.queue_service import QueueService
 
 class TestSSEEndpoint:
@@ -41,4 +45,55 @@ class TestSSEEndpoint:
         response = client.get('/api/queues/invalid-uuid/events')
         
         # Should return 400 for malformed UUID, which gets converted to 404 by our validation
-        assert response.status_code in [400, 404]
\ No newline at end of file
+        assert response.status_code in [400, 404]
+    
+    def test_sse_endpoint_expired_queue(self, test_db, client):
+        """Test SSE endpoint refuses to subscribe to an expired queue"""
+        queue = Queue(name="Old Queue", expires_at=datetime.utcnow() - timedelta(hours=1))
+        test_db.session.add(queue)
+        test_db.session.commit()
+        
+        response = client.get(f'/api/queues/{queue.id}/events')
+        
+        assert response.status_code == 404
+        assert response.get_json()['error'] == 'Queue not found or expired'
+class TestStreamTicket:
+    """Private channels are opened with a short-lived ticket, not the user token"""
+    
+    def test_ticket_opens_private_channel(self, test_db, client):
+        """Test a ticket from a valid token is accepted by the event stream"""
+        queue_id = QueueService.create_queue("Ticket Queue")['id']
+        user_token = client.post(f'/api/queues/{queue_id}/user-token').get_json()['user_token']
+        
+        response = client.post(f'/api/queues/{queue_id}/events/ticket', headers={'X-User-Token': user_token})
+        
+        assert response.status_code == 201
+        ticket = response.get_json()['ticket']
+        assert user_token not in ticket
+        assert client.get(f'/api/queues/{queue_id}/events?ticket={ticket}').status_code == 200
+    
+    def test_invalid_tickets_rejected(self, test_db, client):
+        """Test forged tickets and tickets of another queue are refused"""
+        queue_id = QueueService.create_queue("Ticket Queue")['id']
+        other_queue_id = QueueService.create_queue("Other Queue")['id']
+        user_token = client.post(f'/api/queues/{other_queue_id}/user-token').get_json()['user_token']
+        ticket = client.post(f'/api/queues/{other_queue_id}/events/ticket', headers={'X-User-Token': user_token}).get_json()['ticket']
+        
+        assert client.get(f'/api/queues/{queue_id}/events?ticket={ticket}').status_code == 400
+        assert client.get(f'/api/queues/{queue_id}/events?ticket=not-a-ticket').status_code == 400
+    
+    def test_ticket_requires_user_token(self, test_db, client):
+        """Test the ticket endpoint checks the user token"""
+        queue_id = QueueService.create_queue("Ticket Queue")['id']
+        
+        assert client.post(f'/api/queues/{queue_id}/events/ticket').status_code == 400
+        assert client.post(f'/api/queues/{queue_id}/events/ticket', headers={'X-User-Token': 'nope'}).status_code == 403
+    
+    def test_no_tickets_without_secret_key(self, test_db, client):
+        """Test private channels are unavailable until SECRET_KEY is configured"""
+        queue_id = QueueService.create_queue("Ticket Queue")['id']
+        
+        with patch('utils.tokens._secret_key', None):
+            response = client.post(f'/api/queues/{queue_id}/events/ticket', headers={'X-User-Token': str(uuid.uuid4())})
+        
+        assert response.status_code == 503
@@ -0,0 +1,137 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.engine.interfaces import CacheStats
+from services.stats import SystemStats, StatementCacheStats, statement_cache_stats, system_stats
+from services.queue_service import QueueService
+from services.message_service import MessageService
+from services.hand_raise_service import HandRaiseService
+from models.models import Queue
+
+@pytest.mark.unit
+class TestSystemStats:
+
+    def test_write_time_counters(self):
+        """Test increments update the global totals"""
+        stats = SystemStats()
+        queue_id = str(uuid.uuid4())
+
+        stats.queue_created(queue_id, datetime.utcnow() + timedelta(hours=1))
+        stats.message_created(queue_id)
+        stats.message_created(queue_id)
+        stats.vote_changed(queue_id, 1)
+        stats.hand_raise_changed(queue_id, 1)
+        stats.message_deleted(queue_id, vote_count=1)
+
+        assert stats.snapshot() == {
+            "active_queues": 1,
+            "total_messages": 1,
+            "total_votes": 0,
+            "active_hand_raises": 1
+        }
+
+    def test_expired_queues_drop_out(self):
+        """Test an expired queue's counters leave the totals"""
+        stats = SystemStats()
+        queue_id = str(uuid.uuid4())
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+
+        stats.queue_created(queue_id, expires_at)
+        stats.message_created(queue_id)
+
+        snapshot = stats.snapshot(now=expires_at + timedelta(seconds=1))
+        assert snapshot["active_queues"] == 0
+        assert snapshot["total_messages"] == 0
+
+    def test_top_queues_by_activity(self):
+        """Test the detailed listing ranks queues by activity"""
+        stats = SystemStats()
+        quiet, busy = str(uuid.uuid4()), str(uuid.uuid4())
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+
+        stats.queue_created(quiet, expires_at)
+        stats.queue_created(busy, expires_at)
+        stats.message_created(quiet)
+        stats.message_created(busy)
+        stats.vote_changed(busy, 3)
+
+        top = stats.top_queues(limit=1)
+        assert [entry["id"] for entry in top] == [busy]
+        assert top[0]["activity"] == 4
+
+class TestSystemStatsReconcile:
+
+    def test_reconcile_matches_database(self, test_db):
+        """Test counters rebuilt from the database ignore expired queues"""
+        queue_id = QueueService.create_queue("Live Queue")['id']
+        MessageService.create_message(queue_id, "Question?", str(uuid.uuid4()))
+        HandRaiseService.raise_hand(queue_id, str(uuid.uuid4()), "Ana")
+
+        test_db.session.add(Queue(name="Old Queue", expires_at=datetime.utcnow() - timedelta(hours=1)))
+        test_db.session.commit()
+
+        stats = SystemStats()
+        stats.reconcile()
+
+        assert stats.snapshot() == {
+            "active_queues": 1,
+            "total_messages": 1,
+            "total_votes": 0,
+            "active_hand_raises": 1
+        }
+
+    def test_stats_endpoint(self, client):
+        """Test the endpoint reports counters and the detailed listing"""
+        queue_id = QueueService.create_queue("Live Queue")['id']
+        MessageService.create_message(queue_id, "Question?", str(uuid.uuid4()))
+
+        response = client.get('/api/system/stats?detailed&limit=5')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["active_queues"] == 1
+        assert data["total_messages"] == 1
+        assert data["sse_connections"] == 0
+        assert data["top_queues"][0]["id"] == queue_id
+        assert data["top_queues"][0]["messages"] == 1
+
+    def test_counters_follow_writes_without_reconcile(self, test_db):
+        """Test writes after a reconcile are counted at write time"""
+        system_stats.reconcile()
+        queue_id = QueueService.create_queue("Live Queue")['id']
+        MessageService.create_message(queue_id, "Question?", str(uuid.uuid4()))
+
+        assert not system_stats.needs_reconcile()
+        assert QueueService.get_queue_stats()["total_messages"] == 1
+
+class TestStatementCacheStats:
+
+    @pytest.mark.unit
+    def test_hit_rate(self):
+        """Test the hit rate only counts cacheable statements"""
+        stats = StatementCacheStats()
+        assert stats.snapshot()["hit_rate"] is None
+
+        for cache_hit in (CacheStats.CACHE_HIT, CacheStats.CACHE_HIT, CacheStats.CACHE_HIT, CacheStats.CACHE_MISS, CacheStats.NO_CACHE_KEY):
+            stats.record(cache_hit)
+
+        assert stats.snapshot() == {"hits": 3, "misses": 1, "uncached": 1, "hit_rate": 0.75}
+
+    def test_messages_page_reuses_compiled_statements(self, test_db):
+        """Test a page with other bound values compiles nothing new"""
+        first = QueueService.create_queue("First Queue")['id']
+        second = QueueService.create_queue("Second Queue")['id']
+        MessageService.get_messages(first, str(uuid.uuid4()), sort_by="votes", limit=10)
+
+        statement_cache_stats.reset()
+        MessageService.get_messages(second, str(uuid.uuid4()), sort_by="votes", limit=20, offset=5)
+
+        snapshot = statement_cache_stats.snapshot()
+        assert snapshot["misses"] == 0
+        assert snapshot["hits"] >= 2
+
+    def test_stats_endpoint_reports_cache(self, client):
+        """Test the endpoint includes the worker's statement cache counters"""
+        response = client.get('/api/system/stats')
+
+        assert set(response.get_json()["statement_cache"]) == {"hits", "misses", "uncached", "hit_rate"}
@@ -0,0 +1,156 @@
+import pytest
+import hashlib
+import hmac
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from config import DEFAULT_SECRET_KEY
+from utils.tokens import _load_secret_key, issue_host_token, verify_host_token, issue_user_token, verify_user_token
+from services.queue_service import QueueService
+from services.message_service import MessageService
+from services.user_service import UserService
+
+@pytest.mark.unit
+class TestHostTokens:
+    
+    def test_issue_and_verify(self):
+        """Test a freshly issued token verifies"""
+        queue_id = uuid.uuid4()
+        token = issue_host_token(queue_id, datetime.utcnow() + timedelta(hours=1))
+        
+        assert uuid.UUID(token)  # UUID-shaped
+        assert verify_host_token(queue_id, token) is True
+    
+    def test_token_bound_to_queue(self):
+        """Test a token does not verify for another queue"""
+        token = issue_host_token(uuid.uuid4(), datetime.utcnow() + timedelta(hours=1))
+        assert verify_host_token(uuid.uuid4(), token) is False
+    
+    def test_expired_token(self):
+        """Test tokens stop verifying after expiry"""
+        queue_id = uuid.uuid4()
+        token = issue_host_token(queue_id, datetime.utcnow() - timedelta(seconds=5))
+        assert verify_host_token(queue_id, token) is False
+    
+    def test_tampered_token(self):
+        """Test a modified expiry invalidates the signature"""
+        queue_id = uuid.uuid4()
+        token = uuid.UUID(issue_host_token(queue_id, datetime.utcnow() + timedelta(hours=1)))
+        raw = bytearray(token.bytes)
+        raw[3] ^= 0x01
+        assert verify_host_token(queue_id, str(uuid.UUID(bytes=bytes(raw)))) is False
+    
+    def test_malformed_token(self):
+        """Test malformed input is rejected"""
+        assert verify_host_token(uuid.uuid4(), "not-a-token") is False
+
+class TestSignedHostAccess:
+    
+    def test_create_queue_issues_host_token(self, test_db):
+        """Test queue creation returns a signed host token"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        assert "host_token" in created
+        assert created["host_token"] != created["host_secret"]
+    
+    def test_host_token_verified_without_database(self, test_db):
+        """Test signed host tokens skip the queue lookup"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        with patch('services.queue_service.QueueService.get_queue_metadata') as mock_lookup:
+            assert QueueService.verify_host_access(created['id'], created['host_token']) is True
+            mock_lookup.assert_not_called()
+    
+    def test_legacy_secret_still_accepted(self, test_db):
+        """Test plain host secrets fall back to the queue lookup"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        assert QueueService.verify_host_access(created['id'], created['host_secret']) is True
+        assert QueueService.verify_host_access(created['id'], str(uuid.uuid4())) is False
+
+class TestDefaultSecretKey:
+    """The default SECRET_KEY is public, so nothing signed with it is trusted"""
+    
+    @pytest.fixture(autouse=True)
+    def default_key(self):
+        with patch('utils.tokens._secret_key', _load_secret_key(DEFAULT_SECRET_KEY)):
+            yield
+    
+    def test_token_signed_with_default_key_rejected(self, test_db):
+        """Test a host token forged with the default key does not grant host access"""
+        created = QueueService.create_queue(name="Test Queue")
+        queue_id = uuid.UUID(created['id'])
+        
+        expiry = int(datetime.now().timestamp() + 3600).to_bytes(4, "big")
+        tag = hmac.new(DEFAULT_SECRET_KEY.encode("utf-8"), b"filap-host-token-v1|" + queue_id.bytes + b"|" + expiry, hashlib.sha256).digest()
+        forged = str(uuid.UUID(bytes=expiry + tag[:12]))
+        
+        assert QueueService.verify_host_access(created['id'], forged) is False
+    
+    def test_no_signed_tokens_issued(self, test_db):
+        """Test queues get no host token and user tokens are unsigned"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        assert "host_token" not in created
+        assert QueueService.verify_host_access(created['id'], created['host_secret']) is True
+        with pytest.raises(RuntimeError):
+            issue_host_token(uuid.uuid4(), datetime.utcnow() + timedelta(hours=1))
+        assert verify_user_token(uuid.UUID(created['id']), issue_user_token(uuid.UUID(created['id']))) is False
+
+
+@pytest.mark.unit
+class TestUserTokens:
+    
+    def test_issue_and_verify(self):
+        """Test a freshly issued user token verifies for its queue only"""
+        queue_id = uuid.uuid4()
+        token = issue_user_token(queue_id)
+        
+        assert uuid.UUID(token)  # UUID-shaped
+        assert verify_user_token(queue_id, token) is True
+        assert verify_user_token(uuid.uuid4(), token) is False
+    
+    def test_tokens_are_unique(self):
+        """Test each mint produces a new identity"""
+        queue_id = uuid.uuid4()
+        assert issue_user_token(queue_id) != issue_user_token(queue_id)
+    
+    def test_host_token_is_not_a_user_token(self):
+        """Test token domains are separated"""
+        queue_id = uuid.uuid4()
+        host_token = issue_host_token(queue_id, datetime.utcnow() + timedelta(hours=1))
+        assert verify_user_token(queue_id, host_token) is False
+
+class TestSignedUserAccess:
+    
+    def test_generate_user_token_is_signed(self, test_db):
+        """Test minted tokens verify against the queue"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        token_data = UserService.generate_user_token(created['id'])
+        
+        assert verify_user_token(uuid.UUID(created['id']), token_data['user_token']) is True
+    
+    def test_unsigned_token_rejected_when_required(self, test_db):
+        """Test legacy tokens are refused once signing is enforced"""
+        created = QueueService.create_queue(name="Test Queue")
+        
+        with patch('services.user_service._config.REQUIRE_SIGNED_USER_TOKENS', True):
+            with pytest.raises(ValueError):
+                MessageService.create_message(created['id'], "Hello", str(uuid.uuid4()))
+            
+            signed = UserService.generate_user_token(created['id'])['user_token']
+            message = MessageService.create_message(created['id'], "Hello", signed)
+        
+        assert message['user_token'] == signed
+    
+    def test_token_for_other_queue_rejected(self, test_db):
+        """Test a token minted for one queue cannot vote in another"""
+        queue_a = QueueService.create_queue(name="A")
+        queue_b = QueueService.create_queue(name="B")
+        message = MessageService.create_message(queue_a['id'], "Hello", str(uuid.uuid4()))
+        foreign_token = UserService.generate_user_token(queue_b['id'])['user_token']
+        
+        with patch('services.user_service._config.REQUIRE_SIGNED_USER_TOKENS', True):
+            with pytest.raises(ValueError):
+                MessageService.upvote_message(message['id'], foreign_token)
@@ -1,7 +1,10 @@
 from flask import request
 from functools import wraps
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from services.queue_service import QueueService
+from services.events import channel_recipient
+from utils.tokens import verify_stream_ticket
+import uuid
 
 def extract_host_secret() -> Optional[str]:
     """
@@ -21,6 +24,26 @@ def extract_user_token() -> Optional[str]:
     """
     return request.headers.get('Voter-Token')
 
+def extract_stream_recipients(queue_id: str) -> Optional[List[str]]:
+    """
+    Resolve the private channels an SSE connection asks for
+    
+    EventSource cannot send headers, so the connection presents a
+    short-lived stream ticket (?ticket=) instead of the user token.
+    
+    Returns:
+        Recipient keys (possibly empty) or None if the ticket is invalid
+    """
+    ticket = request.args.get('ticket')
+    if not ticket:
+        return []
+    
+    channel_id = verify_stream_ticket(uuid.UUID(queue_id), ticket)
+    if channel_id is None:
+        return None
+    
+    return [channel_recipient(channel_id)]
+
 def require_host_auth(f):
     """
     Decorator to require host authentication for queue operations
@@ -0,0 +1,266 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional, Tuple
+from flask import Response, current_app, jsonify, make_response, request
+from config import get_config
+from database import on_commit
+
+# Format: (status_code, body, mimetype)
+CachedResponse = Tuple[int, bytes, str]
+
+# Longest Idempotency-Key accepted (fits the database key column with its scope)
+MAX_KEY_LENGTH = 128
+
+class IdempotencyStore:
+    """
+    In-memory responses by idempotency key, bounded and expiring
+
+    A key is reserved while its request runs, so a retry arriving before
+    the first attempt finished is told to wait instead of running twice.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000, lock_seconds: float = 30):
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._lock_seconds = lock_seconds
+        # Format: {key: [fingerprint, CachedResponse or None while running, expires_at_monotonic]}
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, fingerprint: str, now: Optional[float] = None) -> Tuple[bool, Optional[str], Optional[CachedResponse]]:
+        """
+        Claim a key for a new request, or return what an earlier request with it left
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Hash of the request the key was sent with
+            now: Override for the current monotonic time
+
+        Returns:
+            (reserved, fingerprint, response): reserved is True when the
+            caller should run the request; otherwise the earlier request's
+            fingerprint and its response (None while it is still running)
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                return False, entry[0], entry[1]
+
+            if entry is None and len(self._entries) >= self._max_entries:
+                # Oldest keys first
+                self._entries.popitem(last=False)
+            self._entries[key] = [fingerprint, None, now + self._lock_seconds]
+            self._entries.move_to_end(key)
+            return True, None, None
+
+    def complete(self, key: str, response: CachedResponse, now: Optional[float] = None):
+        """Store the response of a reserved key for the TTL"""
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = response
+                entry[2] = now + self._ttl
+
+    def release(self, key: str):
+        """Drop a reservation whose request did not succeed (a retry may run again)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is None:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all keys"""
+        with self._lock:
+            self._entries.clear()
+
+class DatabaseIdempotencyStore:
+    """Responses by idempotency key stored in the database so all workers share them"""
+
+    def __init__(self, ttl_seconds: float = 3600, lock_seconds: float = 30):
+        self._ttl = ttl_seconds
+        self._lock_seconds = lock_seconds
+
+    def reserve(self, key: str, fingerprint: str, now: Optional[float] = None) -> Tuple[bool, Optional[str], Optional[CachedResponse]]:
+        """
+        Claim a key with an insert that only one worker can win
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Hash of the request the key was sent with
+            now: Override for the current unix time
+
+        Returns:
+            Same as IdempotencyStore.reserve
+        """
+        from database import db
+        from models.models import IdempotencyRecord
+
+        now = time.time() if now is None else now
+        table = IdempotencyRecord.__table__
+
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        # An expired key is taken over by the new request
+        statement = insert(table).values(
+            key=key, fingerprint=fingerprint, expires_at=now + self._lock_seconds
+        ).on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "fingerprint": fingerprint,
+                "status_code": None,
+                "body": None,
+                "mimetype": None,
+                "expires_at": now + self._lock_seconds
+            },
+            where=table.c.expires_at <= now
+        ).returning(table.c.key)
+
+        # Own short transactions, independent of the request's session
+        with db.engine.begin() as connection:
+            if connection.execute(statement).first() is not None:
+                return True, None, None
+            row = connection.execute(
+                table.select().where(table.c.key == key)
+            ).one()
+
+        if row.status_code is None:
+            return False, row.fingerprint, None
+        return False, row.fingerprint, (row.status_code, row.body, row.mimetype)
+
+    def complete(self, key: str, response: CachedResponse, now: Optional[float] = None):
+        """Store the response of a reserved key for the TTL"""
+        from database import db
+        from models.models import IdempotencyRecord
+
+        now = time.time() if now is None else now
+        status_code, body, mimetype = response
+        table = IdempotencyRecord.__table__
+
+        with db.engine.begin() as connection:
+            connection.execute(
+                table.update().where(table.c.key == key).values(
+                    status_code=status_code, body=body, mimetype=mimetype, expires_at=now + self._ttl
+                )
+            )
+
+    def release(self, key: str):
+        """Drop a reservation whose request did not succeed (a retry may run again)"""
+        from database import db
+        from models.models import IdempotencyRecord
+
+        table = IdempotencyRecord.__table__
+        with db.engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.key == key, table.c.status_code.is_(None)))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete expired keys"""
+        from database import db
+        from models.models import IdempotencyRecord
+
+        now = time.time() if now is None else now
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                IdempotencyRecord.__table__.delete().where(IdempotencyRecord.expires_at <= now)
+            )
+        return result.rowcount
+
+    def clear(self):
+        """Drop all keys"""
+        from database import db
+        from models.models import IdempotencyRecord
+
+        with db.engine.begin() as connection:
+            connection.execute(IdempotencyRecord.__table__.delete())
+
+def _create_store():
+    if _config.IDEMPOTENCY_BACKEND == 'database':
+        return DatabaseIdempotencyStore(_config.IDEMPOTENCY_TTL_SECONDS, _config.IDEMPOTENCY_LOCK_SECONDS)
+    return IdempotencyStore(_config.IDEMPOTENCY_TTL_SECONDS, _config.IDEMPOTENCY_MAX_ENTRIES, _config.IDEMPOTENCY_LOCK_SECONDS)
+
+_config = get_config()
+
+# Global idempotency store instance (one per worker process with the memory backend)
+idempotency_store = _create_store()
+
+def _fingerprint() -> str:
+    # The user token may travel in a header (votes) or in the body (messages, hand raises)
+    digest = hashlib.sha256(request.headers.get('X-User-Token', '').encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _error(message: str, status_code: int):
+    response = jsonify({'error': message})
+    response.status_code = status_code
+    return response
+
+def _replay(cached: CachedResponse) -> Response:
+    status_code, body, mimetype = cached
+    response = Response(body, status=status_code, mimetype=mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(route_class: str):
+    """
+    Decorator making a write route safe to retry with an Idempotency-Key header
+
+    The first successful response for a key is stored once the request has
+    committed; a repeat of the request returns it without running the route
+    again (no database work, no second broadcast). Requests without the
+    header are not affected.
+
+    Args:
+        route_class: Key namespace for the route (e.g. 'message')
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            idempotency_key = request.headers.get('Idempotency-Key')
+            if not idempotency_key or not current_app.config.get('IDEMPOTENCY_ENABLED', _config.IDEMPOTENCY_ENABLED):
+                return f(*args, **kwargs)
+
+            if len(idempotency_key) > MAX_KEY_LENGTH or not idempotency_key.isprintable():
+                return _error(f'Idempotency-Key must be at most {MAX_KEY_LENGTH} printable characters', 400)
+
+            store = idempotency_store
+            key = f"{route_class}:{request.path}:{idempotency_key}"
+            fingerprint = _fingerprint()
+
+            reserved, stored_fingerprint, cached = store.reserve(key, fingerprint)
+            if not reserved:
+                if stored_fingerprint != fingerprint:
+                    return _error('Idempotency-Key was already used for a different request', 422)
+                if cached is None:
+                    return _error('A request with this Idempotency-Key is still in progress', 409)
+                return _replay(cached)
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                store.release(key)
+                raise
+
+            if response.status_code >= 400:
+                # Failures are not stored: the client may fix the request and retry
+                store.release(key)
+                return response
+
+            cached = (response.status_code, response.get_data(), response.mimetype)
+            # Stored only if the request's transaction commits; otherwise the
+            # reservation lapses after IDEMPOTENCY_LOCK_SECONDS
+            on_commit(lambda: store.complete(key, cached))
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,222 @@
+import math
+import threading
+import time
+import uuid
+import zlib
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+from flask import current_app, jsonify, request
+from sqlalchemy import case
+from config import get_config
+from utils.tokens import verify_user_token
+
+class TokenBucketLimiter:
+    """In-memory token buckets, sharded by key to keep lock contention low"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None, shard_count: int = 16, max_keys_per_shard: int = 10000):
+        self._rate = rate_per_minute / 60.0
+        self._capacity = float(burst or rate_per_minute)
+        self._max_keys = max(1, max_keys_per_shard)
+        # Format: [{key: [tokens, last_refill_monotonic]}] per shard
+        self._shards: List[Dict[str, list]] = [dict() for _ in range(max(1, shard_count))]
+        self._locks = [threading.Lock() for _ in self._shards]
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Take one token from the bucket for a key
+
+        Args:
+            key: Bucket key
+            now: Override for the current monotonic time
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        shard_index = zlib.crc32(key.encode("utf-8")) % len(self._shards)
+        buckets = self._shards[shard_index]
+
+        with self._locks[shard_index]:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self._max_keys:
+                    # Oldest keys first; an evicted bucket restarts full
+                    del buckets[next(iter(buckets))]
+                bucket = buckets[key] = [self._capacity, now]
+            else:
+                bucket[0] = min(self._capacity, bucket[0] + (now - bucket[1]) * self._rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+
+            return (1 - bucket[0]) / self._rate
+
+    def clear(self):
+        """Drop all buckets"""
+        for lock, buckets in zip(self._locks, self._shards):
+            with lock:
+                buckets.clear()
+
+class DatabaseTokenBucketLimiter:
+    """Token buckets stored in the database so all workers share them"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self._rate = rate_per_minute / 60.0
+        self._capacity = float(burst or rate_per_minute)
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Refill and take a token in a single atomic upsert
+
+        Args:
+            key: Bucket key
+            now: Override for the current unix time
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+        from database import db
+        from models.models import RateLimitBucket
+
+        now = time.time() if now is None else now
+        table = RateLimitBucket.__table__
+
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        refilled = table.c.tokens + (now - table.c.updated_at) * self._rate
+        refilled = case((refilled > self._capacity, self._capacity), else_=refilled)
+        has_token = refilled >= 1
+
+        statement = insert(table).values(
+            key=key, tokens=self._capacity - 1, updated_at=now, granted=True
+        ).on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "tokens": case((has_token, refilled - 1), else_=refilled),
+                "updated_at": now,
+                "granted": has_token
+            }
+        ).returning(table.c.tokens, table.c.granted)
+
+        # Own short transaction, independent of the request's session
+        with db.engine.begin() as connection:
+            tokens, granted = connection.execute(statement).one()
+
+        if granted:
+            return 0.0
+
+        return (1 - tokens) / self._rate
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete buckets that have refilled completely (same as no bucket)"""
+        from database import db
+        from models.models import RateLimitBucket
+
+        now = time.time() if now is None else now
+        refill_seconds = self._capacity / self._rate
+
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                RateLimitBucket.__table__.delete().where(
+                    RateLimitBucket.updated_at < now - refill_seconds
+                )
+            )
+        return result.rowcount
+
+    def clear(self):
+        """Drop all buckets"""
+        from database import db
+        from models.models import RateLimitBucket
+
+        with db.engine.begin() as connection:
+            connection.execute(RateLimitBucket.__table__.delete())
+
+def _create_limiter(rate_per_minute: float, burst: Optional[int] = None):
+    if rate_per_minute <= 0:
+        return None
+    if _config.RATE_LIMIT_BACKEND == 'database':
+        return DatabaseTokenBucketLimiter(rate_per_minute, burst)
+    return TokenBucketLimiter(rate_per_minute, burst)
+
+_config = get_config()
+
+# Per client: signed user token when present, otherwise IP address
+client_limiter = _create_limiter(_config.RATE_LIMIT_PER_MINUTE, _config.RATE_LIMIT_BURST)
+# Per queue: caps the broadcast fan-out a whole audience can cause
+queue_limiter = _create_limiter(_config.RATE_LIMIT_QUEUE_PER_MINUTE)
+
+def _canonical_id(value: str) -> str:
+    # Every spelling uuid.UUID accepts (case, hyphens, braces, urn:uuid:)
+    # names the same queue or token, so it must count against one bucket
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return value
+
+def _client_key(queue_id: Optional[str]) -> str:
+    user_token = request.headers.get('X-User-Token')
+    if not user_token:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict) and isinstance(data.get('user_token'), str):
+            user_token = data['user_token']
+
+    # Unsigned tokens cost nothing to rotate, so only a token signed for
+    # the queue gets its own bucket; everything else shares the IP's
+    if user_token and queue_id:
+        try:
+            if verify_user_token(uuid.UUID(queue_id), user_token):
+                return f"token:{_canonical_id(user_token)}"
+        except ValueError:
+            pass
+    return f"ip:{request.remote_addr}"
+
+def _too_many_requests(retry_after: float):
+    response = jsonify({'error': 'Rate limit exceeded'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def rate_limit(route_class: str, per_client: bool = True, per_queue: bool = True,
+               queue_lookup: Optional[Callable[..., Optional[str]]] = None):
+    """
+    Decorator applying token-bucket rate limits to a route
+
+    Args:
+        route_class: Bucket namespace shared by routes with the same cost (e.g. 'message')
+        per_client: Limit each signed user token (or IP otherwise) to RATE_LIMIT_PER_MINUTE
+        per_queue: Limit each queue to RATE_LIMIT_QUEUE_PER_MINUTE
+        queue_lookup: Called with the route kwargs to find the queue of routes
+            without a queue_id (e.g. votes by message_id)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('RATE_LIMIT_ENABLED', _config.RATE_LIMIT_ENABLED):
+                return f(*args, **kwargs)
+
+            queue_id = kwargs.get('queue_id')
+            if queue_id is None and queue_lookup is not None:
+                queue_id = queue_lookup(**kwargs)
+            if queue_id:
+                queue_id = _canonical_id(queue_id)
+
+            if per_client and client_limiter is not None:
+                retry_after = client_limiter.acquire(f"{route_class}:{_client_key(queue_id)}")
+                if retry_after:
+                    return _too_many_requests(retry_after)
+
+            if per_queue and queue_id and queue_limiter is not None:
+                retry_after = queue_limiter.acquire(f"{route_class}:queue:{queue_id}")
+                if retry_after:
+                    return _too_many_requests(retry_after)
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,224 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+from config import DEFAULT_SECRET_KEY, get_config
+
+logger = logging.getLogger(__name__)
+
+# Signed tokens are UUID-shaped so they fit the existing headers, columns
+# and API formats. Each purpose uses its own HMAC domain.
+HOST_TOKEN_DOMAIN = b"filap-host-token-v1"
+USER_TOKEN_DOMAIN = b"filap-user-token-v1"
+STREAM_TICKET_DOMAIN = b"filap-stream-ticket-v1"
+USER_CHANNEL_DOMAIN = b"filap-user-channel-v1"
+
+def _load_secret_key(secret_key: Optional[str]) -> Optional[bytes]:
+    """HMAC key for signed tokens, or None when SECRET_KEY is unset or the public default"""
+    if not secret_key or secret_key == DEFAULT_SECRET_KEY:
+        logger.warning("SECRET_KEY is not set: signed host and user tokens are disabled")
+        return None
+    return secret_key.encode("utf-8")
+
+_config = get_config()
+_secret_key = _load_secret_key(_config.SECRET_KEY)
+
+def signing_enabled() -> bool:
+    """Whether tokens can be signed (anyone could forge them with the default key)"""
+    return _secret_key is not None
+
+def _sign(domain: bytes, *parts: bytes) -> bytes:
+    """Compute the HMAC-SHA256 of the given parts with SECRET_KEY"""
+    return hmac.new(_secret_key, domain + b"|" + b"|".join(parts), hashlib.sha256).digest()
+
+def _parse_uuid(value: str) -> Optional[uuid.UUID]:
+    """Parse a UUID string, returning None if malformed"""
+    try:
+        return uuid.UUID(value)
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+def issue_host_token(queue_id: uuid.UUID, expires_at: datetime) -> str:
+    """
+    Issue a signed host token for a queue
+
+    Layout: 4-byte big-endian expiry (unix seconds) + 12-byte truncated
+    HMAC over (queue_id, expiry).
+
+    Args:
+        queue_id: Queue UUID
+        expires_at: Queue expiration time (naive UTC)
+
+    Returns:
+        Host token formatted as a UUID string
+
+    Raises:
+        RuntimeError: If SECRET_KEY is not set (see signing_enabled)
+    """
+    if not signing_enabled():
+        raise RuntimeError("Signed host tokens need a SECRET_KEY")
+
+    expiry = calendar.timegm(expires_at.utctimetuple()).to_bytes(4, "big")
+    tag = _sign(HOST_TOKEN_DOMAIN, queue_id.bytes, expiry)[:12]
+    return str(uuid.UUID(bytes=expiry + tag))
+
+def verify_host_token(queue_id: uuid.UUID, host_token: str) -> bool:
+    """
+    Verify a signed host token without touching the database
+
+    Args:
+        queue_id: Queue UUID the token must be bound to
+        host_token: Token presented in X-Queue-Secret
+
+    Returns:
+        True if the signature matches and the token has not expired
+    """
+    if not signing_enabled():
+        return False
+
+    token_uuid = _parse_uuid(host_token)
+    if token_uuid is None:
+        return False
+
+    raw = token_uuid.bytes
+    expiry, tag = raw[:4], raw[4:]
+    expected = _sign(HOST_TOKEN_DOMAIN, queue_id.bytes, expiry)[:12]
+
+    if not hmac.compare_digest(tag, expected):
+        return False
+
+    return int.from_bytes(expiry, "big") > time.time()
+
+def issue_user_token(queue_id: uuid.UUID) -> str:
+    """
+    Issue a signed user token for a queue
+
+    Layout: 8-byte random nonce + 8-byte truncated HMAC over (queue_id, nonce).
+    The token needs no expiry of its own: it is bound to the queue and stops
+    being usable when the queue expires.
+
+    Args:
+        queue_id: Queue UUID
+
+    Without a SECRET_KEY the token is a plain random UUID (accepted like
+    the unsigned tokens minted before signing existed).
+
+    Returns:
+        User token formatted as a UUID string
+    """
+    if not signing_enabled():
+        return str(uuid.uuid4())
+
+    nonce = secrets.token_bytes(8)
+    tag = _sign(USER_TOKEN_DOMAIN, queue_id.bytes, nonce)[:8]
+    return str(uuid.UUID(bytes=nonce + tag))
+
+def verify_user_token(queue_id: uuid.UUID, user_token: str) -> bool:
+    """
+    Verify a signed user token without touching the database
+
+    Args:
+        queue_id: Queue UUID the token must be bound to
+        user_token: Token presented by the client
+
+    Returns:
+        True if the signature matches
+    """
+    if not signing_enabled():
+        return False
+
+    token_uuid = _parse_uuid(user_token)
+    if token_uuid is None:
+        return False
+
+    raw = token_uuid.bytes
+    nonce, tag = raw[:8], raw[8:]
+    expected = _sign(USER_TOKEN_DOMAIN, queue_id.bytes, nonce)[:8]
+
+    return hmac.compare_digest(tag, expected)
+
+def user_channel_id(user_token: str) -> str:
+    """
+    Opaque id of a user's private event channel
+
+    An HMAC of the canonical token, so channel ids stored in the outbox do
+    not reveal tokens. It only has to be stable, so it works with any
+    SECRET_KEY (a stream ticket is still needed to subscribe).
+
+    Args:
+        user_token: User token (any case)
+
+    Returns:
+        32 hex characters
+    """
+    token_uuid = _parse_uuid(user_token)
+    canonical = str(token_uuid) if token_uuid else str(user_token)
+    digest = hmac.new(
+        _config.SECRET_KEY.encode("utf-8"), USER_CHANNEL_DOMAIN + b"|" + canonical.encode("utf-8"), hashlib.sha256
+    ).digest()
+    return digest[:16].hex()
+
+def issue_stream_ticket(queue_id: uuid.UUID, channel_id: str, ttl_seconds: int) -> str:
+    """
+    Issue a short-lived ticket subscribing an SSE connection to a private channel
+
+    EventSource cannot send headers, so the ticket travels in the query
+    string instead of the user token. Layout: 4-byte expiry + 16-byte
+    channel id + 12-byte truncated HMAC over (queue_id, expiry, channel id),
+    base64url encoded.
+
+    Args:
+        queue_id: Queue UUID to bind the ticket to
+        channel_id: Channel from user_channel_id
+        ttl_seconds: Seconds the ticket stays valid for connecting
+
+    Returns:
+        URL-safe ticket string
+
+    Raises:
+        RuntimeError: If SECRET_KEY is not set (see signing_enabled)
+    """
+    if not signing_enabled():
+        raise RuntimeError("Stream tickets need a SECRET_KEY")
+
+    expiry = (int(time.time()) + ttl_seconds).to_bytes(4, "big")
+    channel = bytes.fromhex(channel_id)
+    tag = _sign(STREAM_TICKET_DOMAIN, queue_id.bytes, expiry, channel)[:12]
+    return base64.urlsafe_b64encode(expiry + channel + tag).rstrip(b"=").decode("ascii")
+
+def verify_stream_ticket(queue_id: uuid.UUID, ticket: str) -> Optional[str]:
+    """
+    Verify a stream ticket without touching the database
+
+    Args:
+        queue_id: Queue UUID the ticket must be bound to
+        ticket: Ticket presented by the client
+
+    Returns:
+        Channel id the ticket grants, or None if invalid or expired
+    """
+    if not signing_enabled():
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(ticket + "=" * (-len(ticket) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) != 32:
+        return None
+
+    expiry, channel, tag = raw[:4], raw[4:20], raw[20:]
+    expected = _sign(STREAM_TICKET_DOMAIN, queue_id.bytes, expiry, channel)[:12]
+    if not hmac.compare_digest(tag, expected):
+        return None
+
+    if int.from_bytes(expiry, "big") < time.time():
+        return None
+
+    return channel.hex()
@@ -17,6 +17,8 @@ export type OpenAPIConfig = {
     PASSWORD?: string | Resolver<string> | undefined;
     HEADERS?: Headers | Resolver<Headers> | undefined;
     ENCODE_PATH?: ((path: string) => string) | undefined;
+    // Last X-Consistency-Token returned by a write, sent back so reads see it
+    CONSISTENCY_TOKEN?: string | undefined;
 };
 
 export const OpenAPI: OpenAPIConfig = {
@@ -29,4 +31,5 @@ export const OpenAPI: OpenAPIConfig = {
     PASSWORD: undefined,
     HEADERS: undefined,
     ENCODE_PATH: undefined,
+    CONSISTENCY_TOKEN: undefined,
 };
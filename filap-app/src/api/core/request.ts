@@ -159,6 +159,10 @@ export const getHeaders = async (config: OpenAPIConfig, options: ApiRequestOptio
         headers['Authorization'] = `Bearer ${token}`;
     }
 
+    if (isStringWithValue(config.CONSISTENCY_TOKEN)) {
+        headers['X-Consistency-Token'] = config.CONSISTENCY_TOKEN;
+    }
+
     if (isStringWithValue(username) && isStringWithValue(password)) {
         const credentials = base64(`${username}:${password}`);
         headers['Authorization'] = `Basic ${credentials}`;
@@ -303,6 +307,11 @@ export const request = <T>(config: OpenAPIConfig, options: ApiRequestOptions): C
                 const responseBody = await getResponseBody(response);
                 const responseHeader = getResponseHeader(response, options.responseHeader);
 
+                const consistencyToken = response.headers.get('X-Consistency-Token');
+                if (consistencyToken) {
+                    config.CONSISTENCY_TOKEN = consistencyToken;
+                }
+
                 const result: ApiResult = {
                     url,
                     ok: response.ok,
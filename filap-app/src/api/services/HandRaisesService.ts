@@ -44,12 +44,20 @@ export class HandRaisesService {
      * Get all hand raises for a queue
      * @param queueId Queue identifier
      * @param includeCompleted Whether to include completed hand raises
+     * @param limit Number of active hand raises to return (follow next_cursor for the rest of the line)
+     * @param cursor next_cursor from the previous page of active hand raises
+     * @param completedLimit Number of completed hand raises to return (server default HAND_RAISE_COMPLETED_HISTORY_LIMIT)
+     * @param completedCursor completed_next_cursor from the previous page of completed hand raises
      * @returns any Hand raises retrieved successfully
      * @throws ApiError
      */
     public static getApiQueuesHandraises(
         queueId: string,
         includeCompleted: boolean = false,
+        limit: number = 100,
+        cursor?: string,
+        completedLimit?: number,
+        completedCursor?: string,
     ): CancelablePromise<{
         active_hand_raises?: Array<{
             completed?: boolean;
@@ -58,11 +66,21 @@ export class HandRaisesService {
             queue_id?: string;
             raised_at?: string;
             user_name?: string;
-            user_token?: string;
         }>;
+        /**
+         * Most recently completed first
+         */
         completed_hand_raises?: Array<any>;
         total_active?: number;
         total_completed?: number;
+        /**
+         * Cursor of the next page of active hand raises (null on the last page)
+         */
+        next_cursor?: string | null;
+        /**
+         * Cursor of the next page of completed hand raises (null on the last page)
+         */
+        completed_next_cursor?: string | null;
     }> {
         return __request(OpenAPI, {
             method: 'GET',
@@ -72,8 +90,13 @@ export class HandRaisesService {
             },
             query: {
                 'include_completed': includeCompleted,
+                'limit': limit,
+                'cursor': cursor,
+                'completed_limit': completedLimit,
+                'completed_cursor': completedCursor,
             },
             errors: {
+                400: `Invalid query parameters`,
                 404: `Queue not found or expired`,
                 500: `Internal server error`,
             },
@@ -105,7 +128,6 @@ export class HandRaisesService {
         queue_id?: string;
         raised_at?: string;
         user_name?: string;
-        user_token?: string;
     }> {
         return __request(OpenAPI, {
             method: 'PATCH',
@@ -126,6 +148,98 @@ export class HandRaisesService {
             },
         });
     }
+    /**
+     * Complete the next speakers in raise order (host only)
+     * @param queueId Queue identifier
+     * @param xQueueSecret Host authentication secret
+     * @param body
+     * @returns any Hand raises completed (in raise order)
+     * @throws ApiError
+     */
+    public static postApiQueuesHandraisesAdvance(
+        queueId: string,
+        xQueueSecret: string,
+        body?: {
+            /**
+             * Number of active hand raises to complete
+             */
+            count?: number;
+        },
+    ): CancelablePromise<{
+        completed_hand_raises?: Array<{
+            completed?: boolean;
+            completed_at?: string;
+            id?: string;
+            queue_id?: string;
+            raised_at?: string;
+            user_name?: string;
+        }>;
+        total_completed?: number;
+    }> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/queues/{queue_id}/handraises/advance',
+            path: {
+                'queue_id': queueId,
+            },
+            headers: {
+                'X-Queue-Secret': xQueueSecret,
+            },
+            body: body,
+            errors: {
+                400: `Bad request`,
+                401: `Unauthorized (missing host secret)`,
+                404: `Queue not found or invalid host secret`,
+                500: `Internal server error`,
+            },
+        });
+    }
+    /**
+     * Complete several hand raises at once (host only)
+     * @param queueId Queue identifier
+     * @param xQueueSecret Host authentication secret
+     * @param body
+     * @returns any Hand raises completed (in raise order)
+     * @throws ApiError
+     */
+    public static postApiQueuesHandraisesComplete(
+        queueId: string,
+        xQueueSecret: string,
+        body: {
+            /**
+             * Hand raises to complete (already completed or lowered ones are skipped)
+             */
+            ids: Array<string>;
+        },
+    ): CancelablePromise<{
+        completed_hand_raises?: Array<{
+            completed?: boolean;
+            completed_at?: string;
+            id?: string;
+            queue_id?: string;
+            raised_at?: string;
+            user_name?: string;
+        }>;
+        total_completed?: number;
+    }> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/queues/{queue_id}/handraises/complete',
+            path: {
+                'queue_id': queueId,
+            },
+            headers: {
+                'X-Queue-Secret': xQueueSecret,
+            },
+            body: body,
+            errors: {
+                400: `Bad request`,
+                401: `Unauthorized (missing host secret)`,
+                404: `Queue not found or invalid host secret`,
+                500: `Internal server error`,
+            },
+        });
+    }
     /**
      * Get the position of a user in the hand raise queue
      * @param queueId Queue identifier
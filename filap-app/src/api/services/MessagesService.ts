@@ -37,7 +37,6 @@ export class MessagesService {
             queue_id?: string;
             text?: string;
             updated_at?: string;
-            user_token?: string;
             vote_count?: number;
         }>;
         /**
@@ -184,7 +183,6 @@ export class MessagesService {
         queue_id?: string;
         text?: string;
         updated_at?: string;
-        user_token?: string;
         vote_count?: number;
     }> {
         return __request(OpenAPI, {
@@ -31,6 +31,10 @@ export class QueuesService {
          * Host authentication secret
          */
         host_secret?: string;
+        /**
+         * Signed host token, accepted in X-Queue-Secret and verified without a database lookup
+         */
+        host_token?: string;
         /**
          * Unique queue identifier
          */
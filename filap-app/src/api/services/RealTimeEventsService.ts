@@ -9,11 +9,13 @@ export class RealTimeEventsService {
     /**
      * Server-Sent Events endpoint for real-time updates
      * @param queueId Queue identifier
+     * @param ticket Stream ticket (POST /api/queues/{queue_id}/events/ticket) to also receive the user's private events (position_changed, vote_changed, message_moderated)
      * @returns string SSE stream for real-time updates
      * @throws ApiError
      */
     public static getApiQueuesEvents(
         queueId: string,
+        ticket?: string,
     ): CancelablePromise<string> {
         return __request(OpenAPI, {
             method: 'GET',
@@ -21,8 +23,46 @@ export class RealTimeEventsService {
             path: {
                 'queue_id': queueId,
             },
+            query: {
+                'ticket': ticket,
+            },
+            errors: {
+                400: `Invalid or expired stream ticket`,
+                404: `Queue not found or expired`,
+            },
+        });
+    }
+    /**
+     * Get a ticket for the private event channel of a user
+     * @param queueId Queue identifier
+     * @param xUserToken User token whose private events (position_changed, vote_changed, message_moderated) the stream should receive
+     * @returns any Ticket created; pass it as ?ticket= when opening the event stream
+     * @throws ApiError
+     */
+    public static postApiQueuesEventsTicket(
+        queueId: string,
+        xUserToken: string,
+    ): CancelablePromise<{
+        /**
+         * Seconds the ticket stays valid for connecting
+         */
+        expires_in?: number;
+        ticket?: string;
+    }> {
+        return __request(OpenAPI, {
+            method: 'POST',
+            url: '/api/queues/{queue_id}/events/ticket',
+            path: {
+                'queue_id': queueId,
+            },
+            headers: {
+                'X-User-Token': xUserToken,
+            },
             errors: {
+                400: `User token required`,
+                403: `Invalid user token for this queue`,
                 404: `Queue not found or expired`,
+                503: `Private channels are disabled (SECRET_KEY not configured)`,
             },
         });
     }
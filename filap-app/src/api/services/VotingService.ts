@@ -28,7 +28,6 @@ export class VotingService {
         queue_id?: string;
         text?: string;
         updated_at?: string;
-        user_token?: string;
         /**
          * Updated vote count
          */
@@ -1,7 +1,7 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useTranslation } from 'react-i18next';
 import { HandRaisesService } from '../../api/services/HandRaisesService';
-import { StorageService } from '../../services';
+import { RealtimeService, StorageService } from '../../services';
 import { useToast } from '../Toast';
 import './HandRaiseInput.scss';
 
@@ -15,6 +15,7 @@ const HandRaiseInput: React.FC<HandRaiseInputProps> = ({ queueId }) => {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [userPosition, setUserPosition] = useState<number | null>(null);
   const [hasRaisedHand, setHasRaisedHand] = useState(false);
+  const eventSourceRef = useRef<EventSource | null>(null);
   const { showError, showSuccess } = useToast();
 
   // Get user token
@@ -90,15 +91,90 @@ const HandRaiseInput: React.FC<HandRaiseInputProps> = ({ queueId }) => {
     }
   }, [queueId, userName]);
 
-  // Check position on mount and set up polling
+  // Check position on mount
   useEffect(() => {
     checkUserPosition();
+  }, [checkUserPosition]);
+
+  // Receive position_changed pushes on a private channel (and the queue's positions_shifted) while the hand is raised
+  useEffect(() => {
+    if (!hasRaisedHand || !userToken) return;
+
+    let cancelled = false;
+
+    const connect = async () => {
+      // The stream is opened with a short-lived ticket, so the token never goes in the URL;
+      // without one (private channels disabled) the 10 s poll below keeps the position fresh
+      const ticket = await RealtimeService.getStreamTicket(queueId, userToken);
+      if (cancelled || !ticket) return;
+
+      const apiUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000';
+      const eventSource = new EventSource(
+        `${apiUrl}/api/queues/${queueId}/events?ticket=${encodeURIComponent(ticket)}`
+      );
+      eventSourceRef.current = eventSource;
+
+      // Catch up on anything missed while (re)connecting
+      eventSource.onopen = () => {
+        checkUserPosition();
+      };
+
+      eventSource.addEventListener('position_changed', (event: MessageEvent) => {
+        try {
+          const { position } = JSON.parse(event.data);
+          if (position) {
+            setUserPosition(position);
+          } else {
+            // Hand was completed by the host or lowered elsewhere
+            setHasRaisedHand(false);
+            setUserPosition(null);
+          }
+        } catch (e) {
+          console.error("Failed to parse position_changed event", e);
+        }
+      });
+
+      // Raises ahead were lowered, completed or reopened: everyone from from_position on moved by delta
+      eventSource.addEventListener('positions_shifted', (event: MessageEvent) => {
+        try {
+          const { from_position, delta } = JSON.parse(event.data);
+          setUserPosition(prev => (prev !== null && prev >= from_position ? prev + delta : prev));
+        } catch (e) {
+          console.error("Failed to parse positions_shifted event", e);
+        }
+      });
+
+      // The ticket expires, so reconnect with a fresh one instead of letting EventSource retry
+      eventSource.onerror = () => {
+        eventSource.close();
+        if (eventSourceRef.current === eventSource) eventSourceRef.current = null;
+        setTimeout(() => {
+          if (!cancelled) connect();
+        }, 3000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      cancelled = true;
+      eventSourceRef.current?.close();
+      eventSourceRef.current = null;
+    };
+  }, [queueId, userToken, hasRaisedHand, checkUserPosition]);
+
+  // Poll every 10 seconds only as a fallback while the push channel is down
+  useEffect(() => {
+    if (!hasRaisedHand) return;
 
-    // Poll for position updates every 10 seconds as backup to SSE
-    const interval = setInterval(checkUserPosition, 10000);
+    const interval = setInterval(() => {
+      if (eventSourceRef.current?.readyState !== EventSource.OPEN) {
+        checkUserPosition();
+      }
+    }, 10000);
 
     return () => clearInterval(interval);
-  }, [checkUserPosition]);
+  }, [hasRaisedHand, checkUserPosition]);
 
   return (
     <div className="hand-raise-input">
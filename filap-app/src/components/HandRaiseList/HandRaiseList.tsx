@@ -8,7 +8,6 @@ import './HandRaiseList.scss';
 interface HandRaise {
   id: string;
   user_name: string;
-  user_token: string;
   raised_at: string;
   completed: boolean;
   completed_at?: string;
@@ -47,7 +46,21 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
   // Fetch hand raises from API
   const fetchHandRaises = useCallback(async () => {
     try {
-      const data = await HandRaisesService.getApiQueuesHandraises(queueId, isHost);
+      const firstPage = await HandRaisesService.getApiQueuesHandraises(queueId, isHost);
+      const activeHandRaises = [...(firstPage.active_hand_raises || [])];
+
+      // Active hand raises are paginated; follow next_cursor until the whole line is loaded
+      let cursor = firstPage.next_cursor;
+      while (cursor) {
+        const page = await HandRaisesService.getApiQueuesHandraises(queueId, false, undefined, cursor);
+        activeHandRaises.push(...(page.active_hand_raises || []));
+        cursor = page.next_cursor;
+      }
+
+      const data = {
+        ...firstPage,
+        active_hand_raises: activeHandRaises
+      } as HandRaiseData;
       setHandRaises(data);
       onHandRaiseUpdate?.(data);
     } catch (error) {
@@ -105,13 +118,15 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
         setHandRaises(prev => {
           let newActive = [...prev.active_hand_raises];
           let newCompleted = [...prev.completed_hand_raises];
+          // Lists are single pages, so totals follow the server counters by delta
+          const moved = updatedHandRaise.completed ? 1 : -1;
 
           // Remove from active if completed
           if (updatedHandRaise.completed) {
             newActive = newActive.filter(hr => hr.id !== updatedHandRaise.id);
-            // Add to completed if not already there
+            // Add to completed (most recent first) if not already there
             if (!newCompleted.find(hr => hr.id === updatedHandRaise.id)) {
-              newCompleted.push(updatedHandRaise);
+              newCompleted.unshift(updatedHandRaise);
             }
           } else {
             // Remove from completed if uncompleted
@@ -125,8 +140,8 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
           const newData = {
             active_hand_raises: newActive,
             completed_hand_raises: newCompleted,
-            total_active: newActive.length,
-            total_completed: newCompleted.length
+            total_active: prev.total_active - moved,
+            total_completed: prev.total_completed + moved
           };
           onHandRaiseUpdate?.(newData);
           return newData;
@@ -136,6 +151,30 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
       }
     });
 
+    eventSource.addEventListener('hand_raises_completed', (event: MessageEvent) => {
+      try {
+        const { hand_raises: completedRaises } = JSON.parse(event.data) as { hand_raises: HandRaise[] };
+        const completedIds = new Set(completedRaises.map(hr => hr.id));
+        setHandRaises(prev => {
+          const newActive = prev.active_hand_raises.filter(hr => !completedIds.has(hr.id));
+          const newCompleted = [
+            ...[...completedRaises].reverse(),
+            ...prev.completed_hand_raises.filter(hr => !completedIds.has(hr.id))
+          ];
+          const newData = {
+            active_hand_raises: newActive,
+            completed_hand_raises: newCompleted,
+            total_active: prev.total_active - completedRaises.length,
+            total_completed: prev.total_completed + completedRaises.length
+          };
+          onHandRaiseUpdate?.(newData);
+          return newData;
+        });
+      } catch (e) {
+        console.error("Failed to parse hand_raises_completed event", e);
+      }
+    });
+
     eventSource.addEventListener('hand_raise_removed', (event: MessageEvent) => {
       try {
         const { id: removedId } = JSON.parse(event.data);
@@ -144,8 +183,8 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
             ...prev,
             active_hand_raises: prev.active_hand_raises.filter(hr => hr.id !== removedId),
             completed_hand_raises: prev.completed_hand_raises.filter(hr => hr.id !== removedId),
-            total_active: prev.active_hand_raises.filter(hr => hr.id !== removedId).length,
-            total_completed: prev.completed_hand_raises.filter(hr => hr.id !== removedId).length
+            // Only active raises can be lowered
+            total_active: prev.total_active - 1
           };
           onHandRaiseUpdate?.(newData);
           return newData;
@@ -191,6 +230,24 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
     }
   }, [isHost, queueId, showError]);
 
+  // Complete the next speaker in line (host only)
+  const advanceToNext = useCallback(async () => {
+    if (!isHost) return;
+
+    try {
+      const hostSecret = StorageService.getHostSecret(queueId);
+      if (!hostSecret) {
+        showError(t('toast.errors.hostAuthRequired'));
+        return;
+      }
+
+      await HandRaisesService.postApiQueuesHandraisesAdvance(queueId, hostSecret, { count: 1 });
+    } catch (error) {
+      console.error('Error advancing hand raises:', error);
+      showError(t('toast.errors.markCompletedFailed'));
+    }
+  }, [isHost, queueId, showError]);
+
   // Setup on mount
   useEffect(() => {
     fetchHandRaises();
@@ -224,6 +281,15 @@ const HandRaiseList: React.FC<HandRaiseListProps> = ({
           {t('handRaise.activeRaises')} ({handRaises.total_active})
         </h3>
 
+        {isHost && handRaises.active_hand_raises.length > 0 && (
+          <button
+            className="btn btn--small btn--primary hand-raise-list__next"
+            onClick={advanceToNext}
+          >
+            {t('handRaise.nextSpeaker')}
+          </button>
+        )}
+
         {handRaises.active_hand_raises.length === 0 ? (
           <div className="hand-raise-list__empty">
             <div className="hand-raise-list__empty-icon">
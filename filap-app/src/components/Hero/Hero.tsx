@@ -35,8 +35,9 @@ const Hero: React.FC = () => {
         throw new Error('Invalid queue response: missing id or host_secret');
       }
       
+      // Prefer the signed host token: the API verifies it without a database lookup
       StorageService.storeQueueData(queueResponse.id, {
-        hostSecret: queueResponse.host_secret,
+        hostSecret: queueResponse.host_token || queueResponse.host_secret,
         queueName: queueResponse.name,
         expiresAt: queueResponse.expires_at
       });
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useTranslation } from 'react-i18next';
-import { MessageService } from '../../services';
+import { MessageService, RealtimeService, StorageService } from '../../services';
 import MessageCard from '../MessageCard';
 import { useToast } from '../Toast';
 import type { SortOption } from '../QueueHeader';
@@ -36,6 +36,11 @@ const MessageList: React.FC<MessageListProps> = ({
   const [messages, setMessages] = useState<Message[]>([]);
   const [loading, setLoading] = useState(true);
   const eventSourceRef = useRef<EventSource | null>(null);
+  const queueExpiredRef = useRef(false);
+  // Id of the last event received, so a reconnect replays what was missed
+  const lastEventIdRef = useRef<string | null>(null);
+  // Bumped by every (re)connect and cleanup, so a slow ticket fetch cannot open a stale stream
+  const connectionAttemptRef = useRef(0);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const containerRef = useRef<HTMLDivElement>(null);
   const { showError } = useToast();
@@ -99,6 +104,12 @@ const MessageList: React.FC<MessageListProps> = ({
     }
   }, [queueId, currentSort, showError, sortMessages]);
 
+  // Latest fetchMessages for the SSE 'resync' listener (avoids reconnecting on sort changes)
+  const fetchMessagesRef = useRef(fetchMessages);
+  useEffect(() => {
+    fetchMessagesRef.current = fetchMessages;
+  }, [fetchMessages]);
+
   // --- SSE Event Handlers ---
   const handleNewMessage = useCallback((event: MessageEvent) => {
     try {
@@ -116,7 +127,9 @@ const MessageList: React.FC<MessageListProps> = ({
 
   const handleMessageUpdated = useCallback((event: MessageEvent) => {
     try {
+      // has_user_voted in public events is the voter's view; ours comes from vote_changed
       const updatedData = JSON.parse(event.data);
+      delete updatedData.has_user_voted;
       setMessages(prev => 
         sortMessagesRef.current(prev.map(msg => msg.id === updatedData.id ? { ...msg, ...updatedData } : msg))
       );
@@ -125,6 +138,17 @@ const MessageList: React.FC<MessageListProps> = ({
     }
   }, []);
 
+  const handleVoteChanged = useCallback((event: MessageEvent) => {
+    try {
+      const { id, has_user_voted, vote_count } = JSON.parse(event.data);
+      setMessages(prev =>
+        sortMessagesRef.current(prev.map(msg => msg.id === id ? { ...msg, has_user_voted, vote_count } : msg))
+      );
+    } catch (e) {
+      console.error("Failed to parse vote_changed event", e);
+    }
+  }, []);
+
   const handleMessageDeleted = useCallback((event: MessageEvent) => {
     try {
       const { id: deletedId } = JSON.parse(event.data);
@@ -145,15 +169,39 @@ const MessageList: React.FC<MessageListProps> = ({
     }
   }, [onQueueUpdate]);
 
+  const handleQueueExpired = useCallback(() => {
+    // The server closes the stream; stop reconnecting to an expired queue
+    queueExpiredRef.current = true;
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+  }, []);
+
   // Setup SSE connection
-  const setupSSEConnection = useCallback(() => {
+  const setupSSEConnection = useCallback(async () => {
+    queueExpiredRef.current = false;
+    const attempt = ++connectionAttemptRef.current;
+
     // Close existing connection
     if (eventSourceRef.current) {
       eventSourceRef.current.close();
     }
 
     const apiUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000';
-    const eventSource = new EventSource(`${apiUrl}/api/queues/${queueId}/events`);
+    // Subscribe to our private channel too (own vote status, moderation of our messages)
+    // with a short-lived ticket, so the token itself never goes in the URL
+    const userToken = StorageService.getUserToken(queueId);
+    const params = new URLSearchParams();
+    if (userToken) {
+      const ticket = await RealtimeService.getStreamTicket(queueId, userToken);
+      if (attempt !== connectionAttemptRef.current) return;
+      if (ticket) params.set('ticket', ticket);
+    }
+    // A new EventSource does not send Last-Event-ID, so pass it explicitly
+    if (lastEventIdRef.current) params.set('last_event_id', lastEventIdRef.current);
+    const query = params.toString() ? `?${params.toString()}` : '';
+    const eventSource = new EventSource(`${apiUrl}/api/queues/${queueId}/events${query}`);
     
     eventSource.onopen = () => {
       console.log('SSE connection opened');
@@ -173,8 +221,22 @@ const MessageList: React.FC<MessageListProps> = ({
     eventSource.addEventListener('message_updated', handleMessageUpdated);
     eventSource.addEventListener('message_deleted', handleMessageDeleted);
     eventSource.addEventListener('queue_updated', handleQueueUpdated);
+    eventSource.addEventListener('queue_expired', handleQueueExpired);
+    eventSource.addEventListener('vote_changed', handleVoteChanged);
+
+    const trackEventId = (event: MessageEvent) => {
+      if (event.lastEventId) lastEventIdRef.current = event.lastEventId;
+    };
+    ['new_message', 'message_updated', 'message_deleted', 'queue_updated', 'vote_changed'].forEach((type) => {
+      eventSource.addEventListener(type, trackEventId);
+    });
+    // Missed events are no longer available: reload the list instead
+    eventSource.addEventListener('resync', () => {
+      fetchMessagesRef.current();
+    });
 
     eventSource.onerror = (error) => {
+      if (queueExpiredRef.current) return;
       console.error('SSE connection error:', error);
 
       // Attempt to reconnect after 3 seconds
@@ -185,10 +247,11 @@ const MessageList: React.FC<MessageListProps> = ({
     };
 
     eventSourceRef.current = eventSource;
-  }, [queueId, handleNewMessage, handleMessageUpdated, handleMessageDeleted, handleQueueUpdated]);
+  }, [queueId, handleNewMessage, handleMessageUpdated, handleMessageDeleted, handleQueueUpdated, handleQueueExpired, handleVoteChanged]);
 
   // Cleanup function
   const cleanup = useCallback(() => {
+    connectionAttemptRef.current += 1;
     if (eventSourceRef.current) {
       eventSourceRef.current.close();
       eventSourceRef.current = null;
@@ -200,6 +263,11 @@ const MessageList: React.FC<MessageListProps> = ({
     fetchMessages();
   }, [fetchMessages]);
 
+  // Event ids belong to one queue's stream
+  useEffect(() => {
+    lastEventIdRef.current = null;
+  }, [queueId]);
+
   // Effect for managing the SSE connection, only runs when queueId changes
   useEffect(() => {
     setupSSEConnection();
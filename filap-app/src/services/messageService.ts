@@ -7,7 +7,8 @@ export interface MessageResponse {
   queue_id: string;
   text: string;
   author_name?: string;
-  user_token: string;
+  /** Only in the author's own create response */
+  user_token?: string;
   vote_count: number;
   is_read: boolean;
   has_user_voted: boolean;
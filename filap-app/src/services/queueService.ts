@@ -12,6 +12,7 @@ export type QueueResponse = {
   default_sort_order?: 'votes' | 'newest';
   expires_at?: string;
   host_secret?: string;
+  host_token?: string;
   id?: string;
   name?: string;
 };
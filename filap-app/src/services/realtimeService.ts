@@ -1,5 +1,7 @@
+import { RealTimeEventsService } from '../api';
+
 export interface SSEEvent {
-  event: 'new_message' | 'message_updated' | 'message_deleted' | 'queue_updated';
+  event: 'new_message' | 'message_updated' | 'message_deleted' | 'queue_updated' | 'queue_expired' | 'position_changed' | 'positions_shifted' | 'vote_changed' | 'message_moderated';
   data: any;
 }
 
@@ -44,6 +46,21 @@ export class RealtimeService {
     return eventSource;
   }
 
+  /**
+   * Get a short-lived ticket for the user's private event channel.
+   * Resolves to null when private channels are unavailable (the caller
+   * then connects to the public stream only).
+   */
+  static async getStreamTicket(queueId: string, userToken: string): Promise<string | null> {
+    try {
+      const response = await RealTimeEventsService.postApiQueuesEventsTicket(queueId, userToken);
+      return response.ticket ?? null;
+    } catch (error) {
+      console.warn('Private event channel unavailable:', error);
+      return null;
+    }
+  }
+
   /**
    * Disconnect from SSE stream
    */